@@ -0,0 +1,109 @@
+"""Benchmark du moteur ARP rapide (AF_PACKET) face au chemin scapy
+
+Mode hors-ligne (par défaut, sans root) : construction des requêtes et
+analyse des réponses sur des trames synthétiques.
+Mode réseau (--iface, root requis) : balayage réel avec les deux moteurs.
+
+    python -m benchmarks.bench_arp_engine --frames 50000
+    sudo python -m benchmarks.bench_arp_engine --iface eth0 --cidr 192.168.1.0/24
+"""
+import argparse
+import ipaddress
+import json
+import socket
+import struct
+import time
+import scapy.all as scapy
+from src.network_scanner.raw_arp import (RawARPEngine, build_request_template, parse_arp_reply,
+                                         TARGET_IP_OFFSET, FRAME_SIZE, ARP_REPLY)
+
+
+def measure(func):
+    """Retourne (durée murale, temps CPU, résultat)"""
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = func()
+    return time.perf_counter() - wall, time.process_time() - cpu, result
+
+
+def synthetic_replies(count):
+    """Génère des trames de réponse ARP brutes pour count hôtes"""
+    frames = []
+    base = int(ipaddress.IPv4Address("10.0.0.1"))
+    for index in range(count):
+        mac = struct.pack("!HI", 0x0200, index)
+        frame = build_request_template(mac, str(ipaddress.IPv4Address(base + index)))
+        struct.pack_into("!H", frame, 20, ARP_REPLY)
+        frame[TARGET_IP_OFFSET:FRAME_SIZE] = socket.inet_aton("10.0.0.254")
+        frames.append(bytes(frame))
+    return frames
+
+
+def bench_offline(count):
+    ips = [str(ipaddress.IPv4Address(int(ipaddress.IPv4Address("10.0.0.1")) + i)) for i in range(count)]
+    frames = synthetic_replies(count)
+    results = {}
+
+    # Construction des requêtes
+    wall, cpu, _ = measure(lambda: [bytes(scapy.Ether(dst="ff:ff:ff:ff:ff:ff") / scapy.ARP(pdst=ip)) for ip in ips])
+    results['build_scapy'] = {'seconds': wall, 'cpu_seconds': cpu, 'per_second': count / wall}
+
+    def build_raw():
+        frame = build_request_template(b"\x02\x00\x00\x00\x00\x01", "10.0.0.254")
+        for ip in ips:
+            frame[TARGET_IP_OFFSET:FRAME_SIZE] = socket.inet_aton(ip)
+    wall, cpu, _ = measure(build_raw)
+    results['build_fast'] = {'seconds': wall, 'cpu_seconds': cpu, 'per_second': count / wall}
+
+    # Analyse des réponses
+    def parse_scapy():
+        return [(packet.psrc, packet.hwsrc) for packet in map(scapy.Ether, frames)]
+    wall, cpu, parsed_scapy = measure(parse_scapy)
+    results['parse_scapy'] = {'seconds': wall, 'cpu_seconds': cpu, 'per_second': count / wall}
+
+    wall, cpu, parsed_fast = measure(lambda: [parse_arp_reply(frame) for frame in frames])
+    results['parse_fast'] = {'seconds': wall, 'cpu_seconds': cpu, 'per_second': count / wall}
+
+    assert parsed_scapy == parsed_fast, "Les deux analyseurs divergent"
+    return results
+
+
+def bench_live(interface, cidr, timeout):
+    source_ip = scapy.get_if_addr(interface)
+    results = {}
+
+    def sweep_scapy():
+        answered, _ = scapy.srp(scapy.Ether(dst="ff:ff:ff:ff:ff:ff") / scapy.ARP(pdst=cidr),
+                                timeout=timeout, iface=interface, verbose=False)
+        return {(received.psrc, received.hwsrc) for _, received in answered}
+    wall, cpu, found = measure(sweep_scapy)
+    results['sweep_scapy'] = {'seconds': wall, 'cpu_seconds': cpu, 'devices': len(found)}
+
+    engine = RawARPEngine(interface, source_ip, timeout=timeout)
+    wall, cpu, answered = measure(lambda: engine.sweep(cidr))
+    results['sweep_fast'] = {'seconds': wall, 'cpu_seconds': cpu, 'devices': len(answered)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000, help="Nombre de trames synthétiques")
+    parser.add_argument("--iface", help="Interface pour le balayage réel (root requis)")
+    parser.add_argument("--cidr", help="Réseau à balayer en mode réseau")
+    parser.add_argument("--timeout", type=float, default=2)
+    parser.add_argument("--json", action="store_true", help="Sortie JSON")
+    args = parser.parse_args()
+
+    if args.iface:
+        results = bench_live(args.iface, args.cidr, args.timeout)
+    else:
+        results = bench_offline(args.frames)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, values in results.items():
+        print(f"{name:<12} " + "  ".join(f"{key}={value:.4g}" for key, value in values.items()))
+
+
+if __name__ == "__main__":
+    main()
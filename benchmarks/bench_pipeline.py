@@ -0,0 +1,298 @@
+"""Benchmark de charge synthétique du chemin scan -> persistance -> notification
+
+Génère des réponses ARP synthétiques pour 1k/10k/100k appareils avec un
+renouvellement réaliste (arrivées, départs, changements d'IP) et mesure,
+pour chaque étape, le débit, les latences p50/p99 et le pic mémoire :
+
+- AdvancedNetworkScanner.process_scan_results
+- AdvancedNetworkScanner.behavioral_analysis
+- DatabaseManager.save_devices
+- PluginManager.notify_device_detected
+
+Scapy, le DNS et la recherche OUI sont remplacés par des bouchons.
+
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 --output bench.json
+    python -m benchmarks.bench_pipeline --sizes 1000 --compare bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+from src.network_scanner.passive import ARPReply
+from src.network_scanner.scanner import AdvancedNetworkScanner
+from src.database.db_manager import DatabaseManager
+from src.plugins.init import PluginManager, WifiMonitorPlugin
+
+STAGES = ('process_scan_results', 'behavioral_analysis', 'save_devices', 'notify_device_detected')
+
+
+class StubOUIIndex:
+    def lookup(self, mac):
+        return "Fabricant synthétique"
+
+    def lookup_many(self, macs, default=None):
+        return ["Fabricant synthétique"] * len(macs)
+
+
+class CountingPlugin(WifiMonitorPlugin):
+    @classmethod
+    def get_name(cls):
+        return "Benchmark"
+
+    def initialize(self, app_context):
+        self.count = 0
+
+    def on_device_detected(self, device):
+        self.count += 1
+
+    def on_alert_triggered(self, alert):
+        pass
+
+
+class SyntheticNetwork:
+    """Population d'appareils avec renouvellement entre les cycles"""
+
+    def __init__(self, size, churn=0.05, seed=42):
+        self.random = random.Random(seed)
+        self.churn = churn
+        self.next_id = 0
+        self.devices = {}
+        for _ in range(size):
+            self._join()
+
+    def _address(self, index):
+        return f"10.{(index >> 16) & 0xff}.{(index >> 8) & 0xff}.{index & 0xff}"
+
+    def _join(self):
+        self.next_id += 1
+        mac = "02:00:" + ":".join(f"{(self.next_id >> shift) & 0xff:02x}" for shift in (24, 16, 8, 0))
+        self.devices[mac] = self._address(self.next_id)
+
+    def step(self):
+        """Fait évoluer la population : départs, arrivées et changements d'IP"""
+        changes = max(1, int(len(self.devices) * self.churn))
+        for mac in self.random.sample(list(self.devices), changes):
+            del self.devices[mac]
+        for _ in range(changes):
+            self._join()
+        for mac in self.random.sample(list(self.devices), changes // 2):
+            self.next_id += 1
+            self.devices[mac] = self._address(self.next_id)
+
+    def answered(self):
+        return [(None, ARPReply(ip, mac)) for mac, ip in self.devices.items()]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def make_scanner():
+    with patch('src.network_scanner.scanner.get_network_info', return_value={}), \
+         patch('src.network_scanner.scanner.get_all_network_info', return_value=[]), \
+         patch('src.network_scanner.scanner.is_admin', return_value=False), \
+         patch('src.network_scanner.scanner.MacLookup'), \
+         patch('src.network_scanner.scanner.load_default_index', return_value=StubOUIIndex()):
+        scanner = AdvancedNetworkScanner()
+
+    # Pas de journal sur disque pendant la mesure
+    scanner.logger.handlers = [logging.NullHandler()]
+    scanner.logger.propagate = False
+    scanner.hostname_resolver.resolve_many = lambda ips: {ip: f"host-{ip}" for ip in ips}
+    return scanner
+
+
+def make_plugins():
+    with patch.object(PluginManager, 'load_builtin_plugins'), \
+         patch.object(PluginManager, 'load_external_plugins'):
+        manager = PluginManager()
+    plugin = CountingPlugin()
+    plugin.initialize({})
+    manager.plugins[plugin.get_name()] = plugin
+    return manager
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_cycles(size, cycles, batch_size, churn, db_path):
+    """Exécute les cycles et retourne les échantillons de latence par étape"""
+    network = SyntheticNetwork(size, churn)
+    scanner = make_scanner()
+    plugins = make_plugins()
+    db = DatabaseManager()
+    db.db_path = db_path
+    db.initialize_db()
+
+    samples = {stage: [] for stage in STAGES}
+    counts = {stage: 0 for stage in STAGES}
+
+    def timed(stage, func, *args, count=1):
+        start = time.perf_counter()
+        result = func(*args)
+        samples[stage].append(time.perf_counter() - start)
+        counts[stage] += count
+        return result
+
+    for _ in range(cycles):
+        devices = []
+        for batch in chunks(network.answered(), batch_size):
+            devices.extend(timed('process_scan_results', scanner.process_scan_results, batch, count=len(batch)))
+
+        timed('behavioral_analysis', scanner.behavioral_analysis, devices, count=len(devices))
+
+        rows = [device.to_dict() for device in devices]
+        for batch in chunks(rows, batch_size):
+            timed('save_devices', db.save_devices, batch, count=len(batch))
+        timed('save_devices', db.flush, count=0)
+
+        for device in devices:
+            timed('notify_device_detected', plugins.notify_device_detected, device)
+
+        network.step()
+
+    scanner.enrichment.shutdown()
+    scanner.hostname_resolver.shutdown()
+    db.close()
+    return samples, counts
+
+
+def measure_peak_memory(size, cycles, batch_size, churn, db_path):
+    """Pic mémoire (tracemalloc) de chaque étape, mesuré dans une passe séparée"""
+    network = SyntheticNetwork(size, churn)
+    scanner = make_scanner()
+    plugins = make_plugins()
+    db = DatabaseManager()
+    db.db_path = db_path
+    db.initialize_db()
+    peaks = {stage: 0 for stage in STAGES}
+
+    def traced(stage, func, *args):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        peaks[stage] = max(peaks[stage], tracemalloc.get_traced_memory()[1] - baseline)
+        return result
+
+    tracemalloc.start()
+    try:
+        for _ in range(cycles):
+            devices = []
+            for batch in chunks(network.answered(), batch_size):
+                devices.extend(traced('process_scan_results', scanner.process_scan_results, batch))
+            traced('behavioral_analysis', scanner.behavioral_analysis, devices)
+            rows = [device.to_dict() for device in devices]
+            for batch in chunks(rows, batch_size):
+                traced('save_devices', db.save_devices, batch)
+            traced('save_devices', db.flush)
+            traced('notify_device_detected', lambda: [plugins.notify_device_detected(d) for d in devices])
+            network.step()
+    finally:
+        tracemalloc.stop()
+        scanner.enrichment.shutdown()
+        scanner.hostname_resolver.shutdown()
+        db.close()
+    return peaks
+
+
+def benchmark(sizes, cycles, batch_size, churn):
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            samples, counts = run_cycles(size, cycles, batch_size, churn, os.path.join(tmpdir, "bench.db"))
+            peaks = measure_peak_memory(size, 1, batch_size, churn, os.path.join(tmpdir, "bench_mem.db"))
+
+        for stage in STAGES:
+            total = sum(samples[stage])
+            results.append({
+                'size': size,
+                'stage': stage,
+                'calls': len(samples[stage]),
+                'items': counts[stage],
+                'seconds': total,
+                'throughput': counts[stage] / total if total else None,
+                'p50_ms': percentile(samples[stage], 0.50) * 1000,
+                'p99_ms': percentile(samples[stage], 0.99) * 1000,
+                'peak_kib': peaks[stage] / 1024,
+            })
+    return results
+
+
+def metadata(args):
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                  text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': revision,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cycles': args.cycles,
+        'batch_size': args.batch_size,
+        'churn': args.churn,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Compare au fichier de référence, retourne la liste des régressions"""
+    with open(baseline_path) as f:
+        baseline = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for result in results:
+        reference = baseline.get((result['size'], result['stage']))
+        if not reference or not reference['throughput'] or not result['throughput']:
+            continue
+        ratio = result['throughput'] / reference['throughput']
+        if ratio < 1 - tolerance:
+            regressions.append({**result, 'baseline_throughput': reference['throughput'], 'ratio': ratio})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scan -> persistance -> notification")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--cycles", type=int, default=3, help="Cycles de scan par taille")
+    parser.add_argument("--batch-size", type=int, default=500, help="Appareils par appel d'étape")
+    parser.add_argument("--churn", type=float, default=0.05, help="Part d'appareils renouvelés par cycle")
+    parser.add_argument("--output", help="Fichier JSON de résultats (sinon sortie standard)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Résultats de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Baisse de débit tolérée (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    report = {'meta': metadata(args), 'results': benchmark(args.sizes, args.cycles, args.batch_size, args.churn)}
+
+    if args.compare:
+        report['regressions'] = compare(report['results'], args.compare, args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    for result in report['results']:
+        print(f"{result['size']:>7} {result['stage']:<24} {result['throughput'] or 0:>12.0f}/s "
+              f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms pic={result['peak_kib']:.0f}KiB",
+              file=sys.stderr)
+
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncDatabase:
+    """Accès asynchrone au DatabaseManager pour les routes FastAPI
+
+    Les appels sont exécutés dans un pool de threads dédié, hors de la
+    boucle d'événements d'uvicorn. Chaque thread du pool garde ses propres
+    connexions en lecture seule (ConnectionManager), ce qui forme le pool
+    de connexions de l'API ; en mode WAL, les lectures avancent pendant les
+    écritures du scanner.
+
+        device = await self.async_db.get_device(mac)
+    """
+
+    def __init__(self, db, max_workers=None):
+        self.db = db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 2),
+                                           thread_name_prefix='api-db')
+
+    async def run(self, func, *args, **kwargs):
+        """Exécute une fonction bloquante dans le pool et attend son résultat"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self.db, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        return call
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
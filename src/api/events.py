@@ -0,0 +1,97 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from threading import Lock
+
+
+class SlowConsumer(Exception):
+    """Abonné trop en retard : ses événements ont été abandonnés"""
+
+
+class EventBroker:
+    """Diffusion des événements (appareils, alertes, blocages) aux abonnés WebSocket / SSE
+
+    Chaque événement reçoit un numéro de séquence croissant et n'est
+    sérialisé qu'une fois, dans un tampon circulaire partagé. Chaque abonné
+    n'est qu'un curseur dans ce tampon : sa file est bornée à
+    `client_queue_size` événements en attente, au-delà il est déconnecté
+    (SlowConsumer) sans ralentir les autres. Un client peut reprendre après
+    un numéro de séquence tant qu'il est encore dans le tampon.
+    """
+
+    def __init__(self, buffer_size=1000, client_queue_size=100):
+        self.client_queue_size = min(client_queue_size, buffer_size)
+        self.buffer = deque(maxlen=buffer_size)  # (seq, type, json)
+        self.seq = 0
+        self.lock = Lock()
+        self.loop = None
+        self.wakeup = None
+        self.subscribers = 0
+
+    def publish(self, kind, data):
+        """Publie un événement (appelable depuis n'importe quel thread), retourne son numéro"""
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+            payload = json.dumps({'seq': seq, 'type': kind, 'ts': time.time(), 'data': data})
+            self.buffer.append((seq, kind, payload))
+            loop = self.loop
+        if loop is not None and self.subscribers:
+            try:
+                loop.call_soon_threadsafe(self._notify)
+            except RuntimeError:
+                # Boucle d'événements fermée
+                self.loop = None
+        return seq
+
+    def _notify(self):
+        # Un seul réveil pour tous les abonnés
+        wakeup, self.wakeup = self.wakeup, asyncio.Event()
+        wakeup.set()
+
+    def _events_after(self, cursor):
+        with self.lock:
+            if not self.buffer:
+                return []
+            start = max(0, cursor + 1 - self.buffer[0][0])
+            return list(itertools.islice(self.buffer, start, None))
+
+    def oldest(self):
+        with self.lock:
+            return self.buffer[0][0] if self.buffer else self.seq + 1
+
+    async def subscribe(self, since=None):
+        """Itère sur les événements (seq, type, json) postérieurs à `since` (ou à maintenant)
+
+        Lève SlowConsumer si l'abonné prend plus de client_queue_size
+        événements de retard, ou si `since` n'est plus dans le tampon.
+        """
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.wakeup = asyncio.Event()
+        cursor = self.seq if since is None else since
+        if cursor < self.oldest() - 1:
+            raise SlowConsumer(f"Événements postérieurs à {cursor} déjà expirés")
+        if cursor > self.seq:
+            # Numéro d'une exécution précédente (la séquence repart de 0 au redémarrage)
+            raise SlowConsumer(f"Numéro de reprise {cursor} inconnu (dernier : {self.seq})")
+
+        # Un client qui reprend peut rattraper son retard initial en plus de
+        # sa file ; une fois rattrapé, la limite normale s'applique
+        backlog_end = self.seq
+        self.subscribers += 1
+        try:
+            while True:
+                wakeup = self.wakeup
+                events = self._events_after(cursor)
+                for event in events:
+                    if self.seq - cursor > self.client_queue_size + max(0, backlog_end - cursor):
+                        raise SlowConsumer(f"{self.seq - cursor} événements en attente")
+                    yield event
+                    cursor = event[0]
+                if not events:
+                    await wakeup.wait()
+        finally:
+            self.subscribers -= 1
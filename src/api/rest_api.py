@@ -1,24 +1,66 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 from typing import List, Optional
 from src.network_scanner.device import Device
 from src.database.db_manager import DatabaseManager
+from src.api.async_db import AsyncDatabase
+from src.api.scan_jobs import ScanJobManager
+from src.api.events import EventBroker, SlowConsumer
+from src.utils.metrics import metrics
 from threading import Thread
+import asyncio
 import json
 
+# Champs exposés de DeviceModel, sérialisés directement pour les réponses mises en cache
+DEVICE_FIELDS = ('ip', 'mac', 'vendor', 'hostname', 'is_authorized', 'is_blocked', 'notes')
+
+# Taille maximale d'une page de /devices?limit=
+MAX_PAGE_SIZE = 1000
+
+def device_payload(device):
+    payload = {field: device.get(field) for field in DEVICE_FIELDS}
+    payload['is_authorized'] = bool(payload['is_authorized'])
+    payload['is_blocked'] = bool(payload['is_blocked'])
+    return payload
+
+def etag_matches(if_none_match, etag):
+    """Comparaison faible (RFC 9110) de If-None-Match, liste d'ETags ou "*" """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith('W/') else tag) == opaque:
+            return True
+    return False
+
 class RESTAPIServer:
-    def __init__(self, scanner, db: DatabaseManager, port=8000):
+    def __init__(self, scanner, db: DatabaseManager, port=8000, enable_metrics=True, db_workers=None,
+                 scan_cache_ttl=10):
         self.scanner = scanner
         self.db = db
+        # Accès base hors de la boucle d'événements
+        self.async_db = AsyncDatabase(db, max_workers=db_workers)
+        # Scans en tâches de fond, dédoublonnés et mis en cache
+        self.scan_jobs = ScanJobManager(scanner, cache_ttl=scan_cache_ttl)
+        # Événements poussés aux clients WebSocket / SSE
+        self.events = EventBroker()
+        # Dernière liste complète sérialisée : (version, corps JSON)
+        self.devices_body = None
+        if hasattr(scanner, 'add_event_listener'):
+            scanner.add_event_listener(self.events.publish)
         self.port = port
+        if enable_metrics:
+            metrics.enable()
         self.app = FastAPI(title="Wifi Monitor API")
-        self.setup_middleware()
-        self.setup_routes()
         self.server_thread = None
         
-        # Modèles Pydantic
+        # Modèles Pydantic (avant setup_routes qui les référence)
         class DeviceModel(BaseModel):
             ip: str
             mac: str
@@ -29,6 +71,8 @@ class RESTAPIServer:
             notes: Optional[str] = None
             
         self.DeviceModel = DeviceModel
+        self.setup_middleware()
+        self.setup_routes()
         
     def setup_middleware(self):
         """Configure le middleware CORS"""
@@ -44,51 +88,156 @@ class RESTAPIServer:
         """Configure les routes de l'API"""
         
         @self.app.get("/devices", response_model=List[self.DeviceModel])
-        async def get_devices():
-            devices = self.db.load_devices()
+        async def get_devices(response: Response, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                              after: Optional[str] = None,
+                              ip: Optional[str] = None, authorized: Optional[bool] = None,
+                              blocked: Optional[bool] = None, seen_since: Optional[str] = None,
+                              since: Optional[int] = None, if_none_match: Optional[str] = Header(None)):
+            if ip is not None:
+                return await self.async_db.get_devices_by_ip(ip)
+            if authorized is not None or blocked is not None:
+                return await self.async_db.get_devices_by_flags(authorized, blocked)
+            if seen_since is not None:
+                return await self.async_db.get_devices_seen_between(seen_since)
+            if since is not None:
+                # Synchronisation différentielle : seuls les appareils modifiés depuis `since` ([] si aucun)
+                version, devices = await self.async_db.get_devices_changed_since(since)
+                return Response(json.dumps([device_payload(d) for d in devices]), media_type="application/json",
+                                headers={"X-Devices-Version": str(version)})
+            if limit is None:
+                etag = f'"{self.db.devices_version()}"'
+                if etag_matches(if_none_match, etag):
+                    return Response(status_code=304, headers={"ETag": etag})
+                version, body = await self.async_db.run(self.serialized_devices)
+                return Response(body, media_type="application/json",
+                                headers={"ETag": f'"{version}"', "X-Devices-Version": str(version)})
+            
+            # Pagination par clé : reprendre avec ?after=<X-Next-After>
+            devices, next_after = await self.async_db.list_devices(limit, after)
+            if next_after:
+                response.headers["X-Next-After"] = next_after
             return devices
             
         @self.app.get("/devices/{mac}", response_model=self.DeviceModel)
         async def get_device(mac: str):
-            devices = self.db.load_devices()
-            for device in devices:
-                if device['mac'] == mac:
-                    return device
-            raise HTTPException(status_code=404, detail="Device not found")
+            device = await self.async_db.get_device(mac)
+            if device is None:
+                raise HTTPException(status_code=404, detail="Device not found")
+            return device
             
         @self.app.post("/devices/{mac}/block")
         async def block_device(mac: str):
-            devices = self.db.load_devices()
-            device = next((d for d in devices if d['mac'] == mac), None)
+            device = await self.async_db.get_device(mac)
             
             if not device:
                 raise HTTPException(status_code=404, detail="Device not found")
+            # Pare-feu indisponible (lancement sans privilèges) : rien n'est modifié
+            firewall = getattr(self.scanner, 'firewall', None)
+            if firewall is None:
+                raise HTTPException(status_code=503, detail="Firewall unavailable")
                 
             # Mettre à jour dans la base de données
             device['is_blocked'] = True
-            self.db.save_devices(devices)
+            await self.async_db.save_devices([device])
+            await self.async_db.flush(timeout=5)
             
             # Bloquer dans le firewall
-            if hasattr(self.scanner, 'firewall'):
-                self.scanner.firewall.block_device(device['ip'], device['mac'])
+            await asyncio.to_thread(firewall.block_device, device['ip'], device['mac'])
+            self.events.publish('device_blocked', {'ip': device['ip'], 'mac': mac, 'reason': 'api'})
                 
             return {"status": "success", "message": f"Device {mac} blocked"}
             
+        @self.app.post("/scans", status_code=202)
+        async def create_scan(force: bool = False):
+            job, reused = self.scan_jobs.submit(force)
+            return {**job.to_dict(include_devices=False), "reused": reused}
+            
+        @self.app.get("/scans/{job_id}")
+        async def get_scan(job_id: str):
+            job = self.scan_jobs.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Scan not found")
+            return job.to_dict()
+            
+        @self.app.get("/scans/{job_id}/stream")
+        async def stream_scan(job_id: str):
+            job = self.scan_jobs.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Scan not found")
+            return StreamingResponse(self.job_lines(job), media_type="application/x-ndjson")
+            
         @self.app.get("/scan")
-        async def trigger_scan():
-            devices = self.scanner.enhanced_arp_scan()
-            return {"status": "success", "devices": [d.to_dict() for d in devices]}
+        async def trigger_scan(stream: bool = False):
+            job, _ = self.scan_jobs.submit()
+            if stream:
+                return StreamingResponse(self.job_lines(job), media_type="application/x-ndjson")
+            
+            await job.join_async()
+            if job.status == 'failed':
+                raise HTTPException(status_code=503, detail=f"Scan failed: {job.error}")
+            return {"status": "success", "devices": job.to_dict()['devices']}
+            
+        @self.app.get("/events")
+        async def stream_events(since: Optional[int] = None, last_event_id: Optional[int] = Header(None)):
+            # Server-Sent Events ; reprise via ?since= ou l'en-tête Last-Event-ID
+            start = since if since is not None else last_event_id
+            
+            async def event_lines():
+                try:
+                    async for seq, kind, payload in self.events.subscribe(start):
+                        yield f"id: {seq}\nevent: {kind}\ndata: {payload}\n\n"
+                except SlowConsumer as e:
+                    yield f"event: dropped\ndata: {json.dumps({'reason': str(e)})}\n\n"
+            
+            return StreamingResponse(event_lines(), media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache"})
+            
+        @self.app.websocket("/ws/events")
+        async def websocket_events(websocket: WebSocket, since: Optional[int] = None):
+            await websocket.accept()
+            try:
+                async for seq, kind, payload in self.events.subscribe(since):
+                    await websocket.send_text(payload)
+            except SlowConsumer as e:
+                await websocket.send_text(json.dumps({'type': 'dropped', 'data': {'reason': str(e)}}))
+                await websocket.close(code=1013)
+            except WebSocketDisconnect:
+                pass
             
         @self.app.get("/stats")
         async def get_stats():
-            devices = self.db.load_devices()
-            stats = {
-                "total_devices": len(devices),
-                "authorized": sum(1 for d in devices if d['is_authorized']),
-                "blocked": sum(1 for d in devices if d['is_blocked']),
-                "new_last_24h": 0  # Implémenter cette logique
-            }
-            return stats
+            # Agrégats tenus à jour à chaque écriture : lecture en mémoire
+            return self.db.get_stats()
+            
+        @self.app.get("/metrics", response_class=PlainTextResponse)
+        async def get_metrics():
+            return PlainTextResponse(
+                metrics.render_prometheus(),
+                media_type="text/plain; version=0.0.4"
+            )
+            
+    def serialized_devices(self):
+        """Liste complète des appareils en JSON, mise en cache jusqu'à la prochaine modification"""
+        cached = self.devices_body
+        if cached is not None and cached[0] == self.db.devices_version():
+            return cached
+        version, devices = self.db.load_devices_versioned()
+        self.devices_body = (version, json.dumps([device_payload(d) for d in devices]).encode())
+        return self.devices_body
+            
+    async def job_lines(self, job):
+        """NDJSON : un appareil par ligne dès sa découverte, puis le marqueur de fin"""
+        sent = 0
+        while True:
+            devices = await job.wait_async(sent)
+            for device in devices:
+                yield json.dumps(device) + "\n"
+            sent += len(devices)
+            if job.done and not job.devices[sent:]:
+                break
+        summary = job.to_dict(include_devices=False)
+        yield json.dumps({"status": summary['status'], "job_id": job.id, "devices": sent,
+                          "duration": summary['duration'], "error": summary['error']}) + "\n"
             
     def start(self):
         """Démarre le serveur API dans un thread séparé"""
@@ -109,7 +258,7 @@ class RESTAPIServer:
         """Arrête le serveur API"""
         # Note: uvicorn ne fournit pas d'API propre pour s'arrêter
         # Dans un cas réel, il faudrait implémenter une méthode propre
-        pass
+        self.async_db.shutdown()
 
 # Intégration avec MainWindow
 def setup_api_in_main(window):
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from threading import Condition, Lock, Thread
+from src.network_scanner.device import ScanComplete
+
+
+class ScanJob:
+    """Scan lancé en arrière-plan, consultable et diffusable par identifiant
+
+    wait() / join() bloquent le thread appelant ; wait_async() / join_async()
+    sont réveillées par call_soon_threadsafe sans occuper de thread.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'running'
+        self.created = time.time()
+        self.finished = None
+        self.devices = []  # dictionnaires d'appareils, dans l'ordre de découverte
+        self.error = None
+        self.condition = Condition()
+        self.waiters = []  # (boucle, future) des attentes asynchrones
+
+    @property
+    def done(self):
+        return self.status != 'running'
+
+    def add_device(self, device):
+        with self.condition:
+            self.devices.append(device)
+            self._notify()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.status = 'failed' if error else 'complete'
+            self.error = error
+            self.finished = time.time()
+            self._notify()
+
+    def _notify(self):
+        # Appelé sous self.condition
+        self.condition.notify_all()
+        waiters, self.waiters = self.waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._resolve, future)
+            except RuntimeError:
+                pass  # boucle d'événements fermée
+
+    @staticmethod
+    def _resolve(future):
+        if not future.done():
+            future.set_result(None)
+
+    def _add_waiter(self):
+        # Appelé sous self.condition
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.waiters.append((loop, future))
+        return future
+
+    def wait(self, count=0, timeout=None):
+        """Attend plus de `count` appareils ou la fin du scan, retourne les nouveaux appareils"""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.devices) > count or self.done, timeout)
+            return self.devices[count:]
+
+    def join(self, timeout=None):
+        """Attend la fin du scan"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.done, timeout)
+
+    async def wait_async(self, count=0):
+        """Variante asynchrone de wait(), sans délai"""
+        while True:
+            with self.condition:
+                if len(self.devices) > count or self.done:
+                    return self.devices[count:]
+                future = self._add_waiter()
+            await future
+
+    async def join_async(self):
+        """Variante asynchrone de join()"""
+        while True:
+            with self.condition:
+                if self.done:
+                    return
+                future = self._add_waiter()
+            await future
+
+    def to_dict(self, include_devices=True):
+        with self.condition:
+            result = {
+                'job_id': self.id,
+                'status': self.status,
+                'created': self.created,
+                'finished': self.finished,
+                'duration': (self.finished - self.created) if self.finished else None,
+                'device_count': len(self.devices),
+                'error': self.error,
+            }
+            if include_devices:
+                result['devices'] = list(self.devices)
+        return result
+
+
+class ScanJobManager:
+    """Exécute les scans demandés par l'API sous forme de tâches
+
+    Les demandes simultanées sont rattachées au scan en cours, et le dernier
+    scan terminé est resservi pendant `cache_ttl` secondes sans nouveau
+    balayage du réseau.
+    """
+
+    def __init__(self, scanner, cache_ttl=10, max_jobs=50, logger=None):
+        self.scanner = scanner
+        self.cache_ttl = cache_ttl
+        self.max_jobs = max_jobs
+        self.logger = logger or logging.getLogger('api')
+        self.jobs = OrderedDict()  # id -> ScanJob, du plus ancien au plus récent
+        self.running = None
+        self.last_completed = None
+        self.lock = Lock()
+
+    def submit(self, force=False):
+        """Retourne (tâche, réutilisée) : scan en cours, résultat récent ou nouveau scan"""
+        with self.lock:
+            if self.running is not None:
+                return self.running, True
+            last = self.last_completed
+            if not force and last is not None and time.time() - last.finished < self.cache_ttl:
+                return last, True
+
+            job = self.running = ScanJob()
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.max_jobs:
+                self.jobs.popitem(last=False)
+
+        Thread(target=self._run, args=(job,), name=f'scan-{job.id[:8]}', daemon=True).start()
+        return job, False
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _run(self, job):
+        error = None
+        try:
+            for item in self.scanner.stream_scan():
+                if isinstance(item, ScanComplete):
+                    break
+                job.add_device(item.to_dict())
+        except Exception as e:
+            self.logger.error(f"Échec du scan {job.id}: {str(e)}")
+            error = str(e)
+
+        with self.lock:
+            job.finish(error)
+            self.running = None
+            if error is None:
+                self.last_completed = job
@@ -0,0 +1,67 @@
+import sqlite3
+from pathlib import Path
+from threading import Lock, local
+
+CACHED_STATEMENTS = 256
+
+
+def configure_connection(connection):
+    """Mode WAL : les lectures ne bloquent pas l'écriture et inversement"""
+    connection.execute('PRAGMA journal_mode=WAL')
+    # NORMAL suffit en WAL : pas de fsync à chaque transaction, seulement aux checkpoints
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.execute('PRAGMA busy_timeout=5000')
+
+
+class ConnectionManager:
+    """Connexions SQLite par thread
+
+    Chaque thread (Qt, surveillance, workers uvicorn, écriture) obtient ses
+    propres connexions, réutilisées d'un appel à l'autre avec leur cache de
+    requêtes préparées. Les chemins de lecture utilisent des connexions en
+    lecture seule qui, en mode WAL, avancent en parallèle de l'écriture.
+    """
+
+    def __init__(self, db_path, cached_statements=CACHED_STATEMENTS, timeout=5):
+        self.db_path = Path(db_path)
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self.local = local()
+        self.connections = []  # toutes les connexions ouvertes, pour close_all()
+        self.lock = Lock()
+
+    def _open(self, readonly):
+        if readonly:
+            connection = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                         timeout=self.timeout, cached_statements=self.cached_statements,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA query_only=ON')
+        else:
+            connection = sqlite3.connect(self.db_path, timeout=self.timeout,
+                                         cached_statements=self.cached_statements, check_same_thread=False)
+            configure_connection(connection)
+        with self.lock:
+            self.connections.append(connection)
+        return connection
+
+    def reader(self):
+        """Connexion en lecture seule du thread courant"""
+        connection = getattr(self.local, 'reader', None)
+        if connection is None:
+            connection = self.local.reader = self._open(readonly=True)
+        return connection
+
+    def writer(self):
+        """Connexion en lecture-écriture du thread courant"""
+        connection = getattr(self.local, 'writer', None)
+        if connection is None:
+            connection = self.local.writer = self._open(readonly=False)
+        return connection
+
+    def close_all(self):
+        """Ferme toutes les connexions de tous les threads"""
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for connection in connections:
+            connection.close()
+        self.local = local()
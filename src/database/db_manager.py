@@ -1,17 +1,30 @@
-import sqlite3
 import json
+import time
 from pathlib import Path
 from src.utils.constants import DB_NAME
+from src.utils.metrics import metrics
+from src.database.connection import ConnectionManager
+from src.database.writer import DeviceWriter
+from src.database.device_cache import DeviceCache
+from src.database.stats import DeviceStats
+from src.database.sightings import SightingsStore, create_schema
 
 class DatabaseManager:
-    def __init__(self):
+    def __init__(self, flush_interval=1.0, batch_size=500):
         self.db_path = Path(__file__).parent.parent.parent / DB_NAME
-        self.connection = None
+        self.connections = None
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.writer = None
+        self.sightings = None
+        self.stats = DeviceStats()
+        self.cache = DeviceCache(stats=self.stats)
 
     def initialize_db(self):
         """Initialise la base de données"""
-        self.connection = sqlite3.connect(self.db_path)
-        cursor = self.connection.cursor()
+        self.connections = ConnectionManager(self.db_path)
+        connection = self.connections.writer()
+        cursor = connection.cursor()
         
         # Table des appareils
         cursor.execute('''
@@ -28,6 +41,9 @@ class DatabaseManager:
         )
         ''')
         
+        # Index des agrégats de /stats au démarrage (les recherches passent par le cache)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_devices_first_seen ON devices (first_seen)')
+        
         # Table des paramètres
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS settings (
@@ -36,53 +52,126 @@ class DatabaseManager:
         )
         ''')
         
-        self.connection.commit()
+        # Historique des présences (observations brutes et agrégats)
+        create_schema(cursor)
+        
+        connection.commit()
+        
+        # Cache en mémoire des appareils, servi en lecture
+        self.cache.load(self._query('SELECT * FROM devices'))
+        # Agrégats de /stats initialisés par SQL, puis tenus à jour par le cache
+        self.stats.load(self.connections.reader())
+        
+        self.sightings = SightingsStore(self.connections)
+        self.sightings.start()
+        
+        # Écritures des appareils regroupées sur un thread dédié
+        self.writer = DeviceWriter(self.connections, self.flush_interval, self.batch_size)
+        self.writer.start()
 
     def save_devices(self, devices):
-        """Sauvegarde les appareils dans la base de données"""
-        cursor = self.connection.cursor()
-        
+        """Sauvegarde les appareils (écriture différée des seules colonnes modifiées, voir flush())"""
+        changes = []
         for device in devices:
-            cursor.execute('''
-            INSERT OR REPLACE INTO devices 
-            (mac, ip, vendor, hostname, is_authorized, is_blocked, notes, last_seen)
-            VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
-            ''', (
-                device['mac'],
-                device['ip'],
-                device['vendor'],
-                device['hostname'],
-                int(device.get('is_authorized', False)),
-                int(device.get('is_blocked', False)),
-                device.get('notes', '')
-            ))
-        
-        self.connection.commit()
+            columns = self.cache.apply(device)
+            if columns:
+                changes.append((device['mac'], columns))
+        metrics.inc('db_rows_unchanged', len(devices) - len(changes))
+        if changes:
+            self.writer.submit(changes)
+
+    def record_sightings(self, devices, timestamp=None):
+        """Enregistre la présence des appareils vus lors d'un scan"""
+        ts = int(time.time()) if timestamp is None else int(timestamp)
+        self.writer.submit_sightings([(device.mac, ts, device.ip) for device in devices])
+
+    def flush(self, timeout=None):
+        """Attend l'écriture des appareils en attente"""
+        return self.writer.flush(timeout) if self.writer else True
 
     def load_devices(self):
-        """Charge les appareils depuis la base de données"""
-        cursor = self.connection.cursor()
-        cursor.execute('SELECT * FROM devices')
+        """Charge les appareils (depuis le cache en mémoire)"""
+        return self.cache.all()
+
+    def _query(self, sql, params=()):
+        cursor = self.connections.reader().execute(sql, params)
         columns = [column[0] for column in cursor.description]
-        devices = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        return devices
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def get_device(self, mac):
+        """Retourne un appareil par son adresse MAC, ou None"""
+        return self.cache.get(mac)
+
+    def devices_version(self):
+        """Version courante des appareils, incrémentée à chaque modification"""
+        return self.cache.version
+
+    def load_devices_versioned(self):
+        """Retourne (version, appareils)"""
+        return self.cache.snapshot()
+
+    def get_devices_changed_since(self, version):
+        """Retourne (version actuelle, appareils modifiés depuis `version`)"""
+        return self.cache.changes_since(version)
+
+    def get_devices_by_ip(self, ip):
+        """Appareils associés à une adresse IP"""
+        return self.cache.by_ip_address(ip)
+
+    def get_devices_by_flags(self, is_authorized=None, is_blocked=None):
+        """Appareils filtrés sur les indicateurs autorisé / bloqué"""
+        return self.cache.by_flags(is_authorized=is_authorized, is_blocked=is_blocked)
+
+    def get_devices_seen_between(self, start, end=None):
+        """Appareils vus entre deux dates ('YYYY-MM-DD HH:MM:SS', end exclue)
+
+        Servi par le cache : inclut les écritures en attente et le last_seen exact.
+        """
+        return self.cache.seen_between(start, end)
+
+    def list_devices(self, limit=100, after=None):
+        """Liste paginée par MAC (pagination par clé), retourne (appareils, MAC de reprise ou None)"""
+        if limit < 1:
+            raise ValueError(f"Taille de page invalide: {limit}")
+        devices = self.cache.page(limit, after)
+        return devices, (devices[-1]['mac'] if len(devices) == limit else None)
+
+    def get_known_macs(self, macs):
+        """Sous-ensemble des MAC déjà présentes en base"""
+        return self.cache.known(macs)
+
+    def get_stats(self):
+        """Agrégats des appareils (total, indicateurs, nouveaux 1h/24h/7j, par fabricant)"""
+        return self.stats.snapshot()
 
     def load_settings(self):
         """Charge les paramètres depuis la base de données"""
-        cursor = self.connection.cursor()
+        cursor = self.connections.reader().cursor()
         cursor.execute('SELECT key, value FROM settings')
         settings = {row[0]: row[1] for row in cursor.fetchall()}
         return settings
 
     def save_setting(self, key, value):
         """Sauvegarde un paramètre"""
-        cursor = self.connection.cursor()
+        connection = self.connections.writer()
+        cursor = connection.cursor()
         cursor.execute('''
         INSERT OR REPLACE INTO settings (key, value)
         VALUES (?, ?)
         ''', (key, value))
-        self.connection.commit()
+        connection.commit()
+
+    def close(self):
+        """Écrit les appareils en attente et ferme la base"""
+        if self.sightings:
+            self.sightings.stop()
+            self.sightings = None
+        if self.writer:
+            self.writer.stop()
+            self.writer = None
+        if self.connections:
+            self.connections.close_all()
+            self.connections = None
 
     def __del__(self):
-        if self.connection:
-            self.connection.close()
\ No newline at end of file
+        self.close()
\ No newline at end of file
@@ -0,0 +1,191 @@
+import calendar
+import time
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from threading import Lock
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # format de datetime('now') de SQLite (UTC)
+COLUMNS = ('ip', 'vendor', 'hostname', 'is_authorized', 'is_blocked', 'notes', 'first_seen', 'last_seen')
+
+
+def parse_timestamp(value):
+    """Convertit un horodatage SQLite (UTC) en epoch, 0 si absent"""
+    if not value:
+        return 0
+    try:
+        return calendar.timegm(time.strptime(value, TIME_FORMAT))
+    except ValueError:
+        return 0
+
+
+class DeviceCache:
+    """Cache en écriture directe de la table devices, indexé par MAC avec index secondaires en mémoire"""
+
+    def __init__(self, last_seen_resolution=300, stats=None):
+        self.last_seen_resolution = last_seen_resolution  # écart minimal (s) avant réécriture de last_seen
+        self.stats = stats  # DeviceStats mis à jour à chaque modification
+        self.rows = {}            # mac -> ligne (dict)
+        self.macs = []            # MAC triées (pagination par clé)
+        self.by_ip = {}           # ip -> {mac}
+        self.flagged = {'is_authorized': set(), 'is_blocked': set()}  # indicateur -> {mac}
+        self.recent = OrderedDict()  # mac -> last_seen, du plus ancien au plus récent
+        self.persisted_seen = {}  # mac -> epoch du dernier last_seen écrit
+        self.version = int(time.time() * 1000)  # croissante d'une exécution à l'autre
+        self.changed = OrderedDict()  # mac -> version de la dernière modification, de la plus ancienne à la plus récente
+        self.lock = Lock()
+
+    def load(self, rows):
+        """Charge les lignes existantes de la base"""
+        with self.lock:
+            for row in rows:
+                if row['mac'] in self.rows:
+                    self._unindex(self.rows[row['mac']])
+                else:
+                    insort(self.macs, row['mac'])
+                row = self.rows[row['mac']] = dict(row)
+                self._index(row)
+                self.persisted_seen[row['mac']] = parse_timestamp(row.get('last_seen'))
+                self.changed[row['mac']] = self.version
+            for mac in sorted(self.rows, key=lambda mac: self.rows[mac].get('last_seen') or ''):
+                self.recent[mac] = self.rows[mac].get('last_seen') or ''
+                self.recent.move_to_end(mac)
+
+    def apply(self, device, now=None):
+        """Intègre un appareil sauvegardé, retourne les colonnes à écrire ({} si inchangé)"""
+        now = time.time() if now is None else now
+        stamp = time.strftime(TIME_FORMAT, time.gmtime(now))
+        mac = device['mac']
+        values = {
+            'ip': device['ip'],
+            'vendor': device['vendor'],
+            'hostname': device['hostname'],
+            'is_authorized': int(device.get('is_authorized', False)),
+            'is_blocked': int(device.get('is_blocked', False)),
+            'notes': device.get('notes', ''),
+        }
+
+        with self.lock:
+            row = self.rows.get(mac)
+            if row is None:
+                row = self.rows[mac] = {'mac': mac, **values, 'first_seen': stamp, 'last_seen': stamp}
+                insort(self.macs, mac)
+                self._index(row)
+                self._seen(mac, stamp)
+                self.persisted_seen[mac] = now
+                self._touch(mac)
+                if self.stats:
+                    self.stats.add(row, now)
+                return {column: row[column] for column in COLUMNS}
+
+            changes = {column: value for column, value in values.items() if row.get(column) != value}
+            if changes and self.stats:
+                self.stats.change({column: row.get(column) for column in changes}, changes)
+            if changes:
+                self._unindex(row)
+                row.update(changes)
+                self._index(row)
+            row['last_seen'] = stamp
+            self._seen(mac, stamp)
+            if changes:
+                # Le seul avancement de last_seen ne change pas la version
+                self._touch(mac)
+            if changes or now - self.persisted_seen.get(mac, 0) >= self.last_seen_resolution:
+                changes['last_seen'] = stamp
+                self.persisted_seen[mac] = now
+            return changes
+
+    def _index(self, row):
+        self.by_ip.setdefault(row.get('ip'), set()).add(row['mac'])
+        for flag, macs in self.flagged.items():
+            if row.get(flag):
+                macs.add(row['mac'])
+
+    def _unindex(self, row):
+        macs = self.by_ip.get(row.get('ip'))
+        if macs is not None:
+            macs.discard(row['mac'])
+            if not macs:
+                del self.by_ip[row.get('ip')]
+        for macs in self.flagged.values():
+            macs.discard(row['mac'])
+
+    def _seen(self, mac, stamp):
+        self.recent[mac] = stamp
+        self.recent.move_to_end(mac)
+
+    def _touch(self, mac):
+        self.version += 1
+        self.changed[mac] = self.version
+        self.changed.move_to_end(mac)
+
+    def snapshot(self):
+        """Retourne (version, lignes) de façon cohérente"""
+        with self.lock:
+            return self.version, [dict(row) for row in self.rows.values()]
+
+    def changes_since(self, version):
+        """Retourne (version actuelle, lignes modifiées après `version`)"""
+        with self.lock:
+            changed = []
+            for mac in reversed(self.changed):
+                if self.changed[mac] <= version:
+                    break
+                changed.append(dict(self.rows[mac]))
+            changed.reverse()
+            return self.version, changed
+
+    def get(self, mac):
+        with self.lock:
+            row = self.rows.get(mac)
+            return dict(row) if row else None
+
+    def all(self):
+        with self.lock:
+            return [dict(row) for row in self.rows.values()]
+
+    def by_ip_address(self, ip):
+        """Lignes associées à une IP, triées par MAC"""
+        with self.lock:
+            return [dict(self.rows[mac]) for mac in sorted(self.by_ip.get(ip, ()))]
+
+    def by_flags(self, **flags):
+        """Lignes filtrées sur is_authorized / is_blocked (None : indifférent), triées par MAC"""
+        with self.lock:
+            required = [self.flagged[flag] for flag, value in flags.items() if value]
+            excluded = [self.flagged[flag] for flag, value in flags.items() if value is not None and not value]
+            if required:
+                candidates = sorted(set.intersection(*required))
+            else:
+                candidates = self.macs
+            return [dict(self.rows[mac]) for mac in candidates
+                    if not any(mac in macs for macs in excluded)]
+
+    def seen_between(self, start, end=None):
+        """Lignes de last_seen dans [start, end), triées par last_seen"""
+        with self.lock:
+            found = []
+            for mac, seen in reversed(self.recent.items()):
+                if seen < start:
+                    break
+                if end is None or seen < end:
+                    found.append(dict(self.rows[mac]))
+            found.reverse()
+            return found
+
+    def page(self, limit, after=None):
+        """Au plus `limit` lignes de MAC strictement supérieure à `after`, triées par MAC"""
+        if limit < 1:
+            raise ValueError(f"Taille de page invalide: {limit}")
+        with self.lock:
+            start = 0 if after is None else bisect_right(self.macs, after)
+            return [dict(self.rows[mac]) for mac in self.macs[start:start + limit]]
+
+    def known(self, macs):
+        with self.lock:
+            return {mac for mac in macs if mac in self.rows}
+
+    def __contains__(self, mac):
+        return mac in self.rows
+
+    def __len__(self):
+        return len(self.rows)
@@ -0,0 +1,191 @@
+import logging
+import sqlite3
+import time
+from collections import defaultdict
+from threading import Event, Thread
+
+HOUR = 3600
+DAY = 86400
+COMPACTION_CHUNK = 10000
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS sightings (
+        mac TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        ip TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_sightings_mac_ts ON sightings (mac, ts)',
+    'CREATE INDEX IF NOT EXISTS idx_sightings_ts ON sightings (ts)',
+    '''
+    CREATE TABLE IF NOT EXISTS sightings_hourly (
+        mac TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        first_ts INTEGER NOT NULL,
+        last_ts INTEGER NOT NULL,
+        PRIMARY KEY (mac, bucket)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_sightings_hourly_bucket ON sightings_hourly (bucket)',
+    '''
+    CREATE TABLE IF NOT EXISTS sightings_daily (
+        mac TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        first_ts INTEGER NOT NULL,
+        last_ts INTEGER NOT NULL,
+        PRIMARY KEY (mac, bucket)
+    ) WITHOUT ROWID
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_sightings_daily_bucket ON sightings_daily (bucket)',
+)
+
+ROLLUP_TABLES = {HOUR: 'sightings_hourly', DAY: 'sightings_daily'}
+
+
+def create_schema(connection):
+    for statement in SCHEMA:
+        connection.execute(statement)
+
+
+def record_sightings(connection, sightings):
+    """Ajoute des observations (mac, ts, ip) et met à jour les agrégats horaires et journaliers
+
+    À appeler dans la transaction de l'appelant (thread d'écriture).
+    """
+    if not sightings:
+        return
+    connection.executemany('INSERT INTO sightings (mac, ts, ip) VALUES (?, ?, ?)', sightings)
+
+    for size, table in ROLLUP_TABLES.items():
+        buckets = defaultdict(lambda: [0, None, None])
+        for mac, ts, _ in sightings:
+            bucket = buckets[(mac, ts - ts % size)]
+            bucket[0] += 1
+            bucket[1] = ts if bucket[1] is None else min(bucket[1], ts)
+            bucket[2] = ts if bucket[2] is None else max(bucket[2], ts)
+        connection.executemany(f'''
+        INSERT INTO {table} (mac, bucket, count, first_ts, last_ts) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (mac, bucket) DO UPDATE SET
+            count = count + excluded.count,
+            first_ts = min(first_ts, excluded.first_ts),
+            last_ts = max(last_ts, excluded.last_ts)
+        ''', [(mac, bucket, count, first, last) for (mac, bucket), (count, first, last) in buckets.items()])
+
+
+def merge_intervals(rows, gap):
+    """Fusionne des plages (début, fin) triées séparées de moins de `gap` secondes"""
+    intervals = []
+    for first, last in rows:
+        if intervals and first - intervals[-1][1] <= gap:
+            intervals[-1][1] = max(intervals[-1][1], last)
+        else:
+            intervals.append([first, last])
+    return [tuple(interval) for interval in intervals]
+
+
+class SightingsStore:
+    """Historique des présences : observations brutes, agrégats horaires et journaliers
+
+    Les observations brutes sont conservées `raw_retention` secondes, les
+    agrégats horaires `hourly_retention` et journaliers `daily_retention` ;
+    une compaction en arrière-plan supprime les données expirées.
+    """
+
+    def __init__(self, connections, raw_retention=7 * DAY, hourly_retention=90 * DAY,
+                 daily_retention=730 * DAY, compaction_interval=HOUR, logger=None):
+        self.connections = connections
+        self.raw_retention = raw_retention
+        self.hourly_retention = hourly_retention
+        self.daily_retention = daily_retention
+        self.compaction_interval = compaction_interval
+        self.logger = logger or logging.getLogger('database')
+        self.stop_event = Event()
+        self.thread = None
+
+    def start(self):
+        """Démarre la compaction périodique"""
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = Thread(target=self._run, name='sightings-compaction', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.compaction_interval):
+            try:
+                self.compact()
+            except sqlite3.Error as e:
+                self.logger.error(f"Échec de la compaction des présences: {str(e)}")
+
+    def compact(self, now=None):
+        """Supprime les données expirées par petits lots, retourne le nombre de lignes par table"""
+        now = int(time.time()) if now is None else now
+        deleted = {'sightings': 0}
+        connection = self.connections.writer()
+        # Observations brutes supprimées par lots : transactions courtes
+        # pour ne pas retenir le thread d'écriture
+        while True:
+            with connection:
+                cursor = connection.execute(
+                    'DELETE FROM sightings WHERE rowid IN '
+                    '(SELECT rowid FROM sightings WHERE ts < ? LIMIT ?)',
+                    (now - self.raw_retention, COMPACTION_CHUNK))
+            deleted['sightings'] += cursor.rowcount
+            if cursor.rowcount < COMPACTION_CHUNK:
+                break
+
+        for table, retention in (('sightings_hourly', self.hourly_retention),
+                                 ('sightings_daily', self.daily_retention)):
+            with connection:
+                cursor = connection.execute(f'DELETE FROM {table} WHERE bucket < ?', (now - retention,))
+            deleted[table] = cursor.rowcount
+        return deleted
+
+    def timeline(self, mac, start, end, resolution=None):
+        """Présence d'un appareil par tranche : [(début de tranche, observations, premier ts, dernier ts)]
+
+        resolution : HOUR, DAY ou None (horaire jusqu'à 31 jours, journalière au-delà).
+        """
+        if resolution is None:
+            resolution = HOUR if end - start <= 31 * DAY else DAY
+        table = ROLLUP_TABLES[resolution]
+        return self.connections.reader().execute(
+            f'SELECT bucket, count, first_ts, last_ts FROM {table} '
+            'WHERE mac = ? AND bucket >= ? AND bucket < ? ORDER BY bucket',
+            (mac, start - start % resolution, end)).fetchall()
+
+    def presence_intervals(self, mac, start, end, gap=900, now=None):
+        """Plages de présence [(début, fin)] d'un appareil entre deux horodatages
+
+        Utilise les observations brutes si elles couvrent la période, sinon
+        les agrégats horaires (précision d'une heure).
+        """
+        now = int(time.time()) if now is None else now
+        connection = self.connections.reader()
+        if start >= now - self.raw_retention:
+            rows = connection.execute(
+                'SELECT ts, ts FROM sightings WHERE mac = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                (mac, start, end)).fetchall()
+        else:
+            gap = max(gap, HOUR)
+            rows = connection.execute(
+                'SELECT first_ts, last_ts FROM sightings_hourly '
+                'WHERE mac = ? AND bucket >= ? AND bucket < ? ORDER BY bucket',
+                (mac, start - start % HOUR, end)).fetchall()
+        return merge_intervals(rows, gap)
+
+    def last_seen(self, mac):
+        """Dernière observation connue d'un appareil (epoch) ou None"""
+        connection = self.connections.reader()
+        row = connection.execute('SELECT max(ts) FROM sightings WHERE mac = ?', (mac,)).fetchone()
+        if row[0] is None:
+            row = connection.execute('SELECT max(last_ts) FROM sightings_daily WHERE mac = ?', (mac,)).fetchone()
+        return row[0]
@@ -0,0 +1,82 @@
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from threading import Lock
+from src.database.device_cache import parse_timestamp
+
+NEW_WINDOWS = (('new_last_1h', 3600), ('new_last_24h', 86400), ('new_last_7d', 7 * 86400))
+MAX_WINDOW = max(seconds for _, seconds in NEW_WINDOWS)
+
+
+class DeviceStats:
+    """Agrégats des appareils tenus à jour à chaque écriture (lecture en O(1))
+
+    Total, autorisés, bloqués, comptage par fabricant et nouveaux appareils
+    sur des fenêtres glissantes (1h, 24h, 7j). Au démarrage, load() les
+    initialise par des agrégats SQL.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.authorized = 0
+        self.blocked = 0
+        self.vendors = Counter()
+        self.first_seen = []  # epochs croissants des apparitions sur MAX_WINDOW
+        self.lock = Lock()
+
+    def load(self, connection, now=None):
+        """Initialise les agrégats depuis la base (démarrage à froid)"""
+        now = time.time() if now is None else now
+        since = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now - MAX_WINDOW))
+        total, authorized, blocked = connection.execute(
+            'SELECT count(*), coalesce(sum(is_authorized), 0), coalesce(sum(is_blocked), 0) FROM devices'
+        ).fetchone()
+        vendors = connection.execute('SELECT vendor, count(*) FROM devices GROUP BY vendor').fetchall()
+        first_seen = connection.execute(
+            'SELECT first_seen FROM devices WHERE first_seen >= ? ORDER BY first_seen', (since,)).fetchall()
+
+        with self.lock:
+            self.total, self.authorized, self.blocked = total, authorized, blocked
+            self.vendors = Counter({vendor: count for vendor, count in vendors})
+            self.first_seen = [parse_timestamp(row[0]) for row in first_seen]
+
+    def add(self, row, now):
+        """Nouvel appareil"""
+        with self.lock:
+            self.total += 1
+            self.authorized += bool(row.get('is_authorized'))
+            self.blocked += bool(row.get('is_blocked'))
+            self.vendors[row.get('vendor')] += 1
+            # Horodatages pris hors verrou par les appelants : insertion triée
+            insort(self.first_seen, now)
+
+    def change(self, before, after):
+        """Appareil modifié : before/after contiennent les anciennes et nouvelles valeurs"""
+        with self.lock:
+            if 'is_authorized' in after:
+                self.authorized += bool(after['is_authorized']) - bool(before['is_authorized'])
+            if 'is_blocked' in after:
+                self.blocked += bool(after['is_blocked']) - bool(before['is_blocked'])
+            if 'vendor' in after:
+                self.vendors[before['vendor']] -= 1
+                if self.vendors[before['vendor']] <= 0:
+                    del self.vendors[before['vendor']]
+                self.vendors[after['vendor']] += 1
+
+    def snapshot(self, now=None):
+        """Retourne les agrégats courants"""
+        now = time.time() if now is None else now
+        with self.lock:
+            # Les apparitions sorties de la plus grande fenêtre sont oubliées
+            expired = bisect_left(self.first_seen, now - MAX_WINDOW)
+            if expired:
+                del self.first_seen[:expired]
+            stats = {
+                'total_devices': self.total,
+                'authorized': self.authorized,
+                'blocked': self.blocked,
+            }
+            for name, seconds in NEW_WINDOWS:
+                stats[name] = len(self.first_seen) - bisect_left(self.first_seen, now - seconds)
+            stats['vendors'] = dict(self.vendors)
+        return stats
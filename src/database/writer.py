@@ -0,0 +1,149 @@
+import functools
+import logging
+import time
+from threading import Condition, Thread
+from src.utils.metrics import metrics
+from src.database.sightings import record_sightings
+
+@functools.lru_cache(maxsize=64)
+def upsert_statement(columns):
+    """INSERT ... ON CONFLICT DO UPDATE limité aux colonnes modifiées"""
+    return (f"INSERT INTO devices (mac, {', '.join(columns)}) VALUES ({', '.join('?' * (len(columns) + 1))}) "
+            f"ON CONFLICT (mac) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in columns)}")
+
+
+class DeviceWriter:
+    """Thread d'écriture dédié des appareils
+
+    Les colonnes modifiées sont regroupées par MAC (la dernière valeur
+    l'emporte) et écrites par executemany dans une seule transaction, toutes les
+    `flush_interval` secondes ou dès que `batch_size` MAC sont en attente.
+    En cas d'échec, le lot est remis en attente et réessayé à l'intervalle
+    suivant ; flush() retourne alors False. À l'arrêt, l'écriture finale est
+    réessayée une fois et les lignes perdues sont journalisées.
+    """
+
+    def __init__(self, connections, flush_interval=1.0, batch_size=500, logger=None):
+        self.connections = connections
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = logger or logging.getLogger('database')
+        self.pending = {}        # mac -> {colonne: valeur}
+        self.pending_sightings = {}  # (mac, ts) -> (mac, ts, ip)
+        self.condition = Condition()
+        self.submitted = 0       # numéro de la dernière soumission
+        self.written = 0         # dernière soumission écrite sur disque
+        self.failures = 0        # nombre d'écritures en échec
+        self.flush_requested = False
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = Thread(target=self._run, name='db-writer', daemon=True)
+            self.thread.start()
+
+    def submit(self, changes):
+        """Met des modifications [(mac, {colonne: valeur})] en file d'écriture (non bloquant)"""
+        with self.condition:
+            for mac, columns in changes:
+                self.pending.setdefault(mac, {}).update(columns)
+            self.submitted += 1
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify_all()
+
+    def submit_sightings(self, sightings):
+        """Met des observations (mac, ts, ip) en file d'écriture (non bloquant)"""
+        with self.condition:
+            for sighting in sightings:
+                self.pending_sightings[sighting[:2]] = sighting
+            self.submitted += 1
+            if len(self.pending_sightings) >= self.batch_size:
+                self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Attend que toutes les soumissions précédentes soient écrites, False en cas d'échec"""
+        with self.condition:
+            target = self.submitted
+            failures = self.failures
+            self.flush_requested = True
+            self.condition.notify_all()
+            self.condition.wait_for(
+                lambda: self.written >= target or self.failures > failures or self.thread is None, timeout)
+            return self.written >= target
+
+    def stop(self, timeout=5):
+        """Écrit les mises à jour restantes puis arrête le thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def _run(self):
+        connection = self.connections.writer()
+        failed = False
+        final_retry = False
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + self.flush_interval
+                # Après un échec, on attend l'intervalle complet avant de réessayer
+                while (self.running and not self.flush_requested
+                       and (failed or (len(self.pending) < self.batch_size
+                                       and len(self.pending_sightings) < self.batch_size))):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                self.flush_requested = False
+                rows = self.pending
+                self.pending = {}
+                sightings = list(self.pending_sightings.values())
+                self.pending_sightings = {}
+                target = self.submitted
+                running = self.running
+
+            failed = bool(rows or sightings) and not self._write(connection, rows, sightings)
+
+            with self.condition:
+                if failed:
+                    # Remise en attente sous les soumissions plus récentes
+                    for mac, columns in rows.items():
+                        self.pending[mac] = {**columns, **self.pending.get(mac, {})}
+                    for sighting in sightings:
+                        self.pending_sightings.setdefault(sighting[:2], sighting)
+                    self.failures += 1
+                else:
+                    self.written = target
+                self.condition.notify_all()
+
+            if not running:
+                if failed and not final_retry:
+                    final_retry = True
+                    continue
+                if failed:
+                    self.logger.error(f"Arrêt de l'écriture : {len(rows)} appareils et "
+                                      f"{len(sightings)} observations perdus")
+                return
+
+    def _write(self, connection, rows, sightings=()):
+        # Une requête par ensemble de colonnes modifiées
+        statements = {}
+        for mac, changes in rows.items():
+            columns = tuple(sorted(changes))
+            statements.setdefault(columns, []).append((mac, *(changes[column] for column in columns)))
+        try:
+            with metrics.timer('db_write'), connection:
+                for columns, params in statements.items():
+                    connection.executemany(upsert_statement(columns), params)
+                record_sightings(connection, sightings)
+            metrics.inc('db_rows_written', len(rows) + len(sightings))
+            metrics.inc('db_flushes')
+            return True
+        except Exception as e:
+            # Toute erreur est absorbée : un thread mort bloquerait flush()
+            self.logger.error(f"Échec de l'écriture de {len(rows)} appareils: {str(e)}")
+            metrics.inc('db_write_errors')
+            return False
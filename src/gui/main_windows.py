@@ -2,16 +2,37 @@ from PyQt5.QtWidgets import (QMainWindow, QTabWidget, QVBoxLayout, QWidget,
                             QLabel, QPushButton, QTableWidget, QTableWidgetItem,
                             QHeaderView, QMessageBox, QSystemTrayIcon, QMenu,
                             QInputDialog, QAction, QStatusBar)
-from PyQt5.QtCore import Qt, QTimer, QSize
+from PyQt5.QtCore import Qt, QTimer, QSize, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon, QColor
 from src.gui.device_list import AdvancedDeviceListWidget
 from src.gui.network_graph import NetworkGraphWidget
 from src.gui.alerts import AlertsWidget
+from src.network_scanner.device import ScanComplete
 import json
 import os
 import platform
 from datetime import datetime
 
+class ScanWorker(QThread):
+    """Exécute scanner.stream_scan() hors du thread de l'interface"""
+    device_found = pyqtSignal(object)
+    scan_finished = pyqtSignal(object)  # ScanComplete
+    scan_failed = pyqtSignal(str)
+
+    def __init__(self, scanner, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+
+    def run(self):
+        try:
+            for item in self.scanner.stream_scan():
+                if isinstance(item, ScanComplete):
+                    self.scan_finished.emit(item)
+                    return
+                self.device_found.emit(item)
+        except Exception as e:
+            self.scan_failed.emit(str(e))
+
 class AdvancedMainWindow(QMainWindow):
     def __init__(self, scanner, db):
         super().__init__()
@@ -19,6 +40,13 @@ class AdvancedMainWindow(QMainWindow):
         self.db = db
         self.settings = {}
         self.alert_history = []
+        self.scan_worker = None
+        self.scan_devices = []
+        # Rafraîchissement groupé de la liste pendant un scan manuel
+        self.scan_refresh_timer = QTimer(self)
+        self.scan_refresh_timer.setSingleShot(True)
+        self.scan_refresh_timer.setInterval(250)
+        self.scan_refresh_timer.timeout.connect(self.refresh_scan_devices)
         self.setup_ui()
         self.load_settings()
         self.setup_tray_icon()
@@ -172,8 +200,11 @@ class AdvancedMainWindow(QMainWindow):
         # Mise à jour des statistiques
         self.device_count_label.setText(f"Appareils connectés: {len(devices)}")
         
+        # Historique des présences
+        self.db.record_sightings(devices)
+        
         # Détection des nouveaux appareils
-        known_macs = {device['mac'] for device in self.db.load_devices()}
+        known_macs = self.db.get_known_macs(d.mac for d in devices)
         new_devices = [d for d in devices if d.mac not in known_macs]
         
         if new_devices:
@@ -210,13 +241,37 @@ class AdvancedMainWindow(QMainWindow):
         self.statusBar().showMessage(status)
 
     def manual_scan(self):
-        """Lance un scan manuel"""
+        """Lance un scan manuel en arrière-plan"""
+        if self.scan_worker is not None and self.scan_worker.isRunning():
+            return
         self.statusBar().showMessage("Scan en cours...")
-        QApplication.processEvents()  # Force la mise à jour de l'interface
-        devices = self.scanner.enhanced_arp_scan()
-        self.update_device_list(devices)
+        self.scan_devices = []
+        self.scan_worker = ScanWorker(self.scanner, self)
+        self.scan_worker.device_found.connect(self.on_scan_device)
+        self.scan_worker.scan_finished.connect(self.on_scan_finished)
+        self.scan_worker.scan_failed.connect(self.on_scan_failed)
+        self.scan_worker.start()
+
+    def on_scan_device(self, device):
+        """Affichage au fil des réponses, la liste étant redessinée au plus toutes les 250 ms"""
+        self.scan_devices.append(device)
+        self.device_count_label.setText(f"Appareils connectés: {len(self.scan_devices)}")
+        if not self.scan_refresh_timer.isActive():
+            self.scan_refresh_timer.start()
+
+    def refresh_scan_devices(self):
+        self.device_tab.update_device_list(self.scan_devices)
+
+    def on_scan_finished(self, summary):
+        self.scan_refresh_timer.stop()
+        self.update_device_list(self.scan_devices)
         self.statusBar().showMessage("Scan terminé", 3000)
 
+    def on_scan_failed(self, error):
+        msg = f"Échec du scan: {error}"
+        self.statusBar().showMessage(msg, 5000)
+        self.alerts_tab.add_alert(msg, 'critical')
+
     def show_block_dialog(self):
         """Affiche la boîte de dialogue pour bloquer un appareil"""
         ip, ok = QInputDialog.getText(
@@ -231,6 +286,8 @@ class AdvancedMainWindow(QMainWindow):
     def closeEvent(self, event):
         """Gère la fermeture de l'application"""
         self.scanner.stop_monitoring()
+        if self.scan_worker is not None:
+            self.scan_worker.wait()
         self.save_settings()
         
         if hasattr(self, 'tray_icon'):
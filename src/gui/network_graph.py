@@ -93,6 +93,7 @@ class NetworkGraphWidget(QGraphicsView):
                 node1['pos'].x(), node1['pos'].y(),
                 node2['pos'].x(), node2['pos'].y(),
                 QPen(QColor(150, 150, 150), 1)
+            )
             line.setZValue(0)
             
             self.graph.add_edge(device1.mac, device2.mac, item=line)
@@ -0,0 +1,69 @@
+import platform
+import subprocess
+from collections import namedtuple
+
+NeighbourEntry = namedtuple('NeighbourEntry', ['ip', 'mac', 'interface', 'state'])
+
+# États du voisinage Linux regroupés selon l'action nécessaire
+FRESH_STATES = {'REACHABLE', 'PERMANENT', 'NOARP'}
+STALE_STATES = {'STALE', 'DELAY', 'PROBE'}
+INCOMPLETE_STATES = {'INCOMPLETE', 'FAILED'}
+
+PROC_ARP_PATH = '/proc/net/arp'
+ATF_COM = 0x2
+ATF_PERM = 0x4
+
+
+def parse_ip_neigh(output):
+    """Analyse la sortie de `ip -4 neigh show`"""
+    entries = []
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) < 2:
+            continue
+        ip = fields[0]
+        interface = fields[fields.index('dev') + 1] if 'dev' in fields else None
+        mac = fields[fields.index('lladdr') + 1].lower() if 'lladdr' in fields else None
+        state = fields[-1].upper()
+        entries.append(NeighbourEntry(ip, mac, interface, state))
+    return entries
+
+
+def parse_proc_arp(content):
+    """Analyse /proc/net/arp (sans notion d'ancienneté : les entrées complètes
+    sont considérées joignables, le noyau les expire lui-même)"""
+    entries = []
+    for line in content.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 6:
+            continue
+        ip, _, flags, mac, _, interface = fields[:6]
+        flags = int(flags, 16)
+        if flags & ATF_PERM:
+            state = 'PERMANENT'
+        elif flags & ATF_COM:
+            state = 'REACHABLE'
+        else:
+            state = 'INCOMPLETE'
+        mac = None if mac == '00:00:00:00:00:00' else mac.lower()
+        entries.append(NeighbourEntry(ip, mac, interface, state))
+    return entries
+
+
+def read_neighbour_table():
+    """Lit la table de voisinage du noyau, retourne None si indisponible"""
+    if platform.system() != "Linux":
+        return None
+
+    try:
+        result = subprocess.run(["ip", "-4", "neigh", "show"], capture_output=True, text=True, timeout=2)
+        if result.returncode == 0:
+            return parse_ip_neigh(result.stdout)
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+    try:
+        with open(PROC_ARP_PATH) as f:
+            return parse_proc_arp(f.read())
+    except OSError:
+        return None
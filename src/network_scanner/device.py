@@ -0,0 +1,32 @@
+from collections import namedtuple
+
+# Marqueur de fin d'un scan en flux (nombre d'appareils, durée en secondes)
+ScanComplete = namedtuple('ScanComplete', ['devices', 'duration'])
+
+
+class Device:
+    __slots__ = ('ip', 'mac', 'vendor', 'hostname', 'first_seen', 'last_seen',
+                 'open_ports', 'is_authorized', 'is_blocked', 'notes')
+
+    def __init__(self, ip, mac, vendor, hostname, first_seen=None, last_seen=None, open_ports=None):
+        self.ip = ip
+        self.mac = mac
+        self.vendor = vendor
+        self.hostname = hostname
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.open_ports = open_ports if open_ports is not None else []
+        self.is_authorized = False
+        self.is_blocked = False
+        self.notes = ""
+
+    def to_dict(self):
+        return {
+            'ip': self.ip,
+            'mac': self.mac,
+            'vendor': self.vendor,
+            'hostname': self.hostname,
+            'is_authorized': self.is_authorized,
+            'is_blocked': self.is_blocked,
+            'notes': self.notes
+        }
@@ -0,0 +1,125 @@
+import socket
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+
+
+class HostnameResolver:
+    """Résolution DNS inverse avec cache LRU borné, TTL et cache négatif"""
+
+    def __init__(self, max_entries=4096, ttl=3600, negative_ttl=300, max_workers=16, timeout=2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.cache = OrderedDict()  # ip -> (nom d'hôte ou None, expiration)
+        self.pending = {}
+        self.lock = Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dns')
+
+        # Compteurs
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.lookups = 0
+        self.lookup_time = 0.0
+
+    def _get_cached(self, ip):
+        """Retourne (trouvé, nom d'hôte) depuis le cache"""
+        with self.lock:
+            entry = self.cache.get(ip)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            hostname, expires = entry
+            if expires < time.monotonic():
+                del self.cache[ip]
+                self.misses += 1
+                return False, None
+            self.cache.move_to_end(ip)
+            if hostname is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, hostname
+
+    def _store(self, ip, hostname):
+        ttl = self.ttl if hostname is not None else self.negative_ttl
+        with self.lock:
+            self.cache[ip] = (hostname, time.monotonic() + ttl)
+            self.cache.move_to_end(ip)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def _lookup(self, ip):
+        """Résolution réelle, mise en cache du succès comme de l'échec"""
+        start = time.monotonic()
+        try:
+            hostname = socket.gethostbyaddr(ip)[0]
+        except (OSError, UnicodeError):
+            hostname = None
+        with self.lock:
+            self.lookups += 1
+            self.lookup_time += time.monotonic() - start
+            self.pending.pop(ip, None)
+        self._store(ip, hostname)
+        return hostname
+
+    def _submit(self, ip):
+        """Lance une résolution, en réutilisant celle déjà en cours pour cette IP"""
+        with self.lock:
+            future = self.pending.get(ip)
+            if future is None:
+                future = self.executor.submit(self._lookup, ip)
+                self.pending[ip] = future
+            return future
+
+    def resolve(self, ip):
+        """Résout une IP, retourne l'IP elle-même en cas d'échec"""
+        return self.resolve_many([ip])[ip]
+
+    def resolve_many(self, ips):
+        """Résout un lot d'IP en parallèle, retourne {ip: nom d'hôte}
+
+        Les résolutions hors délai continuent en tâche de fond et
+        alimentent le cache pour le cycle suivant.
+        """
+        results = {}
+        futures = {}
+        for ip in dict.fromkeys(ips):
+            found, hostname = self._get_cached(ip)
+            if found:
+                results[ip] = hostname or ip
+            else:
+                futures[ip] = self._submit(ip)
+
+        if futures:
+            wait(futures.values(), timeout=self.timeout)
+            for ip, future in futures.items():
+                hostname = future.result() if future.done() else None
+                results[ip] = hostname or ip
+        return results
+
+    def stats(self):
+        """Compteurs du cache et estimation du temps économisé"""
+        with self.lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            average = self.lookup_time / self.lookups if self.lookups else 0.0
+            return {
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'size': len(self.cache),
+                'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+                'avg_lookup_seconds': average,
+                'saved_seconds': average * (self.hits + self.negative_hits)
+            }
+
+    def clear(self):
+        """Vide le cache"""
+        with self.lock:
+            self.cache.clear()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,128 @@
+import ipaddress
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+
+
+class EnrichmentStage:
+    """Étape d'enrichissement appliquée à chaque couple (ip, mac)"""
+
+    def __init__(self, name, func, default, timeout, batch=False):
+        self.name = name
+        self.func = func
+        self.default = default
+        self.timeout = timeout
+        self.batch = batch
+
+    def fallback(self, ip, mac):
+        """Valeur utilisée si l'étape échoue ou dépasse son délai"""
+        return self.default(ip, mac) if callable(self.default) else self.default
+
+
+class EnrichmentPipeline:
+    """Pipeline d'enrichissement parallèle avec un pool de workers borné
+
+    Toutes les étapes sont soumises en même temps pour tous les appareils ;
+    chaque étape dispose de son propre délai, compté depuis le début du lot.
+    """
+
+    def __init__(self, max_workers=32, logger=None):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.logger = logger or logging.getLogger('network_scanner')
+        self._executor = None
+        self._executor_lock = Lock()
+
+    def add_stage(self, name, func, default=None, timeout=5, batch=False):
+        """Enregistre une étape d'enrichissement
+
+        Une étape batch reçoit la liste complète des couples (ip, mac) et
+        retourne une liste de valeurs dans le même ordre.
+        """
+        self.stages[name] = EnrichmentStage(name, func, default, timeout, batch)
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='enrichment'
+                )
+            return self._executor
+
+    def run(self, hosts, stages=None):
+        """Enrichit une liste de couples (ip, mac)
+
+        Retourne une liste de ((ip, mac), {étape: valeur}) triée par IP puis MAC.
+        """
+        hosts = sorted(set(hosts), key=self.sort_key)
+        stages = [self.stages[name] for name in (stages or self.stages) if name in self.stages]
+        results = [{} for _ in hosts]
+
+        if not hosts:
+            return []
+
+        start = time.monotonic()
+        submitted = []
+        for stage in stages:
+            if stage.batch:
+                futures = [self.executor.submit(stage.func, list(hosts))]
+            else:
+                futures = [self.executor.submit(stage.func, ip, mac) for ip, mac in hosts]
+            submitted.append((stage, futures))
+
+        for stage, futures in submitted:
+            remaining = max(0, start + stage.timeout - time.monotonic())
+            wait(futures, timeout=remaining)
+
+            if stage.batch:
+                self._collect_batch(stage, futures[0], hosts, results)
+                continue
+
+            timed_out = 0
+            for index, future in enumerate(futures):
+                ip, mac = hosts[index]
+                if not future.done():
+                    future.cancel()
+                    timed_out += 1
+                    results[index][stage.name] = stage.fallback(ip, mac)
+                elif future.exception() is not None:
+                    results[index][stage.name] = stage.fallback(ip, mac)
+                else:
+                    results[index][stage.name] = future.result()
+
+            if timed_out:
+                self.logger.warning(f"Étape '{stage.name}': {timed_out} appareil(s) hors délai ({stage.timeout}s)")
+
+        return list(zip(hosts, results))
+
+    def _collect_batch(self, stage, future, hosts, results):
+        """Répartit le résultat d'une étape batch entre les appareils"""
+        values = None
+        if not future.done():
+            future.cancel()
+            self.logger.warning(f"Étape '{stage.name}' hors délai ({stage.timeout}s)")
+        elif future.exception() is not None:
+            self.logger.error(f"Étape '{stage.name}' en échec: {future.exception()}")
+        else:
+            values = future.result()
+
+        for index, (ip, mac) in enumerate(hosts):
+            results[index][stage.name] = values[index] if values is not None else stage.fallback(ip, mac)
+
+    @staticmethod
+    def sort_key(host):
+        ip, mac = host
+        try:
+            return (int(ipaddress.ip_address(ip)), mac)
+        except ValueError:
+            return (0, mac)
+
+    def shutdown(self):
+        """Arrête le pool de workers"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,195 @@
+import argparse
+import csv
+import os
+import re
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+# Ancré à la racine du projet, comme la base de données
+DEFAULT_INDEX_PATH = str(Path(__file__).parents[2] / "data" / "oui.idx")
+PREFIX_BITS = (36, 28, 24)  # du plus spécifique (MA-S) au moins spécifique (MA-L)
+
+INDEX_MAGIC = b"OUIX"
+INDEX_VERSION = 1
+HEADER = struct.Struct("<4sHI")      # magic, version, nombre de fabricants
+TABLE_HEADER = struct.Struct("<BI")  # bits du préfixe, nombre d'entrées
+
+IEEE_LINE = re.compile(r"^\s*([0-9A-Fa-f]{6})\s+\(base 16\)\s+(.+?)\s*$")
+PREFIX_LINE = re.compile(r"^([0-9A-Fa-f]{6}|[0-9A-Fa-f]{7}|[0-9A-Fa-f]{9}):(.+)$")
+
+
+def mac_to_int(mac):
+    """Convertit une adresse MAC (séparateurs ':', '-' ou '.') en entier 48 bits"""
+    return int(mac.replace(":", "").replace("-", "").replace(".", ""), 16)
+
+
+def parse_oui_file(path):
+    """Lit un fichier OUI local et retourne une liste de (bits, préfixe, fabricant)
+
+    Formats acceptés : oui.txt de l'IEEE (lignes "(base 16)"), CSV de l'IEEE
+    (oui.csv, mam.csv, oui36.csv) et cache de mac_vendor_lookup ("PREFIXE:Fabricant").
+    """
+    entries = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        first_line = f.readline()
+        f.seek(0)
+
+        if first_line.startswith("Registry,Assignment"):
+            for row in csv.DictReader(f):
+                assignment = row.get("Assignment", "").strip()
+                vendor = row.get("Organization Name", "").strip()
+                if assignment and vendor:
+                    entries.append((len(assignment) * 4, int(assignment, 16), vendor))
+            return entries
+
+        for line in f:
+            match = IEEE_LINE.match(line) or PREFIX_LINE.match(line.strip())
+            if match:
+                prefix, vendor = match.group(1), match.group(2).strip()
+                entries.append((len(prefix) * 4, int(prefix, 16), vendor))
+    return entries
+
+
+class OUIIndex:
+    """Index compact des préfixes OUI (24/28/36 bits) en tableaux d'entiers triés"""
+
+    def __init__(self, tables, vendors):
+        self.tables = tables    # bits -> (array('Q') préfixes triés, array('I') indices fabricant)
+        self.vendors = vendors  # liste des noms de fabricants dédupliqués
+
+    @classmethod
+    def build(cls, entries):
+        """Construit l'index depuis une liste de (bits, préfixe, fabricant)"""
+        vendor_ids = {}
+        by_bits = {bits: {} for bits in PREFIX_BITS}
+        for bits, prefix, vendor in entries:
+            if bits in by_bits:
+                by_bits[bits][prefix] = vendor_ids.setdefault(vendor, len(vendor_ids))
+
+        tables = {}
+        for bits, prefixes in by_bits.items():
+            keys = sorted(prefixes)
+            tables[bits] = (array("Q", keys), array("I", (prefixes[key] for key in keys)))
+        return cls(tables, list(vendor_ids))
+
+    @classmethod
+    def from_oui_files(cls, *paths):
+        return cls.build(entry for path in paths for entry in parse_oui_file(path))
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """Écrit l'index au format binaire"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.vendors)))
+            for bits in PREFIX_BITS:
+                keys, ids = self.tables[bits]
+                f.write(TABLE_HEADER.pack(bits, len(keys)))
+                f.write(keys.tobytes())
+                f.write(ids.tobytes())
+            f.write("\n".join(self.vendors).encode("utf-8"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        """Charge un index binaire en une seule lecture"""
+        with open(path, "rb") as f:
+            data = f.read()
+
+        magic, version, vendor_count = HEADER.unpack_from(data, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"Index OUI invalide: {path}")
+
+        offset = HEADER.size
+        tables = {}
+        for _ in PREFIX_BITS:
+            bits, count = TABLE_HEADER.unpack_from(data, offset)
+            offset += TABLE_HEADER.size
+            keys = array("Q")
+            keys.frombytes(data[offset:offset + count * keys.itemsize])
+            offset += count * keys.itemsize
+            ids = array("I")
+            ids.frombytes(data[offset:offset + count * ids.itemsize])
+            offset += count * ids.itemsize
+            tables[bits] = (keys, ids)
+
+        vendors = data[offset:].decode("utf-8").split("\n") if vendor_count else []
+        return cls(tables, vendors)
+
+    def lookup_int(self, mac):
+        """Recherche par MAC entière, du préfixe le plus long au plus court"""
+        for bits in PREFIX_BITS:
+            keys, ids = self.tables[bits]
+            prefix = mac >> (48 - bits)
+            position = bisect_left(keys, prefix)
+            if position < len(keys) and keys[position] == prefix:
+                return self.vendors[ids[position]]
+        return None
+
+    def lookup(self, mac):
+        """Retourne le fabricant d'une adresse MAC, ou None"""
+        try:
+            return self.lookup_int(mac_to_int(mac))
+        except ValueError:
+            return None
+
+    def lookup_many(self, macs, default=None):
+        """Résout un lot d'adresses MAC, retourne une liste dans le même ordre"""
+        lookup = self.lookup
+        return [lookup(mac) or default for mac in macs]
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self.tables.values())
+
+
+def load_default_index(path=DEFAULT_INDEX_PATH, source=None, save=False):
+    """Charge l'index, en le reconstruisant depuis un fichier OUI local au besoin
+
+    L'index reconstruit n'est écrit sur disque que si `save` est vrai
+    (ou via --refresh). Retourne None si aucun index ni aucune source
+    n'est disponible.
+    """
+    if os.path.exists(path):
+        try:
+            return OUIIndex.load(path)
+        except (OSError, ValueError, struct.error):
+            pass
+
+    source = source or _find_local_oui_file()
+    if not source or not os.path.exists(source):
+        return None
+
+    index = OUIIndex.from_oui_files(source)
+    if save:
+        try:
+            index.save(path)
+        except OSError:
+            pass
+    return index
+
+
+def _find_local_oui_file():
+    """Cherche la liste téléchargée par mac_vendor_lookup"""
+    try:
+        from mac_vendor_lookup import BaseMacLookup
+    except ImportError:
+        return None
+    return BaseMacLookup().find_vendors_list()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gestion de l'index OUI local")
+    parser.add_argument("--refresh", metavar="OUI_FILE", nargs="+", required=True,
+                        help="Fichiers OUI locaux (oui.txt, oui.csv, mam.csv, oui36.csv ou mac-vendors.txt)")
+    parser.add_argument("--output", default=DEFAULT_INDEX_PATH, help="Chemin de l'index binaire")
+    args = parser.parse_args()
+
+    index = OUIIndex.from_oui_files(*args.refresh)
+    index.save(args.output)
+    print(f"Index OUI reconstruit: {len(index)} préfixes, {len(index.vendors)} fabricants -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import time
+import logging
+from collections import namedtuple
+from threading import Event, Lock
+import scapy.all as scapy
+from src.utils.helpers import get_local_addresses
+
+# Réponse ARP minimale, compatible avec packet[1].psrc / packet[1].hwsrc
+ARPReply = namedtuple('ARPReply', ['psrc', 'hwsrc'])
+
+
+def start_arp_sniffer(prn, interfaces=None, timeout=1):
+    """Démarre un AsyncSniffer ARP filtré en Python (sans BPF ni libpcap), lève OSError en cas d'échec"""
+    started = Event()
+    sniffer = scapy.AsyncSniffer(store=False, prn=prn, lfilter=lambda packet: packet.haslayer(scapy.ARP),
+                                 started_callback=started.set, **({'iface': interfaces} if interfaces else {}))
+    sniffer.start()
+    if not started.wait(timeout):
+        error = getattr(sniffer, 'exception', None)
+        if error is not None:
+            raise OSError(f"Écoute ARP impossible: {str(error)}") from error
+    return sniffer
+
+
+class DeviceTable:
+    """Table incrémentale des appareils présents, indexée par MAC"""
+
+    def __init__(self):
+        self.devices = {}
+        self.last_heard = {}
+        self.lock = Lock()
+
+    def is_current(self, ip, mac):
+        """Vrai si l'appareil est déjà connu avec cette IP"""
+        with self.lock:
+            device = self.devices.get(mac)
+            return device is not None and device.ip == ip
+
+    def touch(self, mac, timestamp=None):
+        """Note qu'un appareil connu vient d'émettre du trafic ARP"""
+        with self.lock:
+            if mac in self.devices:
+                self.last_heard[mac] = timestamp or time.time()
+
+    def update(self, devices, timestamp=None):
+        """Ajoute ou met à jour des appareils, retourne ceux qui ont changé"""
+        timestamp = timestamp or time.time()
+        changed = []
+        with self.lock:
+            for device in devices:
+                previous = self.devices.get(device.mac)
+                if previous is None or previous.ip != device.ip:
+                    changed.append(device)
+                self.devices[device.mac] = device
+                self.last_heard[device.mac] = timestamp
+        return changed
+
+    def reconcile(self, devices, since):
+        """Remplace la table par le résultat d'un balayage actif
+
+        Les appareils entendus passivement depuis le début du balayage sont
+        conservés même s'ils n'ont pas répondu. Retourne True si la table a changé.
+        """
+        with self.lock:
+            before = {mac: device.ip for mac, device in self.devices.items()}
+            kept = {mac: device for mac, device in self.devices.items()
+                    if self.last_heard.get(mac, 0) >= since}
+            kept.update((device.mac, device) for device in devices)
+
+            now = time.time()
+            self.last_heard = {mac: self.last_heard.get(mac, now) for mac in kept}
+            for device in devices:
+                self.last_heard[device.mac] = now
+            self.devices = kept
+
+            return before != {mac: device.ip for mac, device in kept.items()}
+
+    def snapshot(self):
+        """Liste des appareils présents, triée par MAC"""
+        with self.lock:
+            return [self.devices[mac] for mac in sorted(self.devices)]
+
+
+class PassiveARPMonitor:
+    """Écoute passive du trafic ARP (réponses, requêtes et ARP gratuits)
+
+    Les trames émises par l'hôte lui-même (requêtes des balayages de
+    réconciliation notamment) sont ignorées.
+    """
+
+    def __init__(self, on_reply, interfaces=None, local_addresses=None):
+        self.on_reply = on_reply
+        self.interfaces = interfaces
+        # (IP, MAC) de nos propres interfaces
+        self.local_ips, self.local_macs = local_addresses or get_local_addresses()
+        self.sniffer = None
+        self.logger = logging.getLogger('network_scanner')
+
+    def start(self):
+        """Démarre le sniffer en tâche de fond, lève OSError s'il ne peut pas démarrer"""
+        if self.sniffer is not None:
+            return
+        self.sniffer = start_arp_sniffer(self.handle_packet, self.interfaces)
+        self.logger.info("Écoute ARP passive démarrée")
+
+    def handle_packet(self, packet):
+        """Extrait l'IP/MAC de l'émetteur de chaque trame ARP"""
+        if not packet.haslayer(scapy.ARP):
+            return
+        arp = packet[scapy.ARP]
+        # Les sondes ARP (RFC 5227) n'annoncent pas encore d'adresse
+        if arp.psrc == "0.0.0.0":
+            return
+        if arp.hwsrc.lower() in self.local_macs or arp.psrc in self.local_ips:
+            return
+        try:
+            self.on_reply(arp.psrc, arp.hwsrc)
+        except Exception as e:
+            self.logger.error(f"Erreur traitement ARP passif: {str(e)}")
+
+    def stop(self):
+        """Arrête le sniffer"""
+        if self.sniffer is None:
+            return
+        try:
+            self.sniffer.stop()
+        except Exception as e:
+            self.logger.warning(f"Arrêt du sniffer ARP: {str(e)}")
+        self.sniffer = None
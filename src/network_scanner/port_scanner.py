@@ -0,0 +1,190 @@
+import asyncio
+import errno
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Erreurs signifiant que le port est fermé ou l'hôte injoignable
+CLOSED_ERRNOS = {code for code in (errno.ECONNREFUSED, errno.ECONNRESET, errno.ETIMEDOUT, errno.EHOSTUNREACH,
+                                   errno.ENETUNREACH, getattr(errno, 'EHOSTDOWN', None)) if code is not None}
+# Épuisement des ressources locales (descripteurs, tampons, ports éphémères) : à réessayer
+RESOURCE_ERRNOS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM, errno.EADDRNOTAVAIL}
+FD_MARGIN = 64  # descripteurs réservés au reste du programme
+
+
+def max_open_sockets(margin=FD_MARGIN):
+    """Nombre de sockets simultanés permis par RLIMIT_NOFILE moins une marge, None si illimité ou inconnu"""
+    if resource is None:
+        return None
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return None
+    return max(1, soft - margin)
+
+
+def parse_ports(spec):
+    """Convertit une spécification de ports en liste triée
+
+    Accepte un entier, une liste d'entiers/plages ou une chaîne
+    du type "22,80,8000-8010".
+    """
+    if isinstance(spec, int):
+        items = [spec]
+    elif isinstance(spec, str):
+        items = [part.strip() for part in spec.split(',') if part.strip()]
+    else:
+        items = list(spec)
+
+    ports = set()
+    for item in items:
+        if isinstance(item, str) and '-' in item:
+            start, end = (int(bound) for bound in item.split('-', 1))
+            ports.update(range(start, end + 1))
+        elif isinstance(item, range):
+            ports.update(item)
+        else:
+            ports.add(int(item))
+
+    invalid = [port for port in ports if not 0 < port < 65536]
+    if invalid:
+        raise ValueError(f"Ports invalides: {sorted(invalid)[:5]}")
+    return sorted(ports)
+
+
+class RateLimiter:
+    """Limiteur de débit global (connexions par seconde), partagé entre threads et boucles asyncio"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = Lock()
+
+    async def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AsyncPortScanner:
+    """Scanner de ports TCP asynchrone à forte concurrence
+
+    La concurrence est plafonnée par la limite de descripteurs du processus.
+    Seuls les refus, hôtes injoignables et délais dépassés comptent comme
+    port fermé ; un manque de ressources locales (EMFILE, ENOBUFS...) est
+    réessayé `resource_retries` fois puis remonté à l'appelant. Passé
+    `deadline` secondes, les connexions en cours sont annulées et les ports
+    déjà trouvés sont retournés.
+    """
+
+    def __init__(self, timeout=1.0, max_concurrency=1000, per_host_concurrency=16, rate_limit=None,
+                 resource_retries=3, resource_backoff=0.1, logger=None):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.rate_limit = rate_limit
+        self.resource_retries = resource_retries
+        self.resource_backoff = resource_backoff
+        self.logger = logger or logging.getLogger('network_scanner')
+        self._rate_limiter = None
+        self._rate_limiter_lock = Lock()
+
+    def rate_limiter(self):
+        """Limiteur commun à tous les scans en cours (None sans rate_limit)"""
+        if not self.rate_limit:
+            return None
+        with self._rate_limiter_lock:
+            if self._rate_limiter is None or self._rate_limiter.rate != self.rate_limit:
+                self._rate_limiter = RateLimiter(self.rate_limit)
+            return self._rate_limiter
+
+    async def scan_port(self, ip, port, timeout=None):
+        """Teste une connexion TCP, retourne True si le port est ouvert"""
+        attempt = 0
+        while True:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout or self.timeout)
+                break
+            except (asyncio.TimeoutError, ConnectionRefusedError, ConnectionResetError):
+                return False
+            except OSError as e:
+                if e.errno in CLOSED_ERRNOS:
+                    return False
+                if e.errno not in RESOURCE_ERRNOS or attempt >= self.resource_retries:
+                    raise
+                # Descripteurs ou tampons épuisés : on laisse les autres connexions se fermer
+                await asyncio.sleep(self.resource_backoff * 2 ** attempt)
+                attempt += 1
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def scan_hosts(self, ips, ports, timeout=None, deadline=None):
+        """Scanne tous les ports de tous les hôtes, retourne {ip: [ports ouverts]}
+
+        deadline : durée maximale du scan en secondes (résultats partiels au-delà).
+        """
+        ports = parse_ports(ports)
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host_concurrency))
+        limiter = self.rate_limiter()
+        open_ports = {ip: [] for ip in ips}
+
+        # Tâches entrelacées par port pour répartir la charge entre les hôtes ;
+        # le générateur est partagé par un nombre borné de workers
+        jobs = ((ip, port) for port in ports for ip in open_ports)
+
+        async def worker():
+            for ip, port in jobs:
+                async with host_slots[ip]:
+                    if limiter:
+                        await limiter.acquire()
+                    if await self.scan_port(ip, port, timeout):
+                        open_ports[ip].append(port)
+
+        workers = min(self.max_concurrency, len(open_ports) * len(ports))
+        if not workers:
+            # Aucun hôte ou aucun port : rien à sonder
+            return open_ports
+        limit = max_open_sockets()
+        if limit is not None:
+            workers = min(workers, limit)
+        tasks = [asyncio.ensure_future(worker()) for _ in range(workers)]
+        done, pending = await asyncio.wait(tasks, timeout=deadline, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+        if pending:
+            self.logger.warning(f"Scan de ports interrompu après {deadline}s : résultats partiels")
+
+        for found in open_ports.values():
+            found.sort()
+        return open_ports
+
+    def scan(self, ips, ports, timeout=None, deadline=None):
+        """Point d'entrée synchrone, utilisable depuis n'importe quel thread"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.scan_hosts(ips, ports, timeout, deadline))
+
+        # Une boucle tourne déjà dans ce thread : exécuter le scan à côté
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.scan_hosts(ips, ports, timeout, deadline)).result()
@@ -0,0 +1,109 @@
+import ipaddress
+import select
+import socket
+import struct
+import time
+from src.network_scanner.passive import ARPReply
+
+ETH_P_ARP = 0x0806
+ARP_REQUEST = 1
+ARP_REPLY = 2
+BROADCAST_MAC = b"\xff" * 6
+FRAME_SIZE = 42
+TARGET_IP_OFFSET = 38
+
+
+def mac_to_bytes(mac):
+    return bytes.fromhex(mac.replace(":", "").replace("-", ""))
+
+
+def bytes_to_mac(data):
+    return ":".join(f"{byte:02x}" for byte in data)
+
+
+def build_request_template(source_mac, source_ip):
+    """Construit une trame Ethernet/ARP de requête réutilisable (IP cible à compléter)"""
+    frame = bytearray(FRAME_SIZE)
+    frame[0:6] = BROADCAST_MAC
+    frame[6:12] = source_mac
+    struct.pack_into("!H", frame, 12, ETH_P_ARP)
+    struct.pack_into("!HHBBH", frame, 14, 1, 0x0800, 6, 4, ARP_REQUEST)
+    frame[22:28] = source_mac
+    frame[28:32] = socket.inet_aton(source_ip)
+    return frame
+
+
+def parse_arp_reply(frame):
+    """Extrait (ip, mac) de l'émetteur d'une réponse ARP, ou None"""
+    if len(frame) < FRAME_SIZE or frame[12:14] != b"\x08\x06" or frame[20:22] != b"\x00\x02":
+        return None
+    return socket.inet_ntoa(bytes(frame[28:32])), bytes_to_mac(frame[22:28])
+
+
+def expand_targets(targets):
+    """Convertit un CIDR ou une liste d'IP en adresses IPv4 compactes (4 octets)"""
+    if isinstance(targets, str):
+        network = ipaddress.ip_network(targets, strict=False)
+        hosts = network.hosts() if network.num_addresses > 2 else iter(network)
+        return [address.packed for address in hosts]
+    return [socket.inet_aton(ip) for ip in targets]
+
+
+class RawARPEngine:
+    """Moteur de balayage ARP sur socket AF_PACKET brute (Linux, root requis)
+
+    Les trames sont émises par lots depuis un tampon unique et les réponses
+    sont analysées directement dans un tampon de réception préalloué.
+    """
+
+    def __init__(self, interface, source_ip, timeout=2, batch_size=128):
+        self.interface = interface
+        self.source_ip = source_ip
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.receive_buffer = bytearray(2048)
+
+    def sweep(self, targets):
+        """Balaye un CIDR ou une liste d'IP, retourne des paires (None, ARPReply)"""
+        addresses = expand_targets(targets)
+        wanted = set(addresses)
+        replies = {}
+
+        with socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP)) as sock:
+            sock.bind((self.interface, 0))
+            sock.setblocking(False)
+            source_mac = sock.getsockname()[4]
+            frame = build_request_template(source_mac, self.source_ip)
+
+            for start in range(0, len(addresses), self.batch_size):
+                for address in addresses[start:start + self.batch_size]:
+                    frame[TARGET_IP_OFFSET:FRAME_SIZE] = address
+                    try:
+                        sock.send(frame)
+                    except BlockingIOError:
+                        select.select([], [sock], [], self.timeout)
+                        sock.send(frame)
+                # Vider la file de réception entre deux lots
+                self._receive(sock, wanted, replies, deadline=time.monotonic())
+
+            self._receive(sock, wanted, replies, deadline=time.monotonic() + self.timeout)
+
+        return [(None, ARPReply(ip, mac)) for ip, mac in replies]
+
+    def _receive(self, sock, wanted, replies, deadline):
+        view = memoryview(self.receive_buffer)
+        while True:
+            remaining = max(0, deadline - time.monotonic())
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                return
+            try:
+                size = sock.recv_into(self.receive_buffer)
+            except BlockingIOError:
+                continue
+            frame = view[:size]
+            if size < FRAME_SIZE or bytes(frame[28:32]) not in wanted:
+                continue
+            reply = parse_arp_reply(frame)
+            if reply:
+                replies[reply] = True
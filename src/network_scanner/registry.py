@@ -0,0 +1,187 @@
+import socket
+import struct
+import time
+from array import array
+from collections.abc import MutableMapping
+from threading import RLock
+from src.network_scanner.oui_index import mac_to_int
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+NO_PORTS = ()
+
+
+def int_to_mac(value):
+    return ":".join(f"{(value >> shift) & 0xff:02x}" for shift in range(40, -8, -8))
+
+
+def to_epoch(value):
+    """Convertit un horodatage (epoch ou chaîne TIME_FORMAT) en entier"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(time.mktime(time.strptime(value, TIME_FORMAT)))
+
+
+def from_epoch(value):
+    return time.strftime(TIME_FORMAT, time.localtime(value)) if value else None
+
+
+def ip_to_int(ip):
+    try:
+        return struct.unpack("!I", socket.inet_aton(ip))[0]
+    except (OSError, TypeError):
+        return 0
+
+
+def int_to_ip(value):
+    return socket.inet_ntoa(struct.pack("!I", value)) if value else None
+
+
+class DeviceRecord(MutableMapping):
+    """Vue dictionnaire sur une ligne du registre (compatibilité known_devices[mac][...])"""
+
+    __slots__ = ('registry', 'mac')
+
+    FIELDS = ('first_seen', 'last_seen', 'connection_count', 'last_ports', 'ip')
+
+    def __init__(self, registry, mac):
+        self.registry = registry
+        self.mac = mac
+
+    def __getitem__(self, key):
+        return self.registry.get_field(self.mac, key)
+
+    def __setitem__(self, key, value):
+        self.registry.set_field(self.mac, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("Les champs du registre ne peuvent pas être supprimés")
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+
+class DeviceRegistry(MutableMapping):
+    """Registre compact des appareils connus, stocké en colonnes
+
+    Les MAC sont des entiers 48 bits et les horodatages des entiers epoch
+    dans des tableaux ; chaque appareil occupe un emplacement (slot).
+    """
+
+    def __init__(self):
+        self.slots = {}                 # MAC entière -> emplacement
+        self.macs = array('Q')
+        self.first_seen = array('q')
+        self.last_seen = array('q')
+        self.connection_count = array('L')
+        self.ips = array('I')
+        self.last_ports = []            # tuples, () partagé si aucun port
+        self.lock = RLock()
+
+    def _slot(self, mac):
+        try:
+            return self.slots[mac_to_int(mac)]
+        except ValueError:
+            raise KeyError(mac)
+
+    def _allocate(self, mac_int):
+        slot = len(self.macs)
+        self.slots[mac_int] = slot
+        self.macs.append(mac_int)
+        self.first_seen.append(0)
+        self.last_seen.append(0)
+        self.connection_count.append(0)
+        self.ips.append(0)
+        self.last_ports.append(NO_PORTS)
+        return slot
+
+    def record(self, device):
+        """Enregistre une observation d'appareil (chemin rapide de update_device_history)"""
+        mac_int = mac_to_int(device.mac)
+        with self.lock:
+            slot = self.slots.get(mac_int)
+            if slot is None:
+                slot = self._allocate(mac_int)
+                self.first_seen[slot] = to_epoch(device.first_seen) or int(time.time())
+            self.connection_count[slot] += 1
+            self.last_seen[slot] = to_epoch(device.last_seen) or int(time.time())
+            self.ips[slot] = ip_to_int(device.ip)
+            self.last_ports[slot] = tuple(device.open_ports) if device.open_ports else NO_PORTS
+            return slot
+
+    def get_field(self, mac, key):
+        with self.lock:
+            slot = self._slot(mac)
+            if key == 'first_seen':
+                return from_epoch(self.first_seen[slot])
+            if key == 'last_seen':
+                return from_epoch(self.last_seen[slot])
+            if key == 'connection_count':
+                return self.connection_count[slot]
+            if key == 'last_ports':
+                return list(self.last_ports[slot])
+            if key == 'ip':
+                return int_to_ip(self.ips[slot])
+        raise KeyError(key)
+
+    def set_field(self, mac, key, value):
+        with self.lock:
+            slot = self._slot(mac)
+            if key == 'first_seen':
+                self.first_seen[slot] = to_epoch(value)
+            elif key == 'last_seen':
+                self.last_seen[slot] = to_epoch(value)
+            elif key == 'connection_count':
+                self.connection_count[slot] = value
+            elif key == 'last_ports':
+                self.last_ports[slot] = tuple(value) if value else NO_PORTS
+            elif key == 'ip':
+                self.ips[slot] = ip_to_int(value)
+            else:
+                raise KeyError(key)
+
+    def __getitem__(self, mac):
+        with self.lock:
+            self._slot(mac)
+        return DeviceRecord(self, mac)
+
+    def __setitem__(self, mac, values):
+        with self.lock:
+            mac_int = mac_to_int(mac)
+            if mac_int not in self.slots:
+                self._allocate(mac_int)
+            for key, value in dict(values).items():
+                self.set_field(mac, key, value)
+
+    def __delitem__(self, mac):
+        with self.lock:
+            slot = self._slot(mac)
+            last = len(self.macs) - 1
+            # Retrait par échange avec le dernier emplacement
+            for column in (self.macs, self.first_seen, self.last_seen, self.connection_count, self.ips, self.last_ports):
+                column[slot] = column[last]
+                column.pop()
+            del self.slots[mac_to_int(mac)]
+            if slot != last:
+                self.slots[self.macs[slot]] = slot
+
+    def __contains__(self, mac):
+        try:
+            return mac_to_int(mac) in self.slots
+        except (ValueError, AttributeError):
+            return False
+
+    def __iter__(self):
+        return (int_to_mac(mac) for mac in self.macs)
+
+    def __len__(self):
+        return len(self.macs)
+
+    def recent_ips(self, since):
+        """IP des appareils vus depuis `since` (epoch), sans créer de vues"""
+        with self.lock:
+            return {int_to_ip(ip) for ip, seen in zip(self.ips, self.last_seen) if ip and seen >= since}
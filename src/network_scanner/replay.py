@@ -0,0 +1,127 @@
+import argparse
+import logging
+import time
+from collections import namedtuple
+import scapy.all as scapy
+from src.network_scanner.passive import ARPReply
+
+ReplayStats = namedtuple('ReplayStats', ['packets', 'arp_replies', 'cycles', 'devices', 'duration', 'events_per_second'])
+
+
+class PcapReplay:
+    """Rejoue une capture pcap/pcapng dans la logique de détection du scanner
+
+    Les paquets sont lus au fil de l'eau (scapy.PcapReader) : chaque réponse
+    ARP passe par detect_arp_spoofing avec son horodatage de capture, et les
+    réponses sont regroupées par cycle de `interval` secondes de capture pour
+    process_scan_results puis behavioral_analysis, comme un scan périodique.
+
+    speed=None rejoue aussi vite que possible ; speed=1.0 respecte le rythme
+    de la capture, 10.0 va dix fois plus vite. Le pare-feu est désactivé
+    pendant le rejeu (dry_run) pour ne jamais bloquer d'appareil réel.
+    """
+
+    def __init__(self, scanner, path, speed=None, interval=60, dry_run=True):
+        self.scanner = scanner
+        self.path = path
+        self.speed = speed
+        self.interval = interval
+        self.dry_run = dry_run
+        self.logger = scanner.logger
+
+    def replies(self):
+        """Itère sur (horodatage de capture, réponse) sans charger le fichier
+
+        La réponse vaut (None, ARPReply) pour une réponse ARP, None pour tout
+        autre paquet (compté mais ignoré).
+        """
+        with scapy.PcapReader(self.path) as reader:
+            for packet in reader:
+                if packet.haslayer(scapy.ARP) and packet[scapy.ARP].op == 2:
+                    arp = packet[scapy.ARP]
+                    yield float(packet.time), (None, ARPReply(arp.psrc, arp.hwsrc))
+                else:
+                    yield float(packet.time), None
+
+    def run(self):
+        """Rejoue la capture et retourne un ReplayStats"""
+        firewall = self.scanner.firewall
+        if self.dry_run:
+            self.scanner.firewall = None
+
+        packets = arp_replies = cycles = devices = 0
+        cycle = {}  # (ip, mac) -> réponse, dédoublonnées sur le cycle
+        cycle_end = None
+        capture_start = None
+        start = time.perf_counter()
+
+        try:
+            for timestamp, reply in self.replies():
+                packets += 1
+                if capture_start is None:
+                    capture_start = timestamp
+                    cycle_end = timestamp + self.interval
+                if self.speed:
+                    delay = (timestamp - capture_start) / self.speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if timestamp >= cycle_end:
+                    devices += self.flush(cycle)
+                    cycles += 1
+                    cycle = {}
+                    while cycle_end <= timestamp:
+                        cycle_end += self.interval
+
+                if reply is None:
+                    continue
+                arp_replies += 1
+                if self.scanner.arp_spoof_detection:
+                    self.scanner.detect_arp_spoofing((reply,), now=timestamp)
+                cycle[(reply[1].psrc, reply[1].hwsrc)] = reply
+
+            if cycle:
+                devices += self.flush(cycle)
+                cycles += 1
+        finally:
+            self.scanner.firewall = firewall
+
+        duration = time.perf_counter() - start
+        stats = ReplayStats(packets, arp_replies, cycles, devices, duration,
+                            arp_replies / duration if duration else 0.0)
+        self.logger.info(f"Rejeu de {self.path}: {stats}")
+        return stats
+
+    def flush(self, cycle):
+        """Traite les réponses d'un cycle comme un scan, retourne le nombre d'appareils"""
+        found = self.scanner.process_scan_results(list(cycle.values()))
+        self.scanner.behavioral_analysis(found)
+        self.scanner.devices = found
+        return len(found)
+
+
+def main():
+    from src.network_scanner.scanner import AdvancedNetworkScanner
+
+    parser = argparse.ArgumentParser(description="Rejeu hors ligne d'une capture pcap/pcapng")
+    parser.add_argument("capture", help="Fichier pcap ou pcapng")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="Facteur de vitesse (1.0 = temps réel) ; vitesse maximale par défaut")
+    parser.add_argument("--interval", type=float, default=60, help="Durée d'un cycle de scan simulé (secondes)")
+    parser.add_argument("--resolve", action="store_true", help="Active la résolution DNS inverse")
+    parser.add_argument("--ports", action="store_true", help="Active le scan de ports des appareils rejoués")
+    args = parser.parse_args()
+
+    scanner = AdvancedNetworkScanner()
+    scanner.hostname_lookup_enabled = args.resolve
+    scanner.port_scan_enabled = args.ports
+    scanner.logger.setLevel(logging.ERROR)
+
+    stats = PcapReplay(scanner, args.capture, speed=args.speed, interval=args.interval).run()
+    scanner.enrichment.shutdown()
+    print(f"{stats.packets} paquets, {stats.arp_replies} réponses ARP, {stats.cycles} cycles, "
+          f"{stats.devices} appareils en {stats.duration:.3f}s ({stats.events_per_second:.0f} événements/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,89 @@
 import scapy.all as scapy
 from mac_vendor_lookup import MacLookup
 from threading import Thread, Event
+from queue import Queue, Empty
 import time
 import socket
-from collections import defaultdict
-from src.network_scanner.device import Device
-from src.utils.helpers import get_network_info, is_admin
-from src.security.firewall import FirewallManager
+import ipaddress
+from concurrent.futures import ThreadPoolExecutor
+from src.network_scanner.device import Device, ScanComplete
+from src.network_scanner.enrichment import EnrichmentPipeline
+from src.network_scanner.port_scanner import AsyncPortScanner
+from src.network_scanner.passive import ARPReply, DeviceTable, PassiveARPMonitor, start_arp_sniffer
+from src.network_scanner.dns_cache import HostnameResolver
+from src.network_scanner.oui_index import load_default_index
+from src.network_scanner.arp_cache import read_neighbour_table, FRESH_STATES
+from src.network_scanner.scheduler import ScanScheduler
+from src.network_scanner.raw_arp import RawARPEngine
+from src.network_scanner.registry import DeviceRegistry
+from src.utils.metrics import metrics
+from src.utils.helpers import get_network_info, get_all_network_info, get_network_cidr, split_network, is_admin
+from src.security.firewall import AdvancedFirewallManager
+from src.security.arp_bindings import ARPBindingTable
 import logging
 
 class AdvancedNetworkScanner:
     def __init__(self, update_interval=60):
         self.devices = []
-        self.known_devices = defaultdict(dict)
+        self.known_devices = DeviceRegistry()
         self.update_interval = update_interval
         self.scanning_event = Event()
         self.mac_lookup = MacLookup()
+        self.oui_index = load_default_index()
         self.current_network = get_network_info()
+        self.networks = get_all_network_info()
         self.scan_thread = None
-        self.firewall = FirewallManager() if is_admin() else None
+        self.firewall = AdvancedFirewallManager() if is_admin() else None
         self.setup_logging()
         
         # Configuration avancée
         self.port_scan_enabled = False
-        self.common_ports = [21, 22, 23, 80, 443, 3389]
+        self.hostname_lookup_enabled = True
+        self.common_ports = [21, 22, 23, 80, 443, 3389]  # liste, ou plages "1-1024,3389"
         self.arp_spoof_detection = True
+        self.arp_bindings = ARPBindingTable(window=600, flap_threshold=3)
+        
+        # Balayage ARP : découpage des grands réseaux et balayages parallèles
+        self.shard_prefix = 24
+        self.min_scan_prefix = 20  # réseaux plus grands (> 4096 adresses) ignorés
+        self.skipped_networks = set()
+        self.max_parallel_sweeps = 8
+        self.arp_timeout = 2
+        self.arp_engine = "scapy"  # "scapy" ou "fast" (socket AF_PACKET, Linux)
+        
+        # Chemin rapide : cache ARP du noyau, balayage complet périodique
+        self.arp_cache_enabled = True
+        self.full_sweep_interval = 900
+        self.last_full_sweep = 0
+        
+        # Mode passif : écoute ARP continue, balayage actif de réconciliation
+        self.passive_mode = False
+        self.reconciliation_interval = 600
+        self.device_table = DeviceTable()
+        self.passive_monitor = None
+        
+        # Planificateur adaptatif des balayages et re-sondages
+        self.scheduler = ScanScheduler(full_scan_interval=update_interval)
+        self.last_scan_failed = False
+        
+        # Scanner de ports asynchrone (rate_limit en connexions/seconde)
+        self.port_scanner = AsyncPortScanner(
+            timeout=1.0,
+            max_concurrency=1000,
+            per_host_concurrency=16,
+            rate_limit=None
+        )
+        
+        # Cache de résolution DNS inverse (TTL en secondes)
+        self.hostname_resolver = HostnameResolver(ttl=3600, negative_ttl=300, timeout=2)
+        
+        # Abonnés aux événements (appareils, alertes, blocages) : func(type, données)
+        self.event_listeners = []
+        
+        # Pipeline d'enrichissement (délais en secondes par étape)
+        self.enrichment_workers = 32
+        self.stage_timeouts = {'vendor': 2, 'hostname': 3, 'ports': 15}
+        self.setup_enrichment()
 
     def setup_logging(self):
         """Configure le système de journalisation"""
@@ -35,78 +94,370 @@ class AdvancedNetworkScanner:
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
 
+    def add_event_listener(self, listener):
+        """Abonne listener(type, données) aux événements du scanner"""
+        self.event_listeners.append(listener)
+
+    def emit_event(self, kind, data):
+        for listener in self.event_listeners:
+            try:
+                listener(kind, data)
+            except Exception as e:
+                self.logger.error(f"Erreur abonné aux événements: {str(e)}")
+
+    def publish_device_changes(self, previous, current):
+        """Émet device_joined / device_left / device_changed entre deux listes d'appareils"""
+        if not self.event_listeners:
+            return
+        before = {device.mac: device for device in previous}
+        after = {device.mac: device for device in current}
+        for mac, device in after.items():
+            old = before.get(mac)
+            if old is None:
+                self.emit_event('device_joined', device.to_dict())
+            elif (old.ip, old.hostname, old.vendor) != (device.ip, device.hostname, device.vendor):
+                self.emit_event('device_changed', {**device.to_dict(), 'previous_ip': old.ip})
+        for mac in before.keys() - after.keys():
+            self.emit_event('device_left', before[mac].to_dict())
+
+    def setup_enrichment(self):
+        """Configure les étapes du pipeline d'enrichissement"""
+        self.enrichment = EnrichmentPipeline(max_workers=self.enrichment_workers, logger=self.logger)
+        self.enrichment.add_stage('vendor', self.batch_lookup_vendors, default="Inconnu",
+                                  timeout=self.stage_timeouts['vendor'], batch=True)
+        self.enrichment.add_stage('hostname', self.batch_resolve_hostnames, default=lambda ip, mac: ip,
+                                  timeout=self.stage_timeouts['hostname'], batch=True)
+        self.enrichment.add_stage('ports', self.batch_port_scan, default=lambda ip, mac: [],
+                                  timeout=self.stage_timeouts['ports'], batch=True)
+
+    @metrics.timed('scan')
     def enhanced_arp_scan(self):
         """Scan ARP avec détection d'anomalies"""
         if not is_admin():
             self.logger.warning("Privilèges admin requis pour un scan complet")
+            self.last_scan_failed = True
             return []
 
         try:
-            # Scan ARP standard
-            arp_request = scapy.ARP(pdst=f"{self.current_network['subnet']}/24")
-            broadcast = scapy.Ether(dst="ff:ff:ff:ff:ff:ff")
-            arp_request_broadcast = broadcast/arp_request
-            answered, unanswered = scapy.srp(arp_request_broadcast, timeout=2, verbose=False)
+            targets = self.get_scan_targets()
+            cached = None
+            kept = []
+            
+            # Chemin rapide : table de voisinage + sondes ciblées
+            if self.arp_cache_enabled and time.time() - self.last_full_sweep < self.full_sweep_interval:
+                cached = self.cached_arp_scan(targets)
             
-            # Détection des anomalies
+            # Balayage ARP de chaque interface, découpé en fragments parallèles
+            if cached is None:
+                answered = self.sweep_targets(targets)
+                self.last_full_sweep = time.time()
+            else:
+                answered, kept = cached
+            
+            # Détection des anomalies (associations observées uniquement)
             if self.arp_spoof_detection:
                 self.detect_arp_spoofing(answered)
             
-            return self.process_scan_results(answered)
+            self.last_scan_failed = False
+            devices = self.process_scan_results(answered + kept)
+            metrics.inc('scans', result='success')
+            metrics.inc('devices_processed', len(devices))
+            return devices
             
         except Exception as e:
             self.logger.error(f"Échec du scan ARP: {str(e)}")
+            self.last_scan_failed = True
+            metrics.inc('scans', result='failure')
             return []
 
-    def detect_arp_spoofing(self, answered_packets):
-        """Détecte les tentatives d'empoisonnement ARP"""
-        ip_mac_mapping = {}
+    def cached_arp_scan(self, targets):
+        """Scan via le cache ARP du noyau, retourne (réponses observées, appareils conservés) ou None"""
+        entries = read_neighbour_table()
+        if entries is None:
+            return None
+        
+        now = time.time()
+        in_scope = {ip for _, group in self.group_by_interface(
+                        [entry.ip for entry in entries] + [device.ip for device in self.devices], targets)
+                    for ip in group}
+        
+        answered = []
+        kept = []
+        kept_ips = set()
+        probe_ips = set()
+        fresh = 0
+        for entry in entries:
+            if entry.ip not in in_scope:
+                continue
+            if entry.mac and entry.state in FRESH_STATES:
+                fresh += 1
+            elif not entry.mac or self.scheduler.is_due(entry.mac, now):
+                probe_ips.add(entry.ip)
+                continue
+            answered.append((None, ARPReply(entry.ip, entry.mac)))
+            kept_ips.add(entry.ip)
+        
+        # Appareils courants absents du cache : sondés à échéance seulement
+        for device in self.devices:
+            if device.ip in kept_ips or device.ip in probe_ips or device.ip not in in_scope:
+                continue
+            if self.scheduler.is_due(device.mac, now):
+                probe_ips.add(device.ip)
+            else:
+                kept.append((None, ARPReply(device.ip, device.mac)))
+                kept_ips.add(device.ip)
+        
+        # Appareils vus depuis le dernier balayage complet mais sortis de la
+        # liste courante (les plus anciens attendent le balayage suivant)
+        probe_ips.update(self.known_devices.recent_ips(now - self.full_sweep_interval) - kept_ips)
+        
+        probe_targets = self.group_by_interface(probe_ips, targets)
+        if probe_targets:
+            answered.extend(self.sweep_targets(probe_targets))
+        
+        self.logger.info(f"Cache ARP: {fresh} appareil(s) frais, {len(kept_ips) - fresh} non échu(s), "
+                         f"{sum(len(ips) for _, ips in probe_targets)} sonde(s)")
+        return answered, kept
+
+    def get_scan_targets(self):
+        """Liste les couples (interface, réseau CIDR) à balayer"""
+        networks = self.networks or [self.current_network]
+        targets = []
+        for network_info in networks:
+            if not network_info.get('subnet'):
+                continue
+            network = get_network_cidr(network_info)
+            if network.prefixlen < self.min_scan_prefix:
+                if network not in self.skipped_networks:
+                    self.skipped_networks.add(network)
+                    self.logger.warning(f"Réseau {network} ({network_info.get('interface')}) ignoré : "
+                                        f"plus grand que /{self.min_scan_prefix}")
+                continue
+            for shard in split_network(network, self.shard_prefix):
+                targets.append((network_info.get('interface'), str(shard)))
+        return targets
+
+    def group_by_interface(self, ips, targets=None):
+        """Regroupe des IP par interface de balayage (les IP hors réseau sont ignorées)"""
+        networks = [(interface, ipaddress.ip_network(cidr))
+                    for interface, cidr in (targets or self.get_scan_targets())]
+        groups = {}
+        for ip in ips:
+            address = ipaddress.ip_address(ip)
+            for interface, network in networks:
+                if address in network:
+                    groups.setdefault(interface, set()).add(ip)
+                    break
+        return [(interface, sorted(group)) for interface, group in groups.items()]
+
+    @metrics.timed('arp_sweep')
+    def arp_sweep(self, interface, cidr):
+        """Balaye un fragment de réseau (CIDR ou liste d'IP) et retourne les réponses ARP"""
+        if self.arp_engine == "fast" and hasattr(socket, 'AF_PACKET'):
+            try:
+                return self.fast_arp_sweep(interface, cidr)
+            except OSError as e:
+                self.logger.warning(f"Moteur ARP rapide indisponible, repli sur scapy: {str(e)}")
+        
+        arp_request = scapy.ARP(pdst=cidr)
+        broadcast = scapy.Ether(dst="ff:ff:ff:ff:ff:ff")
+        arp_request_broadcast = broadcast/arp_request
+        options = {'iface': interface} if interface else {}
+        answered, unanswered = scapy.srp(arp_request_broadcast, timeout=self.arp_timeout, verbose=False, **options)
+        return list(answered)
+
+    def fast_arp_sweep(self, interface, cidr):
+        """Balayage via socket AF_PACKET brute"""
+        network_info = next((network for network in self.networks if network.get('interface') == interface),
+                            self.current_network)
+        interface = interface or network_info.get('interface')
+        if not interface or not network_info.get('ip'):
+            # Levée en OSError pour le repli de arp_sweep sur scapy
+            raise OSError(f"Adresse IPv4 inconnue pour l'interface {interface}")
+        engine = RawARPEngine(interface, network_info['ip'], timeout=self.arp_timeout)
+        return engine.sweep(cidr)
+
+    def sweep_targets(self, targets):
+        """Balaye plusieurs fragments en parallèle et fusionne les réponses
+
+        Les fragments en échec sont journalisés ; si tous échouent, la
+        dernière erreur est levée pour que le scan soit marqué en échec.
+        """
+        if len(targets) <= 1:
+            return [pair for interface, cidr in targets for pair in self.arp_sweep(interface, cidr)]
+        
+        answered = []
+        error = None
+        workers = min(self.max_parallel_sweeps, len(targets))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='arp_sweep') as executor:
+            futures = [executor.submit(self.arp_sweep, interface, cidr) for interface, cidr in targets]
+            succeeded = 0
+            for (interface, cidr), future in zip(targets, futures):
+                try:
+                    answered.extend(future.result())
+                    succeeded += 1
+                except Exception as e:
+                    self.logger.error(f"Échec du balayage {cidr} sur {interface}: {str(e)}")
+                    error = e
+        if not succeeded:
+            raise error
+        return answered
+
+    def stream_scan(self):
+        """Variante en flux de enhanced_arp_scan : produit chaque Device enrichi puis ScanComplete"""
+        start = time.time()
+        if not is_admin():
+            self.logger.warning("Privilèges admin requis pour un scan complet")
+            raise PermissionError("Privilèges admin requis pour un scan complet")
+        
+        targets = self.get_scan_targets()
+        events = Queue()
+        seen = set()
+        
+        def on_packet(packet):
+            if not packet.haslayer(scapy.ARP) or packet[scapy.ARP].op != 2:
+                return
+            arp = packet[scapy.ARP]
+            if (arp.psrc, arp.hwsrc) not in seen:
+                seen.add((arp.psrc, arp.hwsrc))
+                events.put(('reply', (None, ARPReply(arp.psrc, arp.hwsrc))))
+        
+        interfaces = sorted({interface for interface, _ in targets if interface})
+        try:
+            sniffer = start_arp_sniffer(on_packet, interfaces)
+        except OSError as e:
+            # Pas d'écoute possible : balayage srp classique, résultats en fin de scan
+            self.logger.warning(f"Scan en flux indisponible, repli sur un balayage complet: {str(e)}")
+            answered = self.sweep_targets(targets)
+            if self.arp_spoof_detection:
+                self.detect_arp_spoofing(answered)
+            devices = self.process_scan_results(answered)
+            yield from devices
+            yield ScanComplete(len(devices), time.time() - start)
+            return
+        
+        def stop_sniffer():
+            if sniffer.running:
+                try:
+                    sniffer.stop()
+                except Exception as e:
+                    self.logger.warning(f"Arrêt du sniffer ARP: {str(e)}")
+        
+        def send_requests():
+            error = None
+            try:
+                for interface, cidr in targets:
+                    request = scapy.Ether(dst="ff:ff:ff:ff:ff:ff")/scapy.ARP(pdst=cidr)
+                    scapy.sendp(request, verbose=False, **({'iface': interface} if interface else {}))
+                time.sleep(self.arp_timeout)
+            except Exception as e:
+                self.logger.error(f"Échec du scan ARP en flux: {str(e)}")
+                error = e
+            finally:
+                events.put(('sweep_done', error))
+        
+        Thread(target=send_requests, daemon=True).start()
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stream')
+        count = 0
+        batch = []
+        enriching = False
+        sweeping = True
+        sweep_error = None
+        
+        try:
+            while sweeping or enriching or batch:
+                kind, value = events.get()
+                if kind == 'reply':
+                    if self.arp_spoof_detection:
+                        self.detect_arp_spoofing([value])
+                    batch.append(value)
+                elif kind == 'enriched':
+                    enriching = False
+                    try:
+                        devices = value.result()
+                    except Exception as e:
+                        self.logger.error(f"Erreur traitement appareil: {str(e)}")
+                        devices = []
+                    for device in devices:
+                        count += 1
+                        yield device
+                else:
+                    sweeping = False
+                    sweep_error = value
+                    stop_sniffer()
+                
+                if batch and not enriching:
+                    enriching = True
+                    future = executor.submit(self.process_scan_results, batch)
+                    future.add_done_callback(lambda f: events.put(('enriched', f)))
+                    batch = []
+        finally:
+            stop_sniffer()
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Appareils déjà produits conservés, mais le scan n'est pas complet
+        if sweep_error is not None:
+            raise sweep_error
+        yield ScanComplete(count, time.time() - start)
+
+    @metrics.timed('arp_spoof_detection')
+    def detect_arp_spoofing(self, answered_packets, now=None):
+        """Détecte les tentatives d'empoisonnement ARP (now : horodatage des réponses, ex: capture)"""
         for packet in answered_packets:
-            ip = packet[1].psrc
-            mac = packet[1].hwsrc
-            
-            if ip in ip_mac_mapping and ip_mac_mapping[ip] != mac:
-                self.logger.warning(f"Possible ARP spoofing détecté - IP: {ip} avec plusieurs MAC: {mac} et {ip_mac_mapping[ip]}")
-                if self.firewall:
-                    self.firewall.block_device(ip, mac)
-            
-            ip_mac_mapping[ip] = mac
+            event = self.arp_bindings.observe(packet[1].psrc, packet[1].hwsrc, now)
+            if event:
+                self.handle_binding_event(event)
 
+    def handle_binding_event(self, event):
+        """Journalise un conflit IP/MAC et bloque l'usurpateur une seule fois"""
+        if event.kind == 'flap':
+            self.logger.warning(f"Instabilité ARP - IP: {event.ip} a changé {event.changes} fois de MAC "
+                                f"en {self.arp_bindings.window}s (actuelle: {event.mac})")
+        else:
+            self.logger.warning(f"Possible ARP spoofing détecté - IP: {event.ip} avec plusieurs MAC: "
+                                f"{event.mac} et {event.previous_mac}")
+        
+        self.scheduler.mark_suspicious(event.mac)
+        self.emit_event('alert', {'kind': event.kind, 'ip': event.ip, 'mac': event.mac,
+                                  'previous_mac': event.previous_mac, 'changes': event.changes})
+        
+        # Ne jamais bloquer le propriétaire établi de l'IP (ex: la passerelle)
+        if event.mac == event.owner_mac:
+            return
+        if self.firewall and self.arp_bindings.mark_blocked(event.ip, event.mac):
+            self.firewall.block_device(event.ip, event.mac)
+            self.emit_event('device_blocked', {'ip': event.ip, 'mac': event.mac, 'reason': 'arp_spoofing'})
+
+    @metrics.timed('process_scan_results')
     def process_scan_results(self, answered_packets):
         """Traite les résultats du scan et effectue des vérifications supplémentaires"""
         new_devices = []
         current_time = time.strftime('%Y-%m-%d %H:%M:%S')
         
+        hosts = []
         for packet in answered_packets:
             try:
-                ip = packet[1].psrc
-                mac = packet[1].hwsrc
-                
-                # Vérification du fabricant
-                try:
-                    vendor = self.mac_lookup.lookup(mac)
-                except:
-                    vendor = "Inconnu"
-                
-                # Résolution du nom d'hôte
-                try:
-                    hostname = socket.gethostbyaddr(ip)[0]
-                except:
-                    hostname = ip
-                
-                # Scan de ports optionnel
-                open_ports = []
-                if self.port_scan_enabled:
-                    open_ports = self.quick_port_scan(ip)
-                
+                hosts.append((packet[1].psrc, packet[1].hwsrc))
+            except Exception as e:
+                self.logger.error(f"Erreur traitement appareil: {str(e)}")
+        
+        # Enrichissement parallèle : fabricant, nom d'hôte et ports optionnels
+        stages = ['vendor']
+        if self.hostname_lookup_enabled:
+            stages.append('hostname')
+        if self.port_scan_enabled:
+            stages.append('ports')
+        
+        for (ip, mac), info in self.enrichment.run(hosts, stages):
+            try:
                 device = Device(
                     ip=ip,
                     mac=mac,
-                    vendor=vendor,
-                    hostname=hostname,
+                    vendor=info['vendor'],
+                    hostname=info.get('hostname', ip),
                     first_seen=current_time if mac not in self.known_devices else self.known_devices[mac].get('first_seen', current_time),
                     last_seen=current_time,
-                    open_ports=open_ports
+                    open_ports=info.get('ports', [])
                 )
                 
                 new_devices.append(device)
@@ -117,54 +468,210 @@ class AdvancedNetworkScanner:
         
         return new_devices
 
+    def lookup_vendor(self, ip, mac):
+        """Résout le fabricant à partir de l'adresse MAC"""
+        if self.oui_index is not None:
+            return self.oui_index.lookup(mac) or "Inconnu"
+        try:
+            return self.mac_lookup.lookup(mac)
+        except Exception:
+            return "Inconnu"
+
+    @metrics.timed('vendor')
+    def batch_lookup_vendors(self, hosts):
+        """Résout les fabricants d'un résultat de scan complet via l'index OUI"""
+        if self.oui_index is None:
+            return [self.lookup_vendor(ip, mac) for ip, mac in hosts]
+        return self.oui_index.lookup_many([mac for ip, mac in hosts], default="Inconnu")
+
+    @metrics.timed('dns')
+    def batch_resolve_hostnames(self, hosts):
+        """Résout les noms d'hôte de plusieurs appareils via le cache DNS"""
+        hostnames = self.hostname_resolver.resolve_many([ip for ip, mac in hosts])
+        return [hostnames[ip] for ip, mac in hosts]
+
     def quick_port_scan(self, ip, timeout=1):
         """Effectue un scan rapide des ports communs"""
-        open_ports = []
-        for port in self.common_ports:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            result = sock.connect_ex((ip, port))
-            if result == 0:
-                open_ports.append(port)
-            sock.close()
-        return open_ports
+        return self.port_scanner.scan([ip], self.common_ports, timeout)[ip]
+
+    @metrics.timed('ports')
+    def batch_port_scan(self, hosts):
+        """Scanne les ports communs de plusieurs hôtes en une seule passe asynchrone"""
+        ips = [ip for ip, mac in hosts]
+        # Échéance interne avant celle de l'étape : les connexions sont annulées
+        # et les ports déjà trouvés conservés, au lieu d'un scan orphelin
+        deadline = max(1, self.stage_timeouts['ports'] - 1)
+        open_ports = self.port_scanner.scan(set(ips), self.common_ports, deadline=deadline)
+        return [open_ports[ip] for ip in ips]
 
+    @metrics.timed('history')
     def update_device_history(self, device):
         """Met à jour l'historique des appareils"""
-        if device.mac not in self.known_devices:
-            self.known_devices[device.mac] = {
-                'first_seen': device.first_seen,
-                'connection_count': 0,
-                'last_ports': []
-            }
-        
-        self.known_devices[device.mac]['connection_count'] += 1
-        self.known_devices[device.mac]['last_seen'] = device.last_seen
-        if hasattr(device, 'open_ports'):
-            self.known_devices[device.mac]['last_ports'] = device.open_ports
+        self.known_devices.record(device)
 
     def start_continuous_monitoring(self, callback):
         """Lance une surveillance continue avec analyse comportementale"""
-        def monitoring_loop():
-            while not self.scanning_event.is_set():
-                start_time = time.time()
-                
+        self.prepare_monitoring()
+        if self.passive_mode:
+            return self.start_passive_monitoring(callback)
+        
+        self.scan_thread = Thread(target=self.active_monitoring_loop, args=(callback,), daemon=True)
+        self.scanning_event.clear()
+        self.scan_thread.start()
+
+    def prepare_monitoring(self):
+        """Attend la fin d'une surveillance précédente et recrée le pipeline d'enrichissement"""
+        if self.scan_thread is not None:
+            # La boucle précédente sort à la fin de son itération en cours
+            self.scanning_event.set()
+            self.scheduler.wake()
+            self.scan_thread.join()
+            self.scan_thread = None
+            self.enrichment.shutdown()
+        self.setup_enrichment()
+
+    def active_monitoring_loop(self, callback):
+        """Boucle de surveillance active : balayages complets et re-sondages planifiés"""
+        while not self.scanning_event.is_set():
+            self.scheduler.full_scan_interval = self.update_interval
+            
+            if self.scheduler.full_scan_due():
                 devices = self.enhanced_arp_scan()
+                self.scheduler.record_scan(success=not self.last_scan_failed)
+                previous = self.devices
+                if self.last_scan_failed:
+                    # Scan en échec : on garde la liste précédente plutôt que de tout déclarer parti
+                    changed = False
+                else:
+                    self.schedule_devices(devices)
+                    for mac in set(self.scheduler.states) - {device.mac for device in devices}:
+                        self.scheduler.forget(mac)
+                    self.devices = devices
+                    changed = True
+            else:
+                # Re-sondage ciblé des appareils nouveaux ou suspects
+                due = self.scheduler.due_hosts()
+                previous = self.devices
+                try:
+                    changed = bool(due) and self.reprobe_devices(due)
+                except Exception as e:
+                    # Re-sondage en échec : liste conservée, balayage complet différé
+                    self.logger.error(f"Échec du re-sondage ciblé: {str(e)}")
+                    self.scheduler.record_scan(success=False)
+                    changed = False
+            
+            if changed:
+                self.publish_device_changes(previous, self.devices)
                 if callback:
-                    callback(devices)
+                    with metrics.timer('callback'):
+                        callback(self.devices)
                 
                 # Analyse comportementale
-                self.behavioral_analysis(devices)
+                self.behavioral_analysis(self.devices)
+            
+            # Attente interruptible jusqu'à la prochaine échéance
+            self.scheduler.wait(self.scheduler.next_delay())
+
+    def schedule_devices(self, devices):
+        """Planifie le prochain sondage de chaque appareil selon son ancienneté"""
+        for device in devices:
+            history = self.known_devices.get(device.mac, {})
+            new = history.get('connection_count', 0) <= 1
+            suspicious = new and bool(getattr(device, 'open_ports', None))
+            self.scheduler.observe(device.mac, device.ip, new=new, suspicious=suspicious)
+
+    def reprobe_devices(self, due):
+        """Sonde une liste de couples (mac, ip), retourne True si la liste d'appareils change"""
+        answered = self.sweep_targets(self.group_by_interface({ip for mac, ip in due}))
+        if self.arp_spoof_detection:
+            self.detect_arp_spoofing(answered)
+        devices = self.process_scan_results(answered)
+        self.schedule_devices(devices)
+        
+        current = {device.mac: device for device in self.devices}
+        changed = False
+        for device in devices:
+            previous = current.get(device.mac)
+            changed = changed or previous is None or previous.ip != device.ip
+            current[device.mac] = device
+        
+        responded = {device.mac for device in devices}
+        for mac, ip in due:
+            if mac not in responded and self.scheduler.record_miss(mac):
+                changed = changed or current.pop(mac, None) is not None
+        
+        self.devices = sorted(current.values(), key=lambda device: EnrichmentPipeline.sort_key((device.ip, device.mac)))
+        return changed
+
+    def start_passive_monitoring(self, callback):
+        """Surveillance passive : le callback n'est appelé que sur changement"""
+        replies = Queue()
+        interfaces = [network['interface'] for network in self.networks if network.get('interface')]
+        self.passive_monitor = PassiveARPMonitor(lambda ip, mac: replies.put((ip, mac)), interfaces or None)
+        
+        def monitoring_loop():
+            try:
+                self.passive_monitor.start()
+            except OSError as e:
+                # Écoute impossible (ex: libpcap ou privilèges absents) : surveillance active
+                self.logger.error(f"Surveillance passive indisponible, repli sur les scans actifs: {str(e)}")
+                self.passive_monitor = None
+                self.active_monitoring_loop(callback)
+                return
+            next_sweep = 0
+            previous = []
+            
+            while not self.scanning_event.is_set():
+                if time.time() >= next_sweep:
+                    # Balayage actif occasionnel pour réconcilier la table
+                    sweep_start = time.time()
+                    devices = self.enhanced_arp_scan()
+                    # Un balayage en échec ne doit pas vider la table
+                    changed = not self.last_scan_failed and self.device_table.reconcile(devices, sweep_start)
+                    next_sweep = time.time() + self.reconciliation_interval
+                else:
+                    try:
+                        observed = [replies.get(timeout=max(0.01, min(1, next_sweep - time.time())))]
+                    except Empty:
+                        continue
+                    while not replies.empty():
+                        observed.append(replies.get_nowait())
+                    changed = self.handle_passive_replies(observed)
                 
-                # Ajustement dynamique de l'intervalle
-                scan_duration = time.time() - start_time
-                adjusted_interval = max(5, self.update_interval - scan_duration)
-                time.sleep(adjusted_interval)
+                if changed:
+                    devices = self.device_table.snapshot()
+                    self.publish_device_changes(previous, devices)
+                    previous = devices
+                    if callback:
+                        with metrics.timer('callback'):
+                            callback(devices)
+                    self.behavioral_analysis(devices)
+            
+            self.passive_monitor.stop()
         
         self.scan_thread = Thread(target=monitoring_loop, daemon=True)
         self.scanning_event.clear()
         self.scan_thread.start()
 
+    def handle_passive_replies(self, observed):
+        """Intègre des couples (ip, mac) entendus passivement, retourne True si la table change"""
+        if self.arp_spoof_detection:
+            self.detect_arp_spoofing([(None, ARPReply(ip, mac)) for ip, mac in observed])
+        
+        pending = {}
+        for ip, mac in observed:
+            if self.device_table.is_current(ip, mac):
+                self.device_table.touch(mac)
+            else:
+                pending[(ip, mac)] = (None, ARPReply(ip, mac))
+        
+        if not pending:
+            return False
+        
+        devices = self.process_scan_results(list(pending.values()))
+        return bool(self.device_table.update(devices))
+
+    @metrics.timed('behavioral_analysis')
     def behavioral_analysis(self, current_devices):
         """Analyse le comportement des appareils pour détecter des anomalies"""
         current_macs = {device.mac for device in current_devices}
@@ -185,6 +692,13 @@ class AdvancedNetworkScanner:
     def stop_monitoring(self):
         """Arrête la surveillance continue"""
         self.scanning_event.set()
+        self.scheduler.wake()
         if self.scan_thread:
             self.scan_thread.join(timeout=5)
-            self.scan_thread = None
\ No newline at end of file
+            if self.scan_thread.is_alive():
+                # Scan en cours : le pipeline reste actif jusqu'à la sortie de la boucle
+                self.logger.warning("Arrêt de la surveillance différé : scan en cours")
+                return
+            self.scan_thread = None
+        self.enrichment.shutdown()
+        self.logger.info(f"Cache DNS: {self.hostname_resolver.stats()}")
\ No newline at end of file
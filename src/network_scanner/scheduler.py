@@ -0,0 +1,158 @@
+import heapq
+import random
+import time
+from threading import Event, Lock
+
+
+class ProbeState:
+    """État de planification d'un appareil"""
+
+    __slots__ = ('ip', 'interval', 'next_due', 'misses', 'generation')
+
+    def __init__(self, ip, interval, next_due):
+        self.ip = ip
+        self.interval = interval
+        self.next_due = next_due
+        self.misses = 0
+        self.generation = 0
+
+
+class ScanScheduler:
+    """Planificateur adaptatif : re-sondage rapide des appareils nouveaux ou
+    suspects, espacé pour les appareils stables, avec gigue et backoff"""
+
+    def __init__(self, full_scan_interval=60, min_interval=5, max_interval=900,
+                 jitter=0.1, max_backoff=900, max_misses=3):
+        self.full_scan_interval = full_scan_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.max_misses = max_misses
+
+        self.states = {}  # mac -> ProbeState
+        self.queue = []   # tas de (échéance, mac, génération)
+        self.failures = 0
+        self.next_full_scan = 0
+        self.lock = Lock()
+        self.wake_event = Event()
+
+    def _jittered(self, interval):
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _push(self, mac, state, interval, now):
+        state.interval = interval
+        state.next_due = now + self._jittered(interval)
+        state.generation += 1
+        heapq.heappush(self.queue, (state.next_due, mac, state.generation))
+
+    def observe(self, mac, ip, new=False, suspicious=False, now=None):
+        """Enregistre une réponse et replanifie le prochain sondage de l'appareil
+
+        Un appareil stable vu avant son échéance garde sa planification :
+        son intervalle ne s'allonge qu'à chaque sondage échu confirmé.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.states.get(mac)
+            if state is None:
+                state = self.states[mac] = ProbeState(ip, self.min_interval, now)
+            moved = state.ip != ip
+            state.ip = ip
+            state.misses = 0
+
+            if new or suspicious or moved:
+                interval = self.min_interval
+            elif state.next_due > now:
+                return
+            else:
+                interval = min(state.interval * 2, self.max_interval)
+            self._push(mac, state, interval, now)
+
+    def is_due(self, mac, now=None):
+        """True si l'appareil est inconnu ou si son sondage est échu"""
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.states.get(mac)
+            return state is None or state.next_due <= now
+
+    def mark_suspicious(self, mac, now=None):
+        """Avance le prochain sondage d'un appareil suspect"""
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.states.get(mac)
+            if state is not None:
+                self._push(mac, state, self.min_interval, now)
+
+    def record_miss(self, mac, now=None):
+        """Appareil muet : re-sondage rapide, puis abandon après max_misses
+
+        Retourne True si l'appareil est considéré comme parti.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.states.get(mac)
+            if state is None:
+                return True
+            state.misses += 1
+            if state.misses >= self.max_misses:
+                del self.states[mac]
+                return True
+            self._push(mac, state, self.min_interval, now)
+            return False
+
+    def forget(self, mac):
+        with self.lock:
+            self.states.pop(mac, None)
+
+    def due_hosts(self, now=None):
+        """Retourne les couples (mac, ip) dont le sondage est échu"""
+        now = time.time() if now is None else now
+        due = []
+        with self.lock:
+            while self.queue and self.queue[0][0] <= now:
+                _, mac, generation = heapq.heappop(self.queue)
+                state = self.states.get(mac)
+                if state is not None and state.generation == generation:
+                    due.append((mac, state.ip))
+        return due
+
+    def full_scan_due(self, now=None):
+        return (time.time() if now is None else now) >= self.next_full_scan
+
+    def record_scan(self, success, now=None):
+        """Planifie le prochain balayage complet (backoff exponentiel en cas d'échec)"""
+        now = time.time() if now is None else now
+        if success:
+            self.failures = 0
+            interval = self.full_scan_interval
+        else:
+            self.failures += 1
+            interval = min(self.full_scan_interval * 2 ** self.failures, self.max_backoff)
+        self.next_full_scan = now + self._jittered(interval)
+
+    def next_delay(self, now=None):
+        """Délai avant la prochaine échéance (balayage complet ou sondage)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            # Purge des entrées obsolètes en tête de tas
+            while self.queue and not self._is_current(self.queue[0]):
+                heapq.heappop(self.queue)
+            next_probe = self.queue[0][0] if self.queue else self.next_full_scan
+        return max(0, min(self.next_full_scan, next_probe) - now)
+
+    def _is_current(self, entry):
+        _, mac, generation = entry
+        state = self.states.get(mac)
+        return state is not None and state.generation == generation
+
+    def wait(self, timeout):
+        """Attend la prochaine échéance ; retourne True si réveillé explicitement"""
+        woken = self.wake_event.wait(timeout)
+        self.wake_event.clear()
+        return woken
+
+    def wake(self):
+        """Réveille immédiatement la boucle (ex: arrêt)"""
+        self.wake_event.set()
+
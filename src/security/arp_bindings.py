@@ -0,0 +1,90 @@
+import time
+from collections import deque, namedtuple
+from threading import Lock
+
+BindingEvent = namedtuple('BindingEvent', ['kind', 'ip', 'previous_mac', 'mac', 'owner_mac', 'changes'])
+
+
+class Binding:
+    """Association IP -> MAC avec l'historique récent de ses changements"""
+
+    __slots__ = ('mac', 'owner', 'last_seen', 'stable_since', 'changes')
+
+    def __init__(self, mac, now, history_size):
+        self.mac = mac
+        self.owner = mac
+        self.last_seen = now
+        self.stable_since = now
+        self.changes = deque(maxlen=history_size)  # (horodatage, ancienne MAC, nouvelle MAC)
+
+
+class ARPBindingTable:
+    """Table persistante des associations IP -> MAC pour la détection d'ARP spoofing
+
+    Un changement de MAC pour une IP encore active dans la fenêtre est un
+    conflit ; au-delà de flap_threshold changements dans la fenêtre, c'est
+    une instabilité (flapping). Une IP muette depuis plus d'une fenêtre peut
+    être réattribuée sans alerte (bail DHCP).
+    """
+
+    def __init__(self, window=600, flap_threshold=3, history_size=32):
+        self.window = window
+        self.flap_threshold = flap_threshold
+        self.history_size = history_size
+        self.bindings = {}  # ip -> Binding
+        self.blocked = set()
+        self.lock = Lock()
+
+    def observe(self, ip, mac, now=None):
+        """Intègre une réponse ARP, retourne un BindingEvent ou None"""
+        now = time.time() if now is None else now
+        mac = mac.lower()
+        with self.lock:
+            binding = self.bindings.get(ip)
+            if binding is None:
+                self.bindings[ip] = Binding(mac, now, self.history_size)
+                return None
+
+            if binding.mac == mac:
+                binding.last_seen = now
+                if now - binding.stable_since >= self.window:
+                    binding.owner = mac
+                return None
+
+            previous = binding.mac
+            expired = now - binding.last_seen > self.window
+            binding.changes.append((now, previous, mac))
+            binding.mac = mac
+            binding.last_seen = now
+            binding.stable_since = now
+
+            if expired:
+                # Réattribution d'une IP inactive : nouveau propriétaire légitime
+                binding.owner = mac
+                return None
+
+            while binding.changes and now - binding.changes[0][0] > self.window:
+                binding.changes.popleft()
+            recent = len(binding.changes)
+            kind = 'flap' if recent >= self.flap_threshold else 'conflict'
+            return BindingEvent(kind, ip, previous, mac, binding.owner, recent)
+
+    def get(self, ip):
+        """Retourne la MAC actuellement associée à une IP"""
+        binding = self.bindings.get(ip)
+        return binding.mac if binding else None
+
+    def history(self, ip):
+        """Historique des changements de MAC d'une IP"""
+        with self.lock:
+            binding = self.bindings.get(ip)
+            return list(binding.changes) if binding else []
+
+    def mark_blocked(self, ip, mac):
+        """Enregistre un blocage, retourne False s'il a déjà été fait pour ce conflit"""
+        with self.lock:
+            key = (ip, mac.lower())
+            if key in self.blocked:
+                return False
+            self.blocked.add(key)
+            return True
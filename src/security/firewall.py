@@ -1,9 +1,27 @@
 import subprocess
 import platform
 import os
+import time
 import logging
+import functools
 from datetime import datetime
-from threading import Lock
+from threading import Lock, Thread
+from src.utils.metrics import metrics
+
+def instrumented(action):
+    """Mesure la durée d'une opération du pare-feu et compte ses succès / échecs"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = False
+            try:
+                with metrics.timer('firewall'):
+                    result = func(*args, **kwargs)
+                return result
+            finally:
+                metrics.inc('firewall_calls', action=action, result='failure' if result is False else 'success')
+        return wrapper
+    return decorator
 
 class AdvancedFirewallManager:
     def __init__(self):
@@ -22,6 +40,7 @@ class AdvancedFirewallManager:
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
 
+    @instrumented('block')
     def block_device(self, ip_address, mac_address=None, permanent=True):
         """Bloque un appareil avec différentes méthodes"""
         with self.rules_lock:
@@ -46,6 +65,30 @@ class AdvancedFirewallManager:
                 self.logger.error(f"Échec du blocage: {str(e)}")
                 return False
 
+    @instrumented('unblock')
+    def unblock_device(self, ip_address, mac_address=None):
+        """Supprime les règles de blocage d'un appareil"""
+        with self.rules_lock:
+            try:
+                if self.os_type == "Linux":
+                    subprocess.run(["sudo", "iptables", "-D", "INPUT", "-s", ip_address, "-j", "DROP"], check=True)
+                    subprocess.run(["sudo", "iptables", "-D", "OUTPUT", "-d", ip_address, "-j", "DROP"], check=True)
+                    if mac_address:
+                        subprocess.run(["sudo", "iptables", "-D", "INPUT", "-m", "mac", "--mac-source",
+                                        mac_address, "-j", "DROP"], check=True)
+                elif self.os_type == "Windows":
+                    subprocess.run(["netsh", "advfirewall", "firewall", "delete", "rule",
+                                    f"name=Block_{ip_address}"], check=True)
+                elif self.os_type == "Darwin":  # macOS
+                    subprocess.run(["sudo", "pfctl", "-t", "blocked", "-T", "delete", ip_address], check=True)
+                
+                self.logger.info(f"Appareil débloqué - IP: {ip_address}, MAC: {mac_address}")
+                return True
+                
+            except Exception as e:
+                self.logger.error(f"Échec du déblocage: {str(e)}")
+                return False
+
     def _block_by_ip(self, ip_address):
         """Implémentation spécifique au système d'exploitation pour bloquer par IP"""
         if self.os_type == "Linux":
@@ -131,15 +174,18 @@ class AdvancedFirewallManager:
             with open(backup_file, "w") as f:
                 subprocess.run(["netsh", "advfirewall", "firewall", "show", "rule", "name=all"], stdout=f)
 
+    @instrumented('restore')
     def restore_rules(self):
-        """Restaure les règles à partir de la sauvegarde"""
+        """Restaure les règles à partir de la sauvegarde, retourne False en cas d'échec"""
         if self.os_type == "Linux":
             latest_backup = self._get_latest_backup()
             if latest_backup:
-                subprocess.run(["iptables-restore", "<", latest_backup], shell=True)
+                with open(latest_backup) as f:
+                    return subprocess.run(["iptables-restore"], stdin=f).returncode == 0
                 
         elif self.os_type == "Windows":
             self.logger.info("La restauration sous Windows nécessite une reconfiguration manuelle")
+        return True
 
     def _get_latest_backup(self):
         """Trouve la dernière sauvegarde disponible"""
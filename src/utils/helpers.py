@@ -1,4 +1,6 @@
+import os
 import socket
+import ipaddress
 import psutil
 import platform
 import subprocess
@@ -6,23 +8,65 @@ from datetime import datetime
 
 def get_network_info():
     """Obtient les informations sur le réseau actuel"""
+    networks = get_all_network_info()
+    return networks[0] if networks else {}
+
+def get_all_network_info():
+    """Liste les interfaces IPv4 actives à diffusion (broadcast) avec leur réseau réel (CIDR)"""
     interfaces = psutil.net_if_addrs()
-    gateway = psutil.net_if_stats().items()
+    gateway = get_default_gateway()
+    networks = []
+    
+    # psutil ne renseigne pas broadcast sous Windows
+    broadcast_known = platform.system() != "Windows"
     
-    for interface, stats in gateway:
-        if stats.isup:
-            for addr in interfaces[interface]:
-                if addr.family == socket.AF_INET:
-                    ip_parts = addr.address.split('.')
-                    subnet = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}.0"
-                    return {
-                        'interface': interface,
-                        'ip': addr.address,
-                        'netmask': addr.netmask,
-                        'subnet': subnet,
-                        'gateway': get_default_gateway()
-                    }
-    return {}
+    for interface, stats in psutil.net_if_stats().items():
+        if not stats.isup:
+            continue
+        for addr in interfaces.get(interface, []):
+            if addr.family != socket.AF_INET or not addr.netmask:
+                continue
+            # Liaisons point à point (tun, ppp, VPN) : ARP sans objet
+            if addr.ptp or (broadcast_known and not addr.broadcast):
+                continue
+            network = ipaddress.IPv4Interface(f"{addr.address}/{addr.netmask}").network
+            if network.is_loopback or network.is_link_local:
+                continue
+            networks.append({
+                'interface': interface,
+                'ip': addr.address,
+                'netmask': addr.netmask,
+                'subnet': str(network.network_address),
+                'network': str(network),
+                'gateway': gateway
+            })
+    return networks
+
+def get_local_addresses():
+    """Retourne (adresses IPv4, adresses MAC) de toutes les interfaces locales"""
+    ips, macs = set(), set()
+    for addrs in psutil.net_if_addrs().values():
+        for addr in addrs:
+            if addr.family == socket.AF_INET:
+                ips.add(addr.address)
+            elif addr.family == psutil.AF_LINK and addr.address:
+                macs.add(addr.address.lower().replace('-', ':'))
+    macs.discard("00:00:00:00:00:00")
+    return ips, macs
+
+def get_network_cidr(network_info):
+    """Retourne le réseau CIDR d'une interface (repli sur /24 sans masque)"""
+    if network_info.get('network'):
+        return ipaddress.IPv4Network(network_info['network'])
+    if network_info.get('netmask'):
+        return ipaddress.IPv4Network(f"{network_info['subnet']}/{network_info['netmask']}", strict=False)
+    return ipaddress.IPv4Network(f"{network_info['subnet']}/24", strict=False)
+
+def split_network(network, shard_prefix=24):
+    """Découpe un réseau en sous-réseaux de taille shard_prefix au plus"""
+    if network.prefixlen >= shard_prefix:
+        return [network]
+    return list(network.subnets(new_prefix=shard_prefix))
 
 def get_default_gateway():
     """Obtient la passerelle par défaut"""
@@ -0,0 +1,176 @@
+import functools
+import os
+import time
+from bisect import bisect_left
+from threading import Lock
+
+METRIC_PREFIX = "wifi_monitor"
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """Histogramme cumulatif au format Prometheus"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self.lock = Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in items) + "}"
+
+
+class MetricsRegistry:
+    """Registre de métriques en mémoire ; quasi sans coût lorsqu'il est désactivé"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}  # nom -> {labels: Histogram}
+        self.counters = {}    # nom -> {labels: Counter}
+        self.help = {}
+        self.lock = Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def histogram(self, name, description="", **labels):
+        key = _label_key(labels)
+        series = self.histograms.get(name)
+        if series is None or key not in series:
+            with self.lock:
+                series = self.histograms.setdefault(name, {})
+                series.setdefault(key, Histogram())
+                self.help.setdefault(name, description)
+        return series[key]
+
+    def counter(self, name, description="", **labels):
+        key = _label_key(labels)
+        series = self.counters.get(name)
+        if series is None or key not in series:
+            with self.lock:
+                series = self.counters.setdefault(name, {})
+                series.setdefault(key, Counter())
+                self.help.setdefault(name, description)
+        return series[key]
+
+    def timer(self, stage):
+        """Chronomètre une étape : `with metrics.timer('dns'): ...`"""
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self.histogram("stage_duration_seconds", "Durée des étapes", stage=stage))
+
+    def timed(self, stage):
+        """Décorateur équivalent à timer()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def inc(self, name, amount=1, **labels):
+        """Incrémente un compteur"""
+        if self.enabled:
+            self.counter(name, **labels).inc(amount)
+
+    def render_prometheus(self):
+        """Exporte toutes les métriques au format texte Prometheus"""
+        lines = []
+        with self.lock:
+            histograms = {name: dict(series) for name, series in self.histograms.items()}
+            counters = {name: dict(series) for name, series in self.counters.items()}
+
+        for name, series in sorted(histograms.items()):
+            metric = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {self.help.get(name, '')}")
+            lines.append(f"# TYPE {metric} histogram")
+            for key, histogram in sorted(series.items()):
+                with histogram.lock:
+                    counts, total, count = list(histogram.counts), histogram.sum, histogram.count
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{metric}_bucket{_format_labels(key, {'le': le})} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(key)} {total}")
+                lines.append(f"{metric}_count{_format_labels(key)} {count}")
+
+        for name, series in sorted(counters.items()):
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# HELP {metric} {self.help.get(name, '')}")
+            lines.append(f"# TYPE {metric} counter")
+            for key, counter in sorted(series.items()):
+                lines.append(f"{metric}{_format_labels(key)} {counter.value}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+# Registre global, activé par le serveur API ou WIFI_MONITOR_METRICS=1
+metrics = MetricsRegistry(enabled=os.environ.get("WIFI_MONITOR_METRICS") == "1")
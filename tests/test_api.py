@@ -0,0 +1,250 @@
+import unittest
+import asyncio
+import importlib.util
+import time
+import json
+from threading import Event, Thread
+from unittest.mock import MagicMock, patch
+from src.api.async_db import AsyncDatabase
+from src.api.scan_jobs import ScanJobManager
+from src.api.events import EventBroker, SlowConsumer
+from src.network_scanner.device import Device, ScanComplete
+
+class TestAsyncDatabase(unittest.TestCase):
+    def test_calls_run_off_the_event_loop(self):
+        db = MagicMock()
+        db.get_device.side_effect = lambda mac: time.sleep(0.2) or {'mac': mac}
+        async_db = AsyncDatabase(db, max_workers=4)
+        
+        async def main():
+            start = time.perf_counter()
+            results = await asyncio.gather(*(async_db.get_device(f"mac{i}") for i in range(4)))
+            return results, time.perf_counter() - start
+        
+        results, elapsed = asyncio.run(main())
+        async_db.shutdown()
+        
+        self.assertEqual([r['mac'] for r in results], ["mac0", "mac1", "mac2", "mac3"])
+        self.assertLess(elapsed, 0.6)
+
+
+class TestScanJobManager(unittest.TestCase):
+    def setUp(self):
+        self.release = Event()
+        self.sweeps = 0
+        
+        def stream_scan():
+            self.sweeps += 1
+            yield Device("192.168.1.1", "00:11:22:33:44:55", "Fabricant", "routeur")
+            self.release.wait(5)
+            yield Device("192.168.1.2", "00:11:22:33:44:66", "Fabricant", "pc")
+            yield ScanComplete(2, 0.1)
+        
+        self.scanner = MagicMock()
+        self.scanner.stream_scan.side_effect = stream_scan
+        
+    def test_concurrent_requests_share_one_sweep(self):
+        manager = ScanJobManager(self.scanner, cache_ttl=60)
+        job, reused = manager.submit()
+        self.assertFalse(reused)
+        
+        # Premier appareil disponible avant la fin du scan
+        self.assertEqual([d['ip'] for d in job.wait(0, timeout=5)], ["192.168.1.1"])
+        self.assertEqual(manager.submit(), (job, True))
+        
+        self.release.set()
+        self.assertTrue(job.join(timeout=5))
+        self.assertEqual(job.to_dict()['device_count'], 2)
+        self.assertIs(manager.get(job.id), job)
+        
+        # Résultat récent resservi sans nouveau balayage
+        self.assertEqual(manager.submit(), (job, True))
+        self.assertEqual(self.sweeps, 1)
+        
+    def test_async_waiters_hold_no_thread(self):
+        manager = ScanJobManager(self.scanner, cache_ttl=60)
+        job, _ = manager.submit()
+
+        async def main():
+            first = await asyncio.wait_for(job.wait_async(0), 5)
+            # Nombreux clients en attente : aucun thread du pool par défaut occupé
+            waiters = [asyncio.create_task(job.join_async()) for _ in range(100)]
+            await asyncio.sleep(0.05)
+            idle = await asyncio.wait_for(asyncio.to_thread(lambda: True), 1)
+            self.release.set()
+            await asyncio.wait_for(asyncio.gather(*waiters), 5)
+            rest = await job.wait_async(len(first))
+            return first, rest, idle
+
+        first, rest, idle = asyncio.run(main())
+        self.assertTrue(idle)
+        self.assertEqual([d['ip'] for d in first + rest], ["192.168.1.1", "192.168.1.2"])
+        self.assertTrue(job.done)
+
+    def test_expired_cache_starts_new_sweep(self):
+        self.release.set()
+        manager = ScanJobManager(self.scanner, cache_ttl=0)
+        first, _ = manager.submit()
+        first.join(timeout=5)
+        
+        second, reused = manager.submit()
+        second.join(timeout=5)
+        
+        self.assertFalse(reused)
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(self.sweeps, 2)
+
+    def test_failed_scan_is_not_cached(self):
+        def failed_scan():
+            yield Device("192.168.1.1", "00:11:22:33:44:55", "Fabricant", "routeur")
+            raise OSError("interface indisponible")
+        self.scanner.stream_scan.side_effect = failed_scan
+        manager = ScanJobManager(self.scanner, cache_ttl=60)
+        
+        job, _ = manager.submit()
+        self.assertTrue(job.join(timeout=5))
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, "interface indisponible")
+        
+        # Aucun résultat resservi : la demande suivante relance un balayage
+        second, reused = manager.submit()
+        self.assertFalse(reused)
+        self.assertNotEqual(second.id, job.id)
+
+class TestEventBroker(unittest.TestCase):
+    def test_publish_from_thread_and_resume(self):
+        broker = EventBroker()
+        broker.publish('device_joined', {'mac': "00:11:22:33:44:55"})
+        
+        async def main():
+            received = []
+            async for seq, kind, payload in broker.subscribe(since=0):
+                received.append((seq, kind, json.loads(payload)['data']))
+                if seq == 1:
+                    Thread(target=broker.publish, args=('alert', {'ip': "192.168.1.1"})).start()
+                if len(received) == 2:
+                    break
+            return received
+        
+        received = asyncio.run(asyncio.wait_for(main(), 5))
+        
+        self.assertEqual(received, [(1, 'device_joined', {'mac': "00:11:22:33:44:55"}),
+                                    (2, 'alert', {'ip': "192.168.1.1"})])
+        
+    def test_slow_consumer_is_dropped(self):
+        broker = EventBroker(buffer_size=10, client_queue_size=3)
+        
+        async def main():
+            received = []
+            with self.assertRaises(SlowConsumer):
+                async for seq, kind, payload in broker.subscribe():
+                    received.append(seq)
+            return received
+        
+        async def run():
+            task = asyncio.create_task(main())
+            await asyncio.sleep(0)
+            # Publication en rafale sans laisser l'abonné consommer
+            for i in range(6):
+                broker.publish('device_changed', {'i': i})
+            return await asyncio.wait_for(task, 5)
+        
+        self.assertEqual(asyncio.run(run()), [])
+        
+    def test_expired_resume_point(self):
+        broker = EventBroker(buffer_size=2)
+        for i in range(5):
+            broker.publish('device_left', {'i': i})
+        
+        async def main():
+            async for _ in broker.subscribe(since=1):
+                pass
+        
+        with self.assertRaises(SlowConsumer):
+            asyncio.run(main())
+        
+    def test_resume_point_from_previous_run(self):
+        broker = EventBroker()
+        for i in range(3):
+            broker.publish('device_joined', {'i': i})
+        
+        async def main():
+            async for _ in broker.subscribe(since=500):
+                pass
+        
+        with self.assertRaises(SlowConsumer):
+            asyncio.run(asyncio.wait_for(main(), 5))
+        
+    def test_resumed_client_limit_shrinks_after_catch_up(self):
+        broker = EventBroker(buffer_size=50, client_queue_size=3)
+        for i in range(10):
+            broker.publish('device_changed', {'i': i})
+        
+        async def main():
+            received = []
+            with self.assertRaises(SlowConsumer):
+                async for seq, kind, payload in broker.subscribe(since=0):
+                    received.append(seq)
+                    if seq == 10:
+                        # Retard initial rattrapé : la limite redevient client_queue_size
+                        for i in range(5):
+                            broker.publish('device_changed', {'i': i})
+            return received
+        
+        self.assertEqual(asyncio.run(asyncio.wait_for(main(), 5)), list(range(1, 11)))
+
+@unittest.skipUnless(importlib.util.find_spec('fastapi'), "fastapi non installé")
+class TestDeviceETag(unittest.TestCase):
+    def test_weak_comparison_and_lists(self):
+        from src.api.rest_api import etag_matches
+        self.assertTrue(etag_matches('"42"', '"42"'))
+        self.assertTrue(etag_matches('W/"42"', '"42"'))
+        self.assertTrue(etag_matches('"41", W/"42"', '"42"'))
+        self.assertTrue(etag_matches('*', '"42"'))
+        self.assertFalse(etag_matches('"41"', '"42"'))
+        self.assertFalse(etag_matches(None, '"42"'))
+
+@unittest.skipUnless(importlib.util.find_spec('fastapi'), "fastapi non installé")
+class TestBlockDevice(unittest.TestCase):
+    def test_block_without_firewall_changes_nothing(self):
+        from fastapi.testclient import TestClient
+        from src.api.rest_api import RESTAPIServer
+        db = MagicMock()
+        db.get_device.return_value = {'ip': "192.168.1.1", 'mac': "00:11:22:33:44:55", 'is_blocked': False}
+        server = RESTAPIServer(MagicMock(firewall=None), db, enable_metrics=False)
+        
+        response = TestClient(server.app).post("/devices/00:11:22:33:44:55/block")
+        server.async_db.shutdown()
+        
+        self.assertEqual(response.status_code, 503)
+        db.save_devices.assert_not_called()
+
+@unittest.skipUnless(importlib.util.find_spec('fastapi'), "fastapi non installé")
+class TestFirewallMetrics(unittest.TestCase):
+    @patch('src.security.firewall.subprocess.run')
+    @patch('src.security.firewall.os.makedirs')
+    @patch('src.security.firewall.AdvancedFirewallManager.setup_logging')
+    def test_unblock_counters_exposed(self, mock_logging, mock_makedirs, mock_run):
+        from fastapi.testclient import TestClient
+        from src.api.rest_api import RESTAPIServer
+        from src.security.firewall import AdvancedFirewallManager
+        from src.utils.metrics import metrics
+        firewall = AdvancedFirewallManager()
+        firewall.os_type = "Linux"
+        firewall.logger = MagicMock()
+        server = RESTAPIServer(MagicMock(firewall=firewall), MagicMock())
+        metrics.reset()
+        
+        self.assertTrue(firewall.unblock_device("192.168.1.9", "00:11:22:33:44:99"))
+        mock_run.side_effect = OSError("iptables introuvable")
+        self.assertFalse(firewall.unblock_device("192.168.1.9"))
+        text = TestClient(server.app).get("/metrics").text
+        server.async_db.shutdown()
+        metrics.disable()
+        
+        self.assertIn('wifi_monitor_firewall_calls_total{action="unblock",result="success"} 1', text)
+        self.assertIn('wifi_monitor_firewall_calls_total{action="unblock",result="failure"} 1', text)
+        self.assertIn('wifi_monitor_stage_duration_seconds_count{stage="firewall"} 2', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+import unittest
+import time
+import os
+import sqlite3
+import tempfile
+from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+from src.database.db_manager import DatabaseManager
+from src.database.sightings import HOUR, DAY
+from src.database.stats import DeviceStats
+from src.network_scanner.device import Device
+
+def make_device(mac, ip, hostname="hote", **fields):
+    return dict(mac=mac, ip=ip, vendor="Fabricant", hostname=hostname, **fields)
+
+class TestDatabaseManager(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(flush_interval=60, batch_size=1000)
+        self.db.db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.db.initialize_db()
+        
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+        
+    def test_wal_mode(self):
+        mode = self.db.connections.reader().execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+        
+    def test_connections_per_thread(self):
+        connections = self.db.connections
+        self.assertIs(connections.reader(), connections.reader())
+        self.assertIsNot(connections.reader(), connections.writer())
+        with self.assertRaises(sqlite3.OperationalError):
+            connections.reader().execute("INSERT INTO settings VALUES ('a', 'b')")
+        
+        self.db.save_setting('theme', 'sombre')
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: (self.db.load_settings(), id(connections.reader())), range(8)))
+        
+        self.assertTrue(all(settings == {'theme': 'sombre'} for settings, _ in results))
+        self.assertNotIn(id(connections.reader()), {reader for _, reader in results})
+        
+    def test_writes_are_coalesced_per_mac(self):
+        self.db.save_devices([make_device("00:11:22:33:44:55", "192.168.1.10", "ancien")])
+        self.db.save_devices([make_device("00:11:22:33:44:55", "192.168.1.11", "nouveau"),
+                              make_device("00:11:22:33:44:66", "192.168.1.12")])
+        
+        # Rien n'est écrit avant l'intervalle de vidage, le cache répond déjà
+        self.assertEqual(self.db._query('SELECT * FROM devices'), [])
+        self.assertEqual(len(self.db.load_devices()), 2)
+        self.assertTrue(self.db.flush(timeout=5))
+        
+        devices = {d['mac']: d for d in self.db._query('SELECT * FROM devices')}
+        self.assertEqual(len(devices), 2)
+        self.assertEqual(devices["00:11:22:33:44:55"]['hostname'], "nouveau")
+        self.assertEqual(devices["00:11:22:33:44:55"]['ip'], "192.168.1.11")
+        
+    def test_batch_size_triggers_flush(self):
+        self.db.writer.batch_size = 2
+        self.db.save_devices([make_device("00:11:22:33:44:55", "192.168.1.10"),
+                              make_device("00:11:22:33:44:66", "192.168.1.11")])
+        
+        with self.db.writer.condition:
+            written = self.db.writer.condition.wait_for(lambda: self.db.writer.written >= 1, 5)
+        self.assertTrue(written)
+        self.assertEqual(len(self.db._query('SELECT * FROM devices')), 2)
+        
+    def test_failed_write_is_retried(self):
+        device = make_device("00:11:22:33:44:55", "192.168.1.10")
+        write = self.db.writer._write
+        # Première écriture en échec, les suivantes passent
+        self.db.writer._write = MagicMock(side_effect=lambda *args: self.db.writer._write.call_count > 1 and write(*args))
+
+        self.db.save_devices([device])
+        self.assertFalse(self.db.flush(timeout=5))
+        self.assertEqual(self.db._query('SELECT * FROM devices'), [])
+
+        # Appareil inchangé entre-temps : le lot remis en attente est réécrit
+        self.db.save_devices([device])
+        self.assertTrue(self.db.flush(timeout=5))
+        self.assertEqual(len(self.db._query('SELECT * FROM devices')), 1)
+
+    def test_unexpected_write_error_does_not_block_flush(self):
+        write = self.db.writer._write
+        # Connexion invalide : erreur hors sqlite3.Error, le thread survit et flush() rend la main
+        self.db.writer._write = lambda connection, rows, sightings=(): write(None, rows, sightings)
+        self.db.save_devices([make_device("00:11:22:33:44:55", "192.168.1.10")])
+        self.assertFalse(self.db.flush(timeout=5))
+        self.assertTrue(self.db.writer.thread.is_alive())
+
+    def test_final_write_is_retried_then_logged(self):
+        writer = self.db.writer
+        writer._write = MagicMock(return_value=False)
+        writer.logger = MagicMock()
+        self.db.save_devices([make_device("00:11:22:33:44:55", "192.168.1.10")])
+
+        writer.stop()
+
+        self.assertEqual(writer._write.call_count, 2)
+        writer.logger.error.assert_called_once()
+        self.assertIn("1 appareils", writer.logger.error.call_args[0][0])
+
+    def test_only_changed_columns_are_written(self):
+        device = make_device("00:11:22:33:44:55", "192.168.1.10")
+        self.db.save_devices([device])
+        self.db.flush(timeout=5)
+        first_seen = self.db.get_device(device['mac'])['first_seen']
+        self.db.writer.submit = MagicMock(wraps=self.db.writer.submit)
+        
+        # Appareil inchangé : aucune écriture
+        self.db.save_devices([device])
+        self.db.writer.submit.assert_not_called()
+        
+        self.db.save_devices([dict(device, ip="192.168.1.11")])
+        changes = self.db.writer.submit.call_args[0][0]
+        self.assertEqual(changes, [(device['mac'], {'ip': "192.168.1.11", 'last_seen': changes[0][1]['last_seen']})])
+        
+        self.db.flush(timeout=5)
+        row = self.db._query('SELECT * FROM devices')[0]
+        self.assertEqual(row['ip'], "192.168.1.11")
+        self.assertEqual(row['first_seen'], first_seen)
+        self.assertEqual(row['hostname'], "hote")
+        
+    def test_change_version_and_delta(self):
+        first = make_device("00:11:22:33:44:55", "192.168.1.10")
+        second = make_device("00:11:22:33:44:66", "192.168.1.11")
+        self.db.save_devices([first, second])
+        version, devices = self.db.load_devices_versioned()
+        self.assertEqual(len(devices), 2)
+        
+        # Nouvelle observation sans modification : même version
+        self.db.save_devices([first, second])
+        self.assertEqual(self.db.devices_version(), version)
+        self.assertEqual(self.db.get_devices_changed_since(version), (version, []))
+        
+        self.db.save_devices([dict(second, hostname="renomme")])
+        new_version, changed = self.db.get_devices_changed_since(version)
+        self.assertGreater(new_version, version)
+        self.assertEqual([d['hostname'] for d in changed], ["renomme"])
+        
+        # Une version antérieure au démarrage renvoie tout
+        self.assertEqual(len(self.db.get_devices_changed_since(0)[1]), 2)
+        
+    def test_incremental_stats_and_cold_start(self):
+        self.db.save_devices([make_device("00:11:22:33:44:55", "192.168.1.10"),
+                              make_device("00:11:22:33:44:66", "192.168.1.11", is_authorized=True)])
+        self.db.save_devices([dict(make_device("00:11:22:33:44:55", "192.168.1.10"), vendor="Autre", is_blocked=True)])
+        
+        stats = self.db.get_stats()
+        self.assertEqual((stats['total_devices'], stats['authorized'], stats['blocked']), (2, 1, 1))
+        self.assertEqual((stats['new_last_1h'], stats['new_last_24h'], stats['new_last_7d']), (2, 2, 2))
+        self.assertEqual(stats['vendors'], {"Fabricant": 1, "Autre": 1})
+        self.assertEqual(self.db.stats.snapshot(now=time.time() + 2 * HOUR)['new_last_1h'], 0)
+        
+        # Redémarrage : agrégats recalculés en SQL
+        self.db.close()
+        self.db = DatabaseManager()
+        self.db.db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.db.initialize_db()
+        self.assertEqual(self.db.get_stats(), stats)
+        
+    def test_stats_windows_with_out_of_order_timestamps(self):
+        stats = DeviceStats()
+        now = time.time()
+        # Horodatages pris hors verrou : le plus récent peut arriver en premier
+        for seen in (now, now - 2 * HOUR, now - 10):
+            stats.add({'vendor': "Fabricant"}, seen)
+        
+        snapshot = stats.snapshot(now=now)
+        self.assertEqual((snapshot['new_last_1h'], snapshot['new_last_24h']), (2, 3))
+        
+    def test_targeted_queries(self):
+        self.db.save_devices([make_device(f"00:11:22:33:44:{i:02x}", f"192.168.1.{i}", is_blocked=i % 2)
+                              for i in range(10)])
+        
+        # Écritures encore en attente : les requêtes sont servies par le cache
+        self.assertEqual(self.db._query('SELECT * FROM devices'), [])
+        self.assertEqual(self.db.get_device("00:11:22:33:44:03")['ip'], "192.168.1.3")
+        self.assertIsNone(self.db.get_device("00:11:22:33:44:ff"))
+        self.assertEqual([d['mac'] for d in self.db.get_devices_by_ip("192.168.1.4")], ["00:11:22:33:44:04"])
+        self.assertEqual(len(self.db.get_devices_by_flags(is_blocked=True)), 5)
+        self.assertEqual(len(self.db.get_devices_seen_between("2000-01-01 00:00:00")), 10)
+        self.assertEqual(self.db.get_known_macs(["00:11:22:33:44:01", "aa:aa:aa:aa:aa:aa"]), {"00:11:22:33:44:01"})
+        stats = self.db.get_stats()
+        self.assertEqual((stats['total_devices'], stats['authorized'], stats['blocked']), (10, 0, 5))
+        
+        pages, after = [], None
+        while True:
+            devices, after = self.db.list_devices(limit=4, after=after)
+            pages.append([d['mac'][-2:] for d in devices])
+            if after is None:
+                break
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertEqual(sum(pages, []), [f"{i:02x}" for i in range(10)])
+        for limit in (0, -1):
+            with self.assertRaises(ValueError):
+                self.db.list_devices(limit=limit)
+        
+    def test_cache_indexes_follow_updates(self):
+        device = make_device("00:11:22:33:44:55", "192.168.1.10")
+        self.db.cache.apply(device, now=1000)
+        self.db.cache.apply(make_device("00:11:22:33:44:66", "192.168.1.11"), now=2000)
+        self.db.cache.apply(dict(device, ip="192.168.1.12", is_authorized=True), now=3000)
+        
+        self.assertEqual(self.db.get_devices_by_ip("192.168.1.10"), [])
+        self.assertEqual([d['mac'] for d in self.db.get_devices_by_ip("192.168.1.12")], [device['mac']])
+        self.assertEqual([d['mac'] for d in self.db.get_devices_by_flags(is_authorized=True)], [device['mac']])
+        self.assertEqual([d['mac'] for d in self.db.get_devices_by_flags(is_authorized=False)],
+                         ["00:11:22:33:44:66"])
+        # Ordre de last_seen mis à jour par la dernière observation
+        seen = self.db.get_devices_seen_between("1970-01-01 00:30:00")
+        self.assertEqual([d['mac'] for d in seen], ["00:11:22:33:44:66", device['mac']])
+        self.assertEqual(len(self.db.get_devices_seen_between("1970-01-01 00:00:00", "1970-01-01 00:40:00")), 1)
+        
+    def test_close_writes_pending(self):
+        self.db.save_devices([make_device("00:11:22:33:44:55", "192.168.1.10")])
+        self.db.close()
+        
+        with sqlite3.connect(os.path.join(self.tmpdir.name, "test.db")) as connection:
+            self.assertEqual(connection.execute('SELECT COUNT(*) FROM devices').fetchone()[0], 1)
+
+class TestSightings(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(flush_interval=60)
+        self.db.db_path = os.path.join(self.tmpdir.name, "test.db")
+        self.db.initialize_db()
+        self.device = Device("192.168.1.10", "00:11:22:33:44:55", "Fabricant", "hote")
+        
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+        
+    def record(self, *timestamps):
+        for ts in timestamps:
+            self.db.record_sightings([self.device], timestamp=ts)
+        self.db.flush(timeout=5)
+        
+    def test_rollups_and_presence(self):
+        base = 100 * DAY
+        self.record(base, base + 300, base + 600, base + 2 * HOUR, base + DAY + 60)
+        store = self.db.sightings
+        
+        hourly = store.timeline(self.device.mac, base, base + 2 * DAY, resolution=HOUR)
+        self.assertEqual([(bucket, count) for bucket, count, _, _ in hourly],
+                         [(base, 3), (base + 2 * HOUR, 1), (base + DAY, 1)])
+        daily = store.timeline(self.device.mac, base, base + 2 * DAY, resolution=DAY)
+        self.assertEqual([count for _, count, _, _ in daily], [4, 1])
+        
+        intervals = store.presence_intervals(self.device.mac, base, base + 2 * DAY, now=base + 2 * DAY)
+        self.assertEqual(intervals, [(base, base + 600), (base + 2 * HOUR, base + 2 * HOUR),
+                                     (base + DAY + 60, base + DAY + 60)])
+        
+    def test_compaction_enforces_retention(self):
+        now = 1000 * DAY
+        self.record(now - 30 * DAY, now - 200 * DAY, now - 60)
+        
+        deleted = self.db.sightings.compact(now=now)
+        
+        self.assertEqual(deleted, {'sightings': 2, 'sightings_hourly': 1, 'sightings_daily': 0})
+        self.assertEqual(self.db.sightings.last_seen(self.device.mac), now - 60)
+        # Au-delà des observations brutes, les agrégats horaires répondent encore
+        old = self.db.sightings.presence_intervals(self.device.mac, now - 31 * DAY, now - 29 * DAY, now=now)
+        self.assertEqual(old, [(now - 30 * DAY, now - 30 * DAY)])
+
+if __name__ == '__main__':
+    unittest.main()
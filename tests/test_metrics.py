@@ -0,0 +1,33 @@
+import unittest
+from src.utils.metrics import MetricsRegistry, NULL_TIMER
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        
+        self.assertIs(registry.timer('dns'), NULL_TIMER)
+        registry.inc('scans', result='success')
+        
+        self.assertEqual(registry.render_prometheus(), "\n")
+        
+    def test_prometheus_rendering(self):
+        registry = MetricsRegistry(enabled=True)
+        
+        @registry.timed('vendor')
+        def lookup():
+            return "Cisco"
+        
+        self.assertEqual(lookup(), "Cisco")
+        registry.histogram('stage_duration_seconds', stage='dns').observe(0.2)
+        registry.inc('scans', result='success')
+        registry.inc('scans', 2, result='success')
+        
+        text = registry.render_prometheus()
+        self.assertIn("# TYPE wifi_monitor_stage_duration_seconds histogram", text)
+        self.assertIn('wifi_monitor_stage_duration_seconds_bucket{stage="dns",le="0.25"} 1', text)
+        self.assertIn('wifi_monitor_stage_duration_seconds_bucket{stage="dns",le="0.1"} 0', text)
+        self.assertIn('wifi_monitor_stage_duration_seconds_count{stage="vendor"} 1', text)
+        self.assertIn('wifi_monitor_scans_total{result="success"} 3', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,33 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.network_scanner.scanner import AdvancedNetworkScanner
-from src.network_scanner.device import Device
+from src.network_scanner.device import Device, ScanComplete
+from src.network_scanner.enrichment import EnrichmentPipeline
+from src.network_scanner.port_scanner import AsyncPortScanner, parse_ports
+from src.network_scanner.passive import DeviceTable, PassiveARPMonitor
+from src.network_scanner.dns_cache import HostnameResolver
+from src.network_scanner.oui_index import DEFAULT_INDEX_PATH, OUIIndex, load_default_index, parse_oui_file
+from src.network_scanner.scheduler import ScanScheduler
+from src.network_scanner.raw_arp import build_request_template, parse_arp_reply, expand_targets
+from src.network_scanner.registry import DeviceRegistry
+from src.network_scanner.replay import PcapReplay
+from src.network_scanner.arp_cache import NeighbourEntry, parse_ip_neigh, parse_proc_arp
 import scapy.all as scapy
+import asyncio
+import errno
 import socket
+import time
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
 
 class TestNetworkScanner(unittest.TestCase):
+    @patch('src.network_scanner.scanner.is_admin', return_value=True)
     @patch('scapy.all.srp')
     @patch('socket.gethostbyaddr')
     @patch('src.network_scanner.scanner.MacLookup')
-    def test_arp_scan(self, mock_mac, mock_host, mock_srp):
+    def test_arp_scan(self, mock_mac, mock_host, mock_srp, mock_admin):
         # Configurer les mocks
         mock_srp.return_value = (
             [(None, scapy.ARP(psrc="192.168.1.1", hwsrc="00:11:22:33:44:55"))],
@@ -21,6 +39,8 @@ class TestNetworkScanner(unittest.TestCase):
         # Initialiser le scanner
         scanner = AdvancedNetworkScanner()
         scanner.current_network = {'subnet': '192.168.1.0'}
+        scanner.networks = []
+        scanner.oui_index = None
         
         # Exécuter le scan
         devices = scanner.enhanced_arp_scan()
@@ -32,10 +52,16 @@ class TestNetworkScanner(unittest.TestCase):
         self.assertEqual(devices[0].vendor, "Cisco Systems")
         self.assertEqual(devices[0].hostname, "router.local")
         
-    @patch('src.network_scanner.scanner.socket.socket.connect_ex')
+    @patch('src.network_scanner.port_scanner.asyncio.open_connection')
     def test_port_scan(self, mock_connect):
         # Configurer le mock pour simuler les ports ouverts/fermés
-        mock_connect.side_effect = lambda x: 0 if x[1] in [80, 443] else 1
+        async def fake_connect(ip, port):
+            if port not in [80, 443]:
+                raise ConnectionRefusedError()
+            writer = MagicMock()
+            writer.wait_closed = AsyncMock()
+            return MagicMock(), writer
+        mock_connect.side_effect = fake_connect
         
         scanner = AdvancedNetworkScanner()
         scanner.port_scan_enabled = True
@@ -45,6 +71,371 @@ class TestNetworkScanner(unittest.TestCase):
         self.assertIn(443, open_ports)
         self.assertNotIn(22, open_ports)
         
+    @patch('src.network_scanner.port_scanner.asyncio.open_connection')
+    def test_port_scan_rate_limit_shared_between_scans(self, mock_connect):
+        async def fake_connect(ip, port):
+            raise ConnectionRefusedError()
+        mock_connect.side_effect = fake_connect
+        scanner = AsyncPortScanner(rate_limit=20)
+
+        # Deux scans simultanés (surveillance + API) : 10 connexions à 20/s au total
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda ip: scanner.scan([ip], [1, 2, 3, 4, 5]), ["10.0.0.1", "10.0.0.2"]))
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.4)
+        self.assertIs(scanner.rate_limiter(), scanner.rate_limiter())
+
+    def test_port_scan_without_hosts_or_ports(self):
+        scanner = AsyncPortScanner()
+        self.assertEqual(scanner.scan(["127.0.0.1"], []), {"127.0.0.1": []})
+        self.assertEqual(scanner.scan([], [80]), {})
+        
+    @patch('src.network_scanner.port_scanner.max_open_sockets', return_value=4)
+    @patch('src.network_scanner.port_scanner.asyncio.open_connection')
+    def test_port_scan_resource_errors(self, mock_connect, mock_limit):
+        calls = []
+        active = []
+
+        async def fake_connect(ip, port):
+            calls.append(port)
+            active.append(1)
+            try:
+                await asyncio.sleep(0)
+                # Première tentative sur le port 80 : descripteurs épuisés
+                if port == 80 and calls.count(80) == 1:
+                    raise OSError(errno.EMFILE, "Too many open files")
+                if port == 22:
+                    raise OSError(errno.EHOSTUNREACH, "No route to host")
+                writer = MagicMock()
+                writer.wait_closed = AsyncMock()
+                return MagicMock(), writer
+            finally:
+                self.assertLessEqual(len(active), 4)
+                active.pop()
+        mock_connect.side_effect = fake_connect
+
+        scanner = AsyncPortScanner(resource_backoff=0)
+        self.assertEqual(scanner.scan(["10.0.0.1"], [22, 80, 443]), {"10.0.0.1": [80, 443]})
+
+        # Ressources toujours épuisées : l'erreur remonte au lieu d'un faux « fermé »
+        mock_connect.side_effect = OSError(errno.ENOBUFS, "No buffer space available")
+        with self.assertRaises(OSError):
+            scanner.scan(["10.0.0.1"], [80])
+
+    @patch('src.network_scanner.port_scanner.asyncio.open_connection')
+    def test_port_scan_deadline_returns_partial_results(self, mock_connect):
+        cancelled = []
+        
+        async def fake_connect(ip, port):
+            if port == 80:
+                writer = MagicMock()
+                writer.wait_closed = AsyncMock()
+                return MagicMock(), writer
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(port)
+                raise
+        mock_connect.side_effect = fake_connect
+        
+        scanner = AsyncPortScanner(timeout=30)
+        start = time.monotonic()
+        result = scanner.scan(["10.0.0.1"], [80, 8080, 8443], deadline=0.2)
+        
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(result, {"10.0.0.1": [80]})
+        self.assertEqual(sorted(cancelled), [8080, 8443])
+        
+    @patch('src.network_scanner.scanner.scapy.srp', return_value=([], []))
+    def test_fast_sweep_without_interface_address_falls_back(self, mock_srp):
+        scanner = AdvancedNetworkScanner()
+        scanner.arp_engine = "fast"
+        scanner.networks = []
+        scanner.current_network = {}
+
+        self.assertEqual(scanner.arp_sweep('eth9', '192.168.1.0/24'), [])
+        mock_srp.assert_called_once()
+
+    def test_scan_targets(self):
+        scanner = AdvancedNetworkScanner()
+        scanner.networks = [
+            {'interface': 'eth0', 'subnet': '10.0.0.0', 'netmask': '255.255.248.0'},
+            {'interface': 'eth1', 'subnet': '192.168.1.0', 'netmask': '255.255.255.0'},
+        ]
+        
+        targets = scanner.get_scan_targets()
+        
+        self.assertEqual(len(targets), 9)
+        self.assertIn(('eth0', '10.0.7.0/24'), targets)
+        self.assertIn(('eth1', '192.168.1.0/24'), targets)
+        
+        # Réseau trop grand (docker0 en /16) ignoré
+        scanner.networks.append({'interface': 'docker0', 'subnet': '172.17.0.0', 'netmask': '255.255.0.0'})
+        self.assertEqual(scanner.get_scan_targets(), targets)
+        
+    @patch('src.network_scanner.scanner.is_admin', return_value=True)
+    def test_all_shards_failing_marks_scan_failed(self, mock_admin):
+        scanner = AdvancedNetworkScanner()
+        scanner.networks = [{'interface': 'eth0', 'subnet': '10.0.0.0', 'netmask': '255.255.252.0'}]
+        scanner.arp_sweep = MagicMock(side_effect=OSError("interface indisponible"))
+        
+        self.assertEqual(scanner.enhanced_arp_scan(), [])
+        self.assertTrue(scanner.last_scan_failed)
+        self.assertEqual(scanner.arp_sweep.call_count, 4)
+        
+        # Un seul fragment en échec : le scan reste réussi
+        scanner.arp_sweep = MagicMock(side_effect=[OSError("x"), [], [], []])
+        scanner.last_full_sweep = 0
+        scanner.enhanced_arp_scan()
+        self.assertFalse(scanner.last_scan_failed)
+        
+    @patch('src.network_scanner.scanner.read_neighbour_table')
+    def test_cached_arp_scan_probes_only_stale(self, mock_table):
+        mock_table.return_value = [
+            NeighbourEntry("192.168.1.1", "00:11:22:33:44:55", "eth0", "REACHABLE"),
+            NeighbourEntry("192.168.1.7", "00:11:22:33:44:57", "eth0", "STALE"),
+            NeighbourEntry("192.168.1.9", None, "eth0", "INCOMPLETE"),
+            NeighbourEntry("10.9.9.9", "00:11:22:33:44:58", "eth9", "REACHABLE"),
+        ]
+        scanner = AdvancedNetworkScanner()
+        scanner.devices = [Device("192.168.1.20", "00:11:22:33:44:59", "Test", "a")]
+        # Vu récemment : sondé ; vu avant le dernier balayage complet : ignoré
+        scanner.known_devices.record(Device("192.168.1.21", "00:11:22:33:44:60", "Test", "b"))
+        scanner.known_devices.record(Device("192.168.1.30", "00:11:22:33:44:61", "Test", "c",
+                                            last_seen=time.time() - 2 * scanner.full_sweep_interval))
+        scanner.arp_sweep = MagicMock(return_value=[])
+        
+        answered, kept = scanner.cached_arp_scan([('eth0', '192.168.1.0/24')])
+        
+        self.assertEqual([reply.psrc for _, reply in answered], ["192.168.1.1"])
+        self.assertEqual(kept, [])
+        scanner.arp_sweep.assert_called_once_with('eth0', ["192.168.1.20", "192.168.1.21", "192.168.1.7",
+                                                           "192.168.1.9"])
+        
+    @patch('src.network_scanner.scanner.read_neighbour_table')
+    def test_cached_arp_scan_skips_stable_devices_not_due(self, mock_table):
+        mock_table.return_value = [
+            NeighbourEntry("192.168.1.7", "00:11:22:33:44:57", "eth0", "STALE"),
+            NeighbourEntry("192.168.1.8", "00:11:22:33:44:58", "eth0", "STALE"),
+        ]
+        scanner = AdvancedNetworkScanner()
+        stable = Device("192.168.1.20", "00:11:22:33:44:59", "Test", "a")
+        scanner.devices = [stable]
+        # Appareils stables planifiés loin dans le futur ; .8 est échu
+        for mac, ip in (("00:11:22:33:44:57", "192.168.1.7"), (stable.mac, stable.ip)):
+            scanner.scheduler.observe(mac, ip)
+            scanner.scheduler.states[mac].next_due = time.time() + 600
+        scanner.arp_sweep = MagicMock(return_value=[])
+        
+        answered, kept = scanner.cached_arp_scan([('eth0', '192.168.1.0/24')])
+        
+        # L'appareil repris de la liste courante n'a pas été revu sur le réseau
+        self.assertEqual([reply.psrc for _, reply in answered], ["192.168.1.7"])
+        self.assertEqual([reply.psrc for _, reply in kept], ["192.168.1.20"])
+        scanner.arp_sweep.assert_called_once_with('eth0', ["192.168.1.8"])
+        
+    @patch('src.network_scanner.scanner.AdvancedNetworkScanner.enhanced_arp_scan', return_value=[])
+    def test_stop_monitoring_is_immediate(self, mock_scan):
+        scanner = AdvancedNetworkScanner(update_interval=60)
+        scanner.start_continuous_monitoring(None)
+        time.sleep(0.1)
+        
+        start = time.time()
+        scanner.stop_monitoring()
+        
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(mock_scan.call_count, 1)
+        
+    def test_stop_during_scan_keeps_pipeline_until_restart(self):
+        scanner = AdvancedNetworkScanner(update_interval=60)
+        release = Event()
+        scanner.enhanced_arp_scan = MagicMock(side_effect=lambda: release.wait(5) and [])
+        scanner.start_continuous_monitoring(None)
+        time.sleep(0.05)
+        pipeline = scanner.enrichment
+        pipeline.shutdown = MagicMock()
+
+        with patch.object(scanner.scan_thread, 'join'):
+            scanner.stop_monitoring()
+        # Scan toujours en cours : pas d'annulation de l'enrichissement
+        pipeline.shutdown.assert_not_called()
+        self.assertIsNotNone(scanner.scan_thread)
+
+        release.set()
+        scanner.start_continuous_monitoring(None)
+        pipeline.shutdown.assert_called_once()
+        self.assertIsNot(scanner.enrichment, pipeline)
+        self.assertTrue(scanner.scan_thread.is_alive())
+        scanner.stop_monitoring()
+
+    def test_failed_scan_keeps_previous_devices(self):
+        scanner = AdvancedNetworkScanner(update_interval=60)
+        router = Device("192.168.1.1", "00:11:22:33:44:55", "Cisco", "routeur")
+        scanner.devices = [router]
+        scanner.scheduler.observe(router.mac, router.ip, new=False)
+        events, callback = [], MagicMock()
+        scanner.add_event_listener(lambda kind, data: events.append(kind))
+
+        def failed_scan():
+            scanner.last_scan_failed = True
+            return []
+        scanner.enhanced_arp_scan = MagicMock(side_effect=failed_scan)
+        scanner.start_continuous_monitoring(callback)
+        time.sleep(0.1)
+        scanner.stop_monitoring()
+
+        scanner.enhanced_arp_scan.assert_called_once()
+        self.assertEqual(scanner.devices, [router])
+        self.assertIn(router.mac, scanner.scheduler.states)
+        self.assertEqual(events, [])
+        callback.assert_not_called()
+
+    def test_failed_reprobe_keeps_monitoring(self):
+        scanner = AdvancedNetworkScanner(update_interval=60)
+        scanner.networks = [{'interface': 'eth0', 'subnet': '192.168.1.0', 'netmask': '255.255.255.0'}]
+        router = Device("192.168.1.1", "00:11:22:33:44:55", "Cisco", "routeur")
+        scanner.enhanced_arp_scan = MagicMock(return_value=[router])
+        scanner.arp_sweep = MagicMock(side_effect=OSError("interface indisponible"))
+        scanner.scheduler.min_interval = 0
+        scanner.start_continuous_monitoring(None)
+        time.sleep(0.2)
+
+        self.assertTrue(scanner.scan_thread.is_alive())
+        self.assertTrue(scanner.arp_sweep.called)
+        self.assertEqual(scanner.devices, [router])
+        self.assertGreater(scanner.scheduler.failures, 0)
+        scanner.stop_monitoring()
+
+    @patch('src.network_scanner.scanner.PassiveARPMonitor')
+    def test_passive_start_failure_falls_back_to_active(self, mock_monitor):
+        mock_monitor.return_value.start.side_effect = OSError("libpcap is not available")
+        scanner = AdvancedNetworkScanner()
+        scanner.passive_mode = True
+        router = Device("192.168.1.1", "00:11:22:33:44:55", "Cisco", "routeur")
+        scanner.enhanced_arp_scan = MagicMock(return_value=[router])
+        callback = MagicMock()
+        scanner.start_continuous_monitoring(callback)
+        time.sleep(0.1)
+        scanner.stop_monitoring()
+
+        self.assertIsNone(scanner.passive_monitor)
+        self.assertEqual(scanner.devices, [router])
+        callback.assert_called_once_with([router])
+
+    @patch('src.network_scanner.scanner.PassiveARPMonitor')
+    def test_failed_reconciliation_keeps_table(self, mock_monitor):
+        scanner = AdvancedNetworkScanner()
+        scanner.passive_mode = True
+        router = Device("192.168.1.1", "00:11:22:33:44:55", "Cisco", "routeur")
+        scanner.device_table.update([router])
+        callback = MagicMock()
+
+        def failed_scan():
+            scanner.last_scan_failed = True
+            return []
+        scanner.enhanced_arp_scan = MagicMock(side_effect=failed_scan)
+        scanner.start_continuous_monitoring(callback)
+        time.sleep(0.1)
+        scanner.stop_monitoring()
+
+        scanner.enhanced_arp_scan.assert_called_once()
+        self.assertEqual(scanner.device_table.snapshot(), [router])
+        callback.assert_not_called()
+
+    def test_arp_spoofing_across_scans_blocks_once(self):
+        scanner = AdvancedNetworkScanner()
+        scanner.firewall = MagicMock()
+        gateway = (None, scapy.ARP(psrc="192.168.1.1", hwsrc="00:11:22:33:44:55"))
+        attacker = (None, scapy.ARP(psrc="192.168.1.1", hwsrc="66:77:88:99:aa:bb"))
+        
+        scanner.detect_arp_spoofing([gateway])
+        scanner.detect_arp_spoofing([attacker])
+        scanner.detect_arp_spoofing([gateway])
+        scanner.detect_arp_spoofing([attacker])
+        
+        scanner.firewall.block_device.assert_called_once_with("192.168.1.1", "66:77:88:99:aa:bb")
+        
+    @patch('src.network_scanner.scanner.is_admin', return_value=True)
+    @patch('src.network_scanner.scanner.scapy.sendp')
+    @patch('src.network_scanner.scanner.scapy.AsyncSniffer')
+    def test_stream_scan_yields_devices_then_marker(self, mock_sniffer, mock_sendp, mock_admin):
+        def fake_sniffer(prn, started_callback, **kwargs):
+            sniffer = MagicMock(running=True)
+            sniffer.start.side_effect = started_callback
+            mock_sendp.side_effect = lambda request, **kw: [
+                prn(scapy.Ether()/scapy.ARP(op=2, psrc=ip, hwsrc=mac))
+                for ip, mac in [("192.168.1.1", "00:11:22:33:44:55"), ("192.168.1.2", "00:11:22:33:44:66"),
+                                ("192.168.1.1", "00:11:22:33:44:55")]
+            ]
+            return sniffer
+        mock_sniffer.side_effect = fake_sniffer
+        
+        scanner = AdvancedNetworkScanner()
+        scanner.networks = [{'interface': 'eth0', 'subnet': '192.168.1.0', 'netmask': '255.255.255.0'}]
+        scanner.arp_timeout = 0
+        active, batches = [], []
+        
+        def process(answered):
+            active.append(1)
+            batches.append(len(active))
+            time.sleep(0.05)
+            active.pop()
+            return [Device(reply.psrc, reply.hwsrc, "Inconnu", "Inconnu") for _, reply in answered]
+        scanner.process_scan_results = process
+        
+        items = list(scanner.stream_scan())
+        
+        self.assertEqual(sorted(d.ip for d in items[:-1]), ["192.168.1.1", "192.168.1.2"])
+        self.assertIsInstance(items[-1], ScanComplete)
+        self.assertEqual(items[-1].devices, 2)
+        # Un seul lot enrichi à la fois (limites du scanner de ports partagées)
+        self.assertEqual(set(batches), {1})
+        
+    @patch('src.network_scanner.scanner.is_admin', return_value=True)
+    @patch('src.network_scanner.scanner.scapy.AsyncSniffer')
+    def test_stream_scan_falls_back_without_sniffer(self, mock_sniffer, mock_admin):
+        # Thread d'écoute mort au démarrage (ex: libpcap absente)
+        mock_sniffer.return_value = MagicMock(exception=OSError("libpcap is not available"))
+        scanner = AdvancedNetworkScanner()
+        scanner.networks = [{'interface': 'eth0', 'subnet': '192.168.1.0', 'netmask': '255.255.255.0'}]
+        scanner.arp_sweep = MagicMock(return_value=[(None, scapy.ARP(psrc="192.168.1.1", hwsrc="00:11:22:33:44:55"))])
+        scanner.process_scan_results = lambda answered: [
+            Device(reply.psrc, reply.hwsrc, "Inconnu", "Inconnu") for _, reply in answered]
+
+        items = list(scanner.stream_scan())
+
+        self.assertNotIn('filter', mock_sniffer.call_args.kwargs)
+        self.assertEqual([d.ip for d in items[:-1]], ["192.168.1.1"])
+        self.assertEqual(items[-1].devices, 1)
+
+    @patch('src.network_scanner.scanner.is_admin', return_value=False)
+    def test_stream_scan_without_privileges_fails(self, mock_admin):
+        scanner = AdvancedNetworkScanner()
+        with self.assertRaises(PermissionError):
+            list(scanner.stream_scan())
+        
+    def test_device_change_events(self):
+        scanner = AdvancedNetworkScanner()
+        events = []
+        scanner.add_event_listener(lambda kind, data: events.append((kind, data['mac'])))
+        router = Device("192.168.1.1", "00:11:22:33:44:55", "Cisco", "routeur")
+        laptop = Device("192.168.1.2", "00:11:22:33:44:66", "Dell", "pc")
+        moved = Device("192.168.1.9", "00:11:22:33:44:66", "Dell", "pc")
+        phone = Device("192.168.1.3", "00:11:22:33:44:77", "Apple", "tel")
+        
+        scanner.publish_device_changes([router, laptop], [moved, phone])
+        
+        self.assertEqual(sorted(events), [('device_changed', "00:11:22:33:44:66"),
+                                          ('device_joined', "00:11:22:33:44:77"),
+                                          ('device_left', "00:11:22:33:44:55")])
+        
+    def test_parse_ports(self):
+        self.assertEqual(parse_ports("22,80,8000-8002"), [22, 80, 8000, 8001, 8002])
+        self.assertEqual(parse_ports([443, "20-21", 443]), [20, 21, 443])
+        with self.assertRaises(ValueError):
+            parse_ports("0-10")
+        
     def test_device_history(self):
         scanner = AdvancedNetworkScanner()
         device = Device(
@@ -82,6 +473,282 @@ class TestNetworkScanner(unittest.TestCase):
             self.assertTrue(any("Nouvel appareil détecté" in log for log in cm.output))
             self.assertTrue(any("Appareil disparu" in log for log in cm.output))
 
+class TestEnrichmentPipeline(unittest.TestCase):
+    def test_deterministic_order(self):
+        pipeline = EnrichmentPipeline(max_workers=4)
+        pipeline.add_stage('vendor', lambda ip, mac: f"vendor-{mac}", default="Inconnu")
+        
+        results = pipeline.run([
+            ("192.168.1.20", "00:00:00:00:00:02"),
+            ("192.168.1.3", "00:00:00:00:00:01"),
+            ("192.168.1.100", "00:00:00:00:00:03"),
+        ])
+        
+        self.assertEqual([ip for (ip, mac), info in results],
+                         ["192.168.1.3", "192.168.1.20", "192.168.1.100"])
+        self.assertEqual(results[0][1]['vendor'], "vendor-00:00:00:00:00:01")
+        pipeline.shutdown()
+        
+    def test_stage_timeout_and_errors(self):
+        pipeline = EnrichmentPipeline(max_workers=4)
+        pipeline.add_stage('hostname', lambda ip, mac: time.sleep(1) or "slow.local",
+                           default=lambda ip, mac: ip, timeout=0.1)
+        pipeline.add_stage('vendor', lambda ip, mac: 1 / 0, default="Inconnu")
+        
+        results = pipeline.run([("10.0.0.1", "00:11:22:33:44:55")])
+        
+        self.assertEqual(results[0][1]['hostname'], "10.0.0.1")
+        self.assertEqual(results[0][1]['vendor'], "Inconnu")
+        pipeline.shutdown()
+
+class TestDeviceTable(unittest.TestCase):
+    def test_incremental_updates(self):
+        table = DeviceTable()
+        device = Device(ip="192.168.1.2", mac="00:11:22:33:44:56", vendor="Test", hostname="a")
+        
+        self.assertEqual(table.update([device]), [device])
+        self.assertTrue(table.is_current("192.168.1.2", "00:11:22:33:44:56"))
+        self.assertEqual(table.update([device]), [])
+        
+        moved = Device(ip="192.168.1.3", mac="00:11:22:33:44:56", vendor="Test", hostname="a")
+        self.assertEqual(table.update([moved]), [moved])
+        
+    def test_reconcile_drops_silent_devices(self):
+        table = DeviceTable()
+        old = Device(ip="192.168.1.2", mac="00:11:22:33:44:56", vendor="Test", hostname="a")
+        table.update([old], timestamp=100)
+        
+        self.assertTrue(table.reconcile([], since=200))
+        self.assertEqual(table.snapshot(), [])
+        self.assertFalse(table.reconcile([], since=300))
+
+class TestPassiveARPMonitor(unittest.TestCase):
+    def test_own_frames_are_ignored(self):
+        heard = []
+        monitor = PassiveARPMonitor(lambda ip, mac: heard.append((ip, mac)),
+                                    local_addresses=({"192.168.1.50"}, {"aa:bb:cc:dd:ee:ff"}))
+        
+        for ip, mac in [("192.168.1.50", "aa:bb:cc:dd:ee:ff"), ("192.168.1.51", "AA:BB:CC:DD:EE:FF"),
+                        ("192.168.1.50", "00:11:22:33:44:77"), ("192.168.1.7", "00:11:22:33:44:57")]:
+            monitor.handle_packet(scapy.Ether()/scapy.ARP(op=1, psrc=ip, hwsrc=mac))
+        
+        self.assertEqual(heard, [("192.168.1.7", "00:11:22:33:44:57")])
+
+class TestNeighbourTable(unittest.TestCase):
+    def test_parse_ip_neigh(self):
+        entries = parse_ip_neigh(
+            "192.168.1.1 dev eth0 lladdr 00:11:22:33:44:55 router REACHABLE\n"
+            "192.168.1.9 dev eth0  FAILED\n"
+        )
+        self.assertEqual(entries[0], NeighbourEntry("192.168.1.1", "00:11:22:33:44:55", "eth0", "REACHABLE"))
+        self.assertEqual(entries[1].state, "FAILED")
+        self.assertIsNone(entries[1].mac)
+        
+    def test_parse_proc_arp(self):
+        entries = parse_proc_arp(
+            "IP address       HW type     Flags       HW address            Mask     Device\n"
+            "192.168.1.1      0x1         0x2         00:11:22:33:44:55     *        eth0\n"
+            "192.168.1.9      0x1         0x0         00:00:00:00:00:00     *        eth0\n"
+        )
+        self.assertEqual(entries[0].state, "REACHABLE")
+        self.assertEqual(entries[1].state, "INCOMPLETE")
+        self.assertIsNone(entries[1].mac)
+
+class TestHostnameResolver(unittest.TestCase):
+    @patch('socket.gethostbyaddr')
+    def test_positive_and_negative_cache(self, mock_host):
+        def fake_lookup(ip):
+            if ip != "192.168.1.1":
+                raise socket.herror()
+            return ("router.local", [], [ip])
+        mock_host.side_effect = fake_lookup
+        resolver = HostnameResolver(timeout=1)
+        
+        self.assertEqual(resolver.resolve_many(["192.168.1.1", "192.168.1.2"]),
+                         {"192.168.1.1": "router.local", "192.168.1.2": "192.168.1.2"})
+        self.assertEqual(resolver.resolve("192.168.1.1"), "router.local")
+        self.assertEqual(resolver.resolve("192.168.1.2"), "192.168.1.2")
+        
+        self.assertEqual(mock_host.call_count, 2)
+        stats = resolver.stats()
+        self.assertEqual((stats['hits'], stats['negative_hits'], stats['misses']), (1, 1, 2))
+        resolver.shutdown()
+        
+    @patch('socket.gethostbyaddr', return_value=("host", [], []))
+    def test_lru_eviction(self, mock_host):
+        resolver = HostnameResolver(max_entries=2)
+        for ip in ["10.0.0.1", "10.0.0.2", "10.0.0.3"]:
+            resolver.resolve(ip)
+        
+        self.assertNotIn("10.0.0.1", resolver.cache)
+        self.assertEqual(len(resolver.cache), 2)
+        resolver.shutdown()
+
+class TestOUIIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmpdir.name, "oui.txt")
+        with open(self.source, "w") as f:
+            f.write("00000C     (base 16)\t\tCisco Systems, Inc\n")
+            f.write("70B3D5:IEEE Registration Authority\n")
+            f.write("70B3D5E:Fournisseur MA-M\n")
+            f.write("70B3D5E12:Fournisseur MA-S\n")
+        
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        
+    def test_longest_prefix_lookup(self):
+        index = OUIIndex.build(parse_oui_file(self.source))
+        
+        self.assertEqual(index.lookup("00:00:0c:12:34:56"), "Cisco Systems, Inc")
+        self.assertEqual(index.lookup("70:B3:D5:E1:23:45"), "Fournisseur MA-S")
+        self.assertEqual(index.lookup("70-B3-D5-E9-00-00"), "Fournisseur MA-M")
+        self.assertEqual(index.lookup("70:B3:D5:00:00:00"), "IEEE Registration Authority")
+        self.assertIsNone(index.lookup("FF:FF:FF:00:00:00"))
+        
+    def test_save_load_and_batch(self):
+        path = os.path.join(self.tmpdir.name, "oui.idx")
+        OUIIndex.from_oui_files(self.source).save(path)
+        index = OUIIndex.load(path)
+        
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.lookup_many(["00:00:0C:00:00:01", "invalid"], default="Inconnu"),
+                         ["Cisco Systems, Inc", "Inconnu"])
+        
+    def test_default_index_written_only_on_request(self):
+        path = os.path.join(self.tmpdir.name, "data", "oui.idx")
+        self.assertEqual(len(load_default_index(path, source=self.source)), 4)
+        self.assertFalse(os.path.exists(path))
+        
+        load_default_index(path, source=self.source, save=True)
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(os.path.isabs(DEFAULT_INDEX_PATH))
+
+class TestScanScheduler(unittest.TestCase):
+    def test_new_devices_probed_quickly_stable_rarely(self):
+        scheduler = ScanScheduler(min_interval=5, max_interval=80, jitter=0)
+        scheduler.observe("aa", "10.0.0.1", new=True, now=0)
+        # Intervalle doublé à chaque sondage échu confirmé
+        for now in (0, 10, 30, 70, 150):
+            scheduler.observe("bb", "10.0.0.2", now=now)
+        
+        self.assertEqual(scheduler.due_hosts(now=155), [("aa", "10.0.0.1")])
+        self.assertEqual(scheduler.states["bb"].interval, 80)
+        
+    def test_observation_before_due_keeps_schedule(self):
+        scheduler = ScanScheduler(min_interval=5, max_interval=80, jitter=0)
+        scheduler.observe("bb", "10.0.0.2", now=0)
+        scheduler.observe("bb", "10.0.0.2", now=5)
+        self.assertEqual(scheduler.states["bb"].next_due, 10)
+        self.assertFalse(scheduler.is_due("bb", now=9))
+        self.assertTrue(scheduler.is_due("bb", now=10))
+        self.assertTrue(scheduler.is_due("inconnu", now=0))
+        
+        # Changement d'IP : re-sondage rapide
+        scheduler.observe("bb", "10.0.0.3", now=6)
+        self.assertEqual(scheduler.states["bb"].next_due, 11)
+        
+    def test_failure_backoff(self):
+        scheduler = ScanScheduler(full_scan_interval=60, max_backoff=200, jitter=0)
+        scheduler.record_scan(success=False, now=0)
+        self.assertEqual(scheduler.next_full_scan, 120)
+        scheduler.record_scan(success=False, now=0)
+        scheduler.record_scan(success=False, now=0)
+        self.assertEqual(scheduler.next_full_scan, 200)
+        scheduler.record_scan(success=True, now=0)
+        self.assertEqual(scheduler.next_full_scan, 60)
+        
+    def test_missing_device_dropped_after_max_misses(self):
+        scheduler = ScanScheduler(max_misses=2)
+        scheduler.observe("aa", "10.0.0.1", now=0)
+        self.assertFalse(scheduler.record_miss("aa", now=1))
+        self.assertTrue(scheduler.record_miss("aa", now=2))
+        self.assertNotIn("aa", scheduler.states)
+
+class TestRawARPEngine(unittest.TestCase):
+    def test_frame_matches_scapy(self):
+        frame = build_request_template(bytes.fromhex("001122334455"), "192.168.1.10")
+        frame[38:42] = bytes([192, 168, 1, 1])
+        
+        packet = scapy.Ether(bytes(frame))
+        self.assertEqual(packet[scapy.ARP].op, 1)
+        self.assertEqual(packet[scapy.ARP].pdst, "192.168.1.1")
+        self.assertEqual(packet[scapy.ARP].hwsrc, "00:11:22:33:44:55")
+        
+    def test_parse_reply(self):
+        reply = bytes(scapy.Ether(src="00:11:22:33:44:55") /
+                      scapy.ARP(op=2, psrc="192.168.1.1", hwsrc="00:11:22:33:44:55", pdst="192.168.1.10"))
+        request = bytes(scapy.Ether() / scapy.ARP(op=1, pdst="192.168.1.1"))
+        
+        self.assertEqual(parse_arp_reply(reply), ("192.168.1.1", "00:11:22:33:44:55"))
+        self.assertIsNone(parse_arp_reply(request))
+        self.assertEqual(len(expand_targets("192.168.1.0/30")), 2)
+
+class TestDeviceRegistry(unittest.TestCase):
+    def test_dict_compatible_history(self):
+        registry = DeviceRegistry()
+        device = Device(ip="192.168.1.2", mac="00:11:22:33:44:56", vendor="Test", hostname="a",
+                        first_seen="2024-01-01 10:00:00", last_seen="2024-01-02 10:00:00", open_ports=[22])
+        registry.record(device)
+        registry.record(device)
+        
+        self.assertIn("00:11:22:33:44:56", registry)
+        self.assertEqual(registry["00:11:22:33:44:56"]['connection_count'], 2)
+        self.assertEqual(registry["00:11:22:33:44:56"].get('first_seen'), "2024-01-01 10:00:00")
+        self.assertEqual(registry["00:11:22:33:44:56"]['last_ports'], [22])
+        self.assertEqual(registry["00:11:22:33:44:56"]['ip'], "192.168.1.2")
+        self.assertEqual(set(registry.keys()), {"00:11:22:33:44:56"})
+        
+        registry["00:11:22:33:44:56"]['connection_count'] += 1
+        self.assertEqual(registry["00:11:22:33:44:56"]['connection_count'], 3)
+        
+    def test_delete_keeps_slots_consistent(self):
+        registry = DeviceRegistry()
+        for index in range(3):
+            registry.record(Device(ip=f"10.0.0.{index + 1}", mac=f"00:00:00:00:00:0{index}",
+                                   vendor="", hostname=""))
+        
+        del registry["00:00:00:00:00:00"]
+        
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(registry["00:00:00:00:00:02"]['ip'], "10.0.0.3")
+        self.assertNotIn("00:00:00:00:00:00", registry)
+
+class TestPcapReplay(unittest.TestCase):
+    def test_replay_drives_detection(self):
+        def reply(ip, mac, at):
+            packet = scapy.Ether(src=mac)/scapy.ARP(op=2, psrc=ip, hwsrc=mac)
+            packet.time = at
+            return packet
+        
+        packets = [
+            reply("192.168.1.1", "00:11:22:33:44:55", 1000),
+            scapy.Ether()/scapy.IP(dst="192.168.1.1"),
+            reply("192.168.1.2", "00:11:22:33:44:66", 1010),
+            reply("192.168.1.1", "00:11:22:33:44:55", 1070),
+            reply("192.168.1.1", "66:77:88:99:aa:bb", 1080),
+        ]
+        packets[1].time = 1005
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "capture.pcap")
+            scapy.wrpcap(path, packets)
+            
+            scanner = AdvancedNetworkScanner()
+            scanner.hostname_lookup_enabled = False
+            scanner.oui_index = None
+            scanner.firewall = MagicMock()
+            scanner.handle_binding_event = MagicMock()
+            
+            stats = PcapReplay(scanner, path, interval=60).run()
+        
+        self.assertEqual((stats.packets, stats.arp_replies, stats.cycles, stats.devices), (5, 4, 2, 4))
+        event = scanner.handle_binding_event.call_args[0][0]
+        self.assertEqual((event.ip, event.mac), ("192.168.1.1", "66:77:88:99:aa:bb"))
+        self.assertIn("00:11:22:33:44:66", scanner.known_devices)
+        self.assertIsNotNone(scanner.firewall)
+
+
 class TestDevice(unittest.TestCase):
     def test_device_creation(self):
         device = Device(
@@ -0,0 +1,37 @@
+import unittest
+from src.security.arp_bindings import ARPBindingTable
+
+class TestARPBindingTable(unittest.TestCase):
+    def test_conflict_across_scans(self):
+        table = ARPBindingTable(window=600)
+        self.assertIsNone(table.observe("192.168.1.1", "00:11:22:33:44:55", now=0))
+        self.assertIsNone(table.observe("192.168.1.1", "00:11:22:33:44:55", now=60))
+        
+        event = table.observe("192.168.1.1", "66:77:88:99:AA:BB", now=120)
+        
+        self.assertEqual(event.kind, 'conflict')
+        self.assertEqual(event.previous_mac, "00:11:22:33:44:55")
+        self.assertEqual(event.mac, "66:77:88:99:aa:bb")
+        self.assertEqual(table.get("192.168.1.1"), "66:77:88:99:aa:bb")
+        
+    def test_flapping(self):
+        table = ARPBindingTable(window=600, flap_threshold=3)
+        table.observe("192.168.1.1", "00:00:00:00:00:01", now=0)
+        kinds = [table.observe("192.168.1.1", mac, now=t).kind
+                 for t, mac in [(10, "00:00:00:00:00:02"), (20, "00:00:00:00:00:01"), (30, "00:00:00:00:00:02")]]
+        
+        self.assertEqual(kinds, ['conflict', 'conflict', 'flap'])
+        self.assertEqual(len(table.history("192.168.1.1")), 3)
+        
+    def test_expired_binding_is_reassigned_silently(self):
+        table = ARPBindingTable(window=600)
+        table.observe("192.168.1.50", "00:00:00:00:00:01", now=0)
+        self.assertIsNone(table.observe("192.168.1.50", "00:00:00:00:00:02", now=5000))
+        
+    def test_block_only_once(self):
+        table = ARPBindingTable()
+        self.assertTrue(table.mark_blocked("192.168.1.1", "00:00:00:00:00:02"))
+        self.assertFalse(table.mark_blocked("192.168.1.1", "00:00:00:00:00:02"))
+
+if __name__ == '__main__':
+    unittest.main()